@@ -0,0 +1,7 @@
+"""Benchmarks of the storage, write and read paths of the app.
+
+Every benchmark runs on a scratch database in a temporary directory, see benchmarks.common, and prints
+one table of results. Run them from the repository root, e.g.
+
+    python -m benchmarks.storage_backends --rows 20000
+"""
@@ -0,0 +1,108 @@
+"""Rows moved by an archive run, the hot table sizes and the board reads before and after it.
+
+The boards are seeded over the teams with tasks on each, and --closed of them are closed long enough ago to be
+archived. The reads are list_boards of every team, the way GET /boards/{team_id} serves them, and the time in
+status of the open boards; archived boards are read back with describe_archived_board and export_board.
+
+    python -m benchmarks.archive --teams 100 --boards 20000 --tasks 10 --closed 0.8
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from benchmarks.common import report, seed_boards, seed_tasks, seed_teams, seed_users, timed
+
+from database import db_models as db_model
+from database.database import session
+from main import create_tables
+from services.archive_service import ArchiveService
+from services.board_task_service import BoardTaskService
+from services.status_history_service import StatusHistoryService
+
+
+def read_boards(team_ids, open_board_ids):
+    """seconds to list the boards of every team and the time in status of the open boards"""
+    db = session()
+    try:
+        with timed() as lists:
+            for team_id in team_ids:
+                BoardTaskService(db).list_boards(json.dumps({'id': team_id}))
+        with timed() as status_times:
+            for board_id in open_board_ids:
+                StatusHistoryService(db).get_time_in_status(json.dumps({'board_id': board_id}))
+    finally:
+        db.close()
+    return lists['seconds'], status_times['seconds']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, default=100, help="teams the boards are spread over")
+    parser.add_argument("--boards", type=int, default=20000, help="boards seeded")
+    parser.add_argument("--tasks", type=int, default=10, help="tasks per board")
+    parser.add_argument("--closed", type=float, default=0.8, help="fraction of the boards closed long ago")
+    parser.add_argument("--samples", type=int, default=100, help="open boards read and archived boards read back")
+    args = parser.parse_args()
+
+    create_tables()
+    db = session()
+    user_ids = seed_users(db, args.teams)
+    team_ids = seed_teams(db, user_ids, args.teams)
+    board_ids = seed_boards(db, team_ids, args.boards)
+    seed_tasks(db, board_ids, user_ids, args.tasks, status="COMPLETE")
+    # closed boards are spread over the teams, closed * 100 of every 100 boards
+    closed_ids = [board_id for index, board_id in enumerate(board_ids) if (index % 100) < args.closed * 100]
+    for start in range(0, len(closed_ids), 10000):
+        db.execute(
+            update(db_model.Board.__table__).where(
+                db_model.Board.board_id.in_(closed_ids[start:start + 10000])
+            ).values(board_status='CLOSED', board_end_time=datetime.now() - timedelta(days=365))
+        )
+    db.commit()
+    db.close()
+    open_ids = sorted(set(board_ids) - set(closed_ids))[:args.samples]
+    archived_ids = closed_ids[:args.samples]
+
+    lists_before, status_times_before = read_boards(team_ids, open_ids)
+    db = session()
+    try:
+        with timed() as archive_run:
+            moved = json.loads(ArchiveService(db).archive_closed_boards(json.dumps({'days': 30})))
+    finally:
+        db.close()
+    lists_after, status_times_after = read_boards(team_ids, open_ids)
+
+    db = session()
+    try:
+        with timed() as described:
+            for board_id in archived_ids:
+                ArchiveService(db).describe_archived_board(json.dumps({'id': board_id}))
+        with timed() as exported:
+            for board_id in archived_ids:
+                BoardTaskService(db).export_board(json.dumps({'id': board_id}))
+    finally:
+        db.close()
+
+    report("Archive run", [{
+        'boards moved': moved['boards_moved'],
+        'tasks moved': moved['tasks_moved'],
+        'run s': archive_run['seconds'],
+        'tasks moved/s': moved['tasks_moved'] / archive_run['seconds'],
+        'hot boards': f"{moved['hot_boards_before']} -> {moved['hot_boards_after']}",
+        'hot tasks': f"{moved['hot_tasks_before']} -> {moved['hot_tasks_after']}"
+    }])
+    report("Reads of the hot tables, seconds", [
+        {'when': "before", 'list_boards of all teams': lists_before, 'open board status times': status_times_before},
+        {'when': "after", 'list_boards of all teams': lists_after, 'open board status times': status_times_after}
+    ])
+    if archived_ids:
+        report(f"Reads of {len(archived_ids)} archived boards, ms per board", [{
+            'describe_archived_board': described['seconds'] * 1000 / len(archived_ids),
+            'export_board': exported['seconds'] * 1000 / len(archived_ids)
+        }])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Snapshot, dump and restore of a large database, and the writes made while they run.
+
+The database is seeded with --tasks tasks over --boards boards. A snapshot is taken with the backup API, a
+dump is written and restored into a new file, each timed while a writer thread keeps updating task statuses,
+so the table shows how long the online backups hold writers off.
+
+    python -m benchmarks.backup --tasks 1000000 --boards 10000
+"""
+import argparse
+import os
+import threading
+
+from sqlalchemy import update
+
+from benchmarks.common import SCRATCH_DIR, percentile, report, seed_boards, seed_tasks, seed_teams, seed_users, timed
+
+from config import SETTINGS
+from constants.constraint_constants import TaskStatuses
+from database import db_models as db_model
+from database.backup import dump_database, restore_database, snapshot_database
+from database.database import engine, session
+from main import create_tables
+
+
+class Writer:
+    """updates task statuses one commit at a time until stopped, keeping the latency of every write"""
+
+    def __init__(self, task_ids):
+        self.task_ids = task_ids
+        self.latencies = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        db = session()
+        statuses = [status.value for status in TaskStatuses]
+        index = 0
+        try:
+            while not self._stop.is_set():
+                with timed() as write:
+                    db.execute(
+                        update(db_model.Task.__table__).where(
+                            db_model.Task.task_id == self.task_ids[index % len(self.task_ids)]
+                        ).values(task_status=statuses[index % len(statuses)])
+                    )
+                    db.commit()
+                self.latencies.append(write['seconds'])
+                index += 1
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000000, help="tasks in the database")
+    parser.add_argument("--boards", type=int, default=10000, help="boards the tasks are spread over")
+    args = parser.parse_args()
+
+    create_tables()
+    db = session()
+    user_ids = seed_users(db, 1000)
+    team_ids = seed_teams(db, user_ids, 100)
+    board_ids = seed_boards(db, team_ids, args.boards)
+    task_ids = seed_tasks(db, board_ids, user_ids, args.tasks // args.boards)
+    db.close()
+    database_path = SETTINGS.database_url[len("sqlite:///"):]
+
+    backup_dir = f"{SCRATCH_DIR}/backups"
+    os.makedirs(backup_dir, exist_ok=True)
+    operations = [
+        ("snapshot", lambda: snapshot_database(
+            engine, f"{backup_dir}/snapshot.db", SETTINGS.backup_pages_per_step, SETTINGS.backup_step_sleep_ms
+        )),
+        ("dump", lambda: dump_database(engine, f"{backup_dir}/dump.ndjson.gz")),
+        ("restore", lambda: restore_database(f"{backup_dir}/dump.ndjson.gz", f"{backup_dir}/restored.db"))
+    ]
+
+    rows = []
+    for name, operation in operations:
+        with Writer(task_ids) as writer:
+            with timed() as timing:
+                result = operation()
+        rows.append({
+            'operation': name,
+            'seconds': timing['seconds'],
+            'MB': os.path.getsize(result['file']) / 2 ** 20,
+            'rows/s': sum(result['rows'].values()) / timing['seconds'] if 'rows' in result else None,
+            'writes': len(writer.latencies),
+            'write p99 ms': percentile(writer.latencies, 0.99) * 1000 if writer.latencies else None,
+            'write max ms': max(writer.latencies) * 1000 if writer.latencies else None
+        })
+    report(
+        f"{args.tasks} tasks, database of {os.path.getsize(database_path) / 2 ** 20:.0f} MB, "
+        f"snapshot {SETTINGS.backup_pages_per_step} pages per step",
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
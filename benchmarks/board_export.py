@@ -0,0 +1,59 @@
+"""Boards exported per second by the multi-board export and by calling export_board board by board.
+
+The boards of one team are exported once with a BoardTaskService.export_board call per board, each reading its
+board and writing its own file, and then into one zip archive by BoardExportService.export_boards with each
+given number of render processes.
+
+    python -m benchmarks.board_export --boards 5000 --tasks 20 --workers 1 2 4
+"""
+import argparse
+import json
+import os
+
+from benchmarks.common import report, seed_boards, seed_tasks, seed_teams, seed_users, timed
+
+from database.database import session
+from main import create_tables
+from services.board_export_service import BoardExportService
+from services.board_task_service import BoardTaskService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boards", type=int, default=5000, help="boards of the exported team")
+    parser.add_argument("--tasks", type=int, default=20, help="tasks per board")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count()}), help="render processes to run"
+    )
+    args = parser.parse_args()
+
+    create_tables()
+    db = session()
+    user_ids = seed_users(db, 50)
+    team_id = seed_teams(db, user_ids, 1)[0]
+    board_ids = seed_boards(db, [team_id], args.boards)
+    seed_tasks(db, board_ids, user_ids, args.tasks)
+
+    rows = []
+    try:
+        with timed() as sequential:
+            for board_id in board_ids:
+                BoardTaskService(db).export_board(json.dumps({'id': board_id}))
+        rows.append({
+            'export': "export_board per board", 'workers': None, 'boards/s': args.boards / sequential['seconds']
+        })
+
+        for workers in args.workers:
+            with timed() as archive:
+                exported = json.loads(
+                    BoardExportService(db).export_boards(json.dumps({'team_id': team_id, 'workers': workers}))
+                )
+            assert exported['boards'] == args.boards, exported
+            rows.append({'export': "export_boards", 'workers': workers, 'boards/s': args.boards / archive['seconds']})
+    finally:
+        db.close()
+    report(f"{args.boards} boards with {args.tasks} tasks each, {os.cpu_count()} cpus", rows)
+
+
+if __name__ == "__main__":
+    main()
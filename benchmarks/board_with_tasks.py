@@ -0,0 +1,72 @@
+"""End-to-end time of creating a board with its tasks in one POST /board/with-tasks and one request at a time.
+
+The requests go through the whole app in process (routing, validation, services, commit) with the test client.
+One at a time is POST /board followed by POST /board/task per task, a commit per request, while with-tasks
+commits the board, tasks and their events once.
+
+    python -m benchmarks.board_with_tasks --boards 100 --tasks 20
+"""
+import argparse
+
+from fastapi.testclient import TestClient
+
+from benchmarks.common import percentile, report, seed_teams, seed_users, timed
+
+from database.database import session
+from main import app
+
+
+def one_at_a_time(client, name: str, team_id: int, user_id: int, tasks: int):
+    response = client.post('/board', json={'name': name, 'description': "Bench Board", 'team_id': team_id})
+    assert response.status_code == 200, response.text
+    board_id = response.json()['id']
+    for index in range(tasks):
+        response = client.post('/board/task', json={
+            'title': f"{name}-task-{index}", 'description': "Bench Task", 'board_id': board_id, 'user_id': user_id
+        })
+        assert response.status_code == 200, response.text
+
+
+def with_tasks(client, name: str, team_id: int, user_id: int, tasks: int):
+    response = client.post('/board/with-tasks', json={
+        'name': name,
+        'description': "Bench Board",
+        'team_id': team_id,
+        'tasks': [
+            {'title': f"{name}-task-{index}", 'description': "Bench Task", 'user_id': user_id}
+            for index in range(tasks)
+        ]
+    })
+    assert response.status_code == 200, response.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boards", type=int, default=100, help="boards created per way")
+    parser.add_argument("--tasks", type=int, default=20, help="tasks per board")
+    args = parser.parse_args()
+
+    rows = []
+    with TestClient(app) as client:
+        db = session()
+        user_ids = seed_users(db, 1)
+        team_id = seed_teams(db, user_ids, 1)[0]
+        db.close()
+
+        for way, create in (("one at a time", one_at_a_time), ("with-tasks", with_tasks)):
+            board_seconds = []
+            for index in range(args.boards):
+                with timed() as board:
+                    create(client, f"bench-{way.replace(' ', '-')}-{index}", team_id, user_ids[0], args.tasks)
+                board_seconds.append(board['seconds'])
+            rows.append({
+                'requests': way,
+                'boards/s': len(board_seconds) / sum(board_seconds),
+                'p50 ms': percentile(board_seconds, 0.5) * 1000,
+                'p95 ms': percentile(board_seconds, 0.95) * 1000
+            })
+    report(f"{args.boards} boards with {args.tasks} tasks each, end to end through the app", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Rows imported per second by the bulk import, from CSV and NDJSON files at several chunk sizes.
+
+An import file of --rows tasks is written for each run, new boards and task titles over the seeded teams and
+users, and imported with ImportService.import_file, one transaction per chunk. With --rejects a share of the
+rows carries an unknown status and is rejected, so the cost of validation shows too.
+
+    python -m benchmarks.bulk_import --rows 1000000 --chunk-sizes 1000 5000 20000
+"""
+import argparse
+import csv
+import json
+
+from benchmarks.common import SCRATCH_DIR, report, seed_teams, seed_users, timed
+
+from config import SETTINGS
+from constants.constraint_constants import TaskStatuses
+from database.database import session
+from main import create_tables
+from services.import_service import ImportService
+from utils.bulk_import import IMPORT_COLUMNS
+
+
+def import_rows(run: str, rows: int, team_names, user_names, tasks_per_board: int, rejects: float):
+    statuses = [status.value for status in TaskStatuses]
+    for index in range(rows):
+        board_index = index // tasks_per_board
+        rejected = rejects and (index % 100) < rejects * 100
+        yield {
+            'team_name': team_names[board_index % len(team_names)],
+            'board_name': f"{run}-board-{board_index}",
+            'board_description': "Imported Board",
+            'task_title': f"{run}-task-{index}",
+            'task_description': "Imported Task",
+            'user_name': user_names[index % len(user_names)],
+            'task_status': "UNKNOWN" if rejected else statuses[index % len(statuses)]
+        }
+
+
+def write_import_file(path: str, file_format: str, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as import_file:
+        if file_format == "csv":
+            writer = csv.DictWriter(import_file, IMPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                import_file.write(json.dumps(row) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000, help="task rows per import file")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[1000, 5000, 20000], help="rows per transaction")
+    parser.add_argument("--formats", nargs="+", choices=["csv", "ndjson"], default=["csv", "ndjson"])
+    parser.add_argument("--teams", type=int, default=100, help="teams the imported boards belong to")
+    parser.add_argument("--tasks-per-board", type=int, default=50, help="rows of one board")
+    parser.add_argument("--rejects", type=float, default=0.0, help="share of rows with an unknown status")
+    args = parser.parse_args()
+
+    create_tables()
+    db = session()
+    user_ids = seed_users(db, 1000)
+    team_names = [f"bench-team-{team_id}" for team_id in seed_teams(db, user_ids, args.teams)]
+    db.close()
+    user_names = [f"bench-user-{user_id}" for user_id in user_ids]
+
+    rows = []
+    for file_format in args.formats:
+        for chunk_size in args.chunk_sizes:
+            run = f"{file_format}-{chunk_size}"
+            path = f"{SCRATCH_DIR}/{run}.{file_format}"
+            write_import_file(
+                path, file_format,
+                import_rows(run, args.rows, team_names, user_names, args.tasks_per_board, args.rejects)
+            )
+            SETTINGS.import_chunk_size = chunk_size
+            db = session()
+            try:
+                with timed() as timing:
+                    summary = json.loads(ImportService(db).import_file(
+                        json.dumps({'path': path, 'format': file_format, 'import_id': run})
+                    ))
+            finally:
+                db.close()
+            rows.append({
+                'format': file_format,
+                'chunk size': chunk_size,
+                'imported': summary['imported'],
+                'rejected': summary['rejected'],
+                'boards created': summary['boards_created'],
+                'seconds': timing['seconds'],
+                'rows/s': args.rows / timing['seconds']
+            })
+    report(f"Import of {args.rows} rows", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Setup and reporting shared by the benchmarks.
+
+Importing this module points the database and every directory the app writes to at a scratch directory
+(FACTWISE_BENCH_DIR, a new temporary directory by default), so it is imported before config and any other
+module of the app. Worker processes started by a benchmark inherit the settings through the environment.
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+SCRATCH_DIR = os.environ.setdefault("FACTWISE_BENCH_DIR", tempfile.mkdtemp(prefix="factwise-bench-"))
+os.environ["FACTWISE_DATABASE_URL"] = f"sqlite:///{SCRATCH_DIR}/factwise_board.db"
+os.environ["FACTWISE_SQL_ECHO"] = "false"
+os.environ["FACTWISE_WARM_UP_ENABLED"] = "false"
+for _setting, _directory in (
+        ("FACTWISE_IMPORT_DIR", "imports"),
+        ("FACTWISE_BACKUP_DIR", "backups"),
+        ("FACTWISE_TENANT_DB_DIR", "tenants"),
+        ("FACTWISE_LOG_STORE_DIR", "log_store")
+):
+    os.environ[_setting] = f"{SCRATCH_DIR}/{_directory}"
+
+from sqlalchemy import func  # noqa: E402
+
+from database import db_models as db_model  # noqa: E402
+from logger import LOGGER  # noqa: E402
+
+# the services log every write at INFO, which would be timed along with them
+LOGGER.remove()
+LOGGER.add(sys.stderr, level="WARNING")
+
+from utils import export_board  # noqa: E402
+
+# exports are written relative to the working directory otherwise
+export_board.EXPORT_DIR_PATH = Path(SCRATCH_DIR) / "out"
+export_board.EXPORT_DIR_PATH.mkdir(exist_ok=True)
+
+# rows per executemany of the seeding helpers
+SEED_CHUNK_SIZE = 10000
+
+
+@contextmanager
+def timed() -> Iterator[Dict[str, float]]:
+    """measures the wall time of the block into the yielded dict under 'seconds'"""
+    timing = {'seconds': 0.0}
+    start_time = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing['seconds'] = time.perf_counter() - start_time
+
+
+def seed_users(db, count: int) -> List[int]:
+    """inserts count users in bulk, returns their ids"""
+    return _seed(db, db_model.User, db_model.User.user_id, count, lambda user_id: {
+        'user_name': f"bench-user-{user_id}", 'user_display_name': f"Bench User {user_id}"
+    })
+
+
+def seed_teams(db, admin_ids: Sequence[int], count: int) -> List[int]:
+    """inserts count teams in bulk, each with one of admin_ids as admin and only member, returns their ids"""
+    team_ids = _seed(db, db_model.Team, db_model.Team.team_id, count, lambda team_id: {
+        'team_name': f"bench-team-{team_id}",
+        'description': "Bench Team",
+        'team_admin': admin_ids[team_id % len(admin_ids)],
+        'member_count': 1
+    })
+    insert_rows(db, db_model.user_team_association, (
+        {'user_id': admin_ids[team_id % len(admin_ids)], 'team_id': team_id} for team_id in team_ids
+    ))
+    db.commit()
+    return team_ids
+
+
+def seed_boards(db, team_ids: Sequence[int], count: int) -> List[int]:
+    """inserts count open boards in bulk, spread over team_ids, returns their ids"""
+    return _seed(db, db_model.Board, db_model.Board.board_id, count, lambda board_id: {
+        'board_name': f"bench-board-{board_id}",
+        'description': "Bench Board",
+        'board_team_id': team_ids[board_id % len(team_ids)],
+        'board_status': "OPEN"
+    })
+
+
+def seed_tasks(db, board_ids: Sequence[int], user_ids: Sequence[int], per_board: int, status: str = "OPEN"
+               ) -> List[int]:
+    """inserts per_board tasks on each of board_ids in bulk, assigned round robin to user_ids, returns their ids"""
+    first_task_id = (db.query(func.max(db_model.Task.task_id)).scalar() or 0) + 1
+    return _seed(db, db_model.Task, db_model.Task.task_id, len(board_ids) * per_board, lambda task_id: {
+        'task_title': f"bench-task-{task_id}",
+        'description': "Bench Task",
+        'board_id': board_ids[(task_id - first_task_id) // per_board],
+        'task_assign_id': user_ids[task_id % len(user_ids)],
+        'task_status': status
+    })
+
+
+def insert_rows(db, table, rows: Iterable[Dict[str, Any]]):
+    """inserts the rows into the table with an executemany per SEED_CHUNK_SIZE rows, does not commit"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == SEED_CHUNK_SIZE:
+            db.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        db.execute(table.insert(), chunk)
+
+
+def _seed(db, object_type, id_column, count: int, values) -> List[int]:
+    first_id = (db.query(func.max(id_column)).scalar() or 0) + 1
+    ids = list(range(first_id, first_id + count))
+    insert_rows(db, object_type.__table__, ({id_column.key: row_id, **values(row_id)} for row_id in ids))
+    db.commit()
+    return ids
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """nearest rank percentile of the values, fraction between 0 and 1"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def report(title: str, rows: List[Dict[str, Any]]):
+    """prints the rows as a table with a column per key of the first row"""
+    columns = list(rows[0])
+    cells = [[_cell(row[column]) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(line[index]) for line in cells)) for index, column in enumerate(columns)]
+    print(f"\n{title}")
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for line in cells:
+        print("  ".join(cell.rjust(width) for cell, width in zip(line, widths)))
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.3f}" if value < 100 else f"{value:,.0f}"
+    return str(value)
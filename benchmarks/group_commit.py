@@ -0,0 +1,100 @@
+"""Throughput and latency of concurrent task status updates, committed one by one and group committed.
+
+Request threads call BoardTaskService.update_task_status on sessions of their own, like the server threads do.
+The updates run once with a commit per request and once per group commit window. With --synchronous FULL every
+commit waits for an fsync, which is the cost group commit shares among the updates of a batch.
+
+    python -m benchmarks.group_commit --threads 32 --updates 5000 --windows 1 5 20 [--synchronous FULL]
+"""
+import argparse
+import json
+import threading
+
+from sqlalchemy import event
+
+from benchmarks.common import percentile, report, seed_boards, seed_tasks, seed_teams, seed_users, timed
+
+from config import SETTINGS
+from constants.constraint_constants import TaskStatuses
+from daos.group_commit import stop_group_committers
+from database.database import engine, session
+from main import create_tables
+from services.board_task_service import BoardTaskService
+
+
+def run_updates(task_ids, threads: int, updates: int):
+    """updates the status of the tasks from request threads, returns updates per second and the latencies"""
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def request_thread(thread_index: int):
+        thread_latencies = []
+        for index in range(thread_index, updates, threads):
+            # flips every task between the two statuses, so each update is a transition
+            status = TaskStatuses.in_progress if (index // len(task_ids)) % 2 == 0 else TaskStatuses.open
+            request = json.dumps({'id': task_ids[index % len(task_ids)], 'status': status.value})
+            db = session()
+            try:
+                with timed() as update:
+                    BoardTaskService(db).update_task_status(request)
+            finally:
+                db.close()
+            thread_latencies.append(update['seconds'])
+        with latencies_lock:
+            latencies.extend(thread_latencies)
+
+    workers = [threading.Thread(target=request_thread, args=(index,)) for index in range(threads)]
+    with timed() as run:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    return updates / run['seconds'], latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32, help="concurrent request threads")
+    parser.add_argument("--updates", type=int, default=5000, help="status updates per run")
+    parser.add_argument("--tasks", type=int, default=1000, help="tasks whose status is updated")
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 5, 20], help="group commit windows in ms")
+    parser.add_argument("--synchronous", choices=["NORMAL", "FULL"], default="NORMAL", help="SQLite synchronous")
+    args = parser.parse_args()
+
+    @event.listens_for(engine, "connect")
+    def set_synchronous(dbapi_connection, connection_record):
+        # after configure_sqlite_connection, which sets NORMAL
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA synchronous={args.synchronous}")
+        cursor.close()
+
+    create_tables()
+    db = session()
+    user_ids = seed_users(db, 10)
+    board_ids = seed_boards(db, seed_teams(db, user_ids, 1), 1)
+    task_ids = seed_tasks(db, board_ids, user_ids, args.tasks)
+    db.close()
+    # the pool only holds connections opened before the listener
+    engine.dispose()
+
+    rows = []
+    for window_ms in [None, *args.windows]:
+        SETTINGS.group_commit_enabled = window_ms is not None
+        if window_ms is not None:
+            # the committer reads its window when it starts
+            stop_group_committers()
+            SETTINGS.group_commit_window_ms = window_ms
+        updates_per_second, latencies = run_updates(task_ids, args.threads, args.updates)
+        rows.append({
+            'commit': "per request" if window_ms is None else f"group, {window_ms} ms window",
+            'updates/s': updates_per_second,
+            'p50 ms': percentile(latencies, 0.5) * 1000,
+            'p95 ms': percentile(latencies, 0.95) * 1000,
+            'p99 ms': percentile(latencies, 0.99) * 1000
+        })
+    stop_group_committers()
+    report(f"{args.updates} status updates from {args.threads} threads, synchronous={args.synchronous}", rows)
+
+
+if __name__ == "__main__":
+    main()
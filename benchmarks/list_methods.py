@@ -0,0 +1,96 @@
+"""Rows per second of the list methods, read into NamedTuple rows, and of the per-row Pydantic models they replaced.
+
+Every method is run a few times on a seeded database and the best run is reported. The Pydantic column builds
+the models with from_orm, loading their relationship lists row by row, the way the list methods did before.
+
+    python -m benchmarks.list_methods --users 10000 --teams 1000 --boards 500 --tasks 5000
+"""
+import argparse
+import json
+
+from benchmarks.common import report, seed_boards, seed_tasks, seed_teams, seed_users, timed
+
+from database import db_models as db_model
+from database.database import session
+from main import create_tables
+from models import models as pydantic_models
+from services.board_task_service import BoardTaskService
+from services.team_service import TeamService
+from services.user_service import UserService
+
+
+def best_seconds(call, repeat: int) -> float:
+    """fastest of repeat runs of call, each on a new session like a request"""
+    runs = []
+    for _ in range(repeat):
+        db = session()
+        try:
+            with timed() as run:
+                call(db)
+        finally:
+            db.close()
+        runs.append(run['seconds'])
+    return min(runs)
+
+
+def pydantic_users(db):
+    return [pydantic_models.UserWithTeamsAndTasks.from_orm(user) for user in db.query(db_model.User)]
+
+
+def pydantic_teams(db):
+    return [pydantic_models.TeamWithUsers.from_orm(team) for team in db.query(db_model.Team)]
+
+
+def pydantic_boards(team_id: int):
+    def boards(db):
+        board_models = db.query(db_model.Board).filter(db_model.Board.board_team_id == team_id)
+        return [pydantic_models.BoardWithTasks.from_orm(board) for board in board_models]
+    return boards
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000, help="users listed by list_users")
+    parser.add_argument("--teams", type=int, default=1000, help="teams listed by list_teams")
+    parser.add_argument("--boards", type=int, default=500, help="boards of the team listed by list_boards")
+    parser.add_argument("--tasks", type=int, default=5000, help="tasks of the board exported by export_board")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per method, the best one is reported")
+    args = parser.parse_args()
+
+    create_tables()
+    db = session()
+    user_ids = seed_users(db, args.users)
+    team_ids = seed_teams(db, user_ids, args.teams)
+    # every board on the first team, which gets the boards and tasks listed below
+    board_ids = seed_boards(db, team_ids[:1], args.boards)
+    seed_tasks(db, board_ids[1:], user_ids, 10)
+    export_task_count = len(seed_tasks(db, board_ids[:1], user_ids, args.tasks))
+    db.close()
+
+    list_boards_request = json.dumps({'id': team_ids[0]})
+    export_request = json.dumps({'id': board_ids[0]})
+    methods = [
+        ("list_users", args.users, lambda db: UserService(db).list_users(), pydantic_users),
+        ("list_teams", args.teams, lambda db: TeamService(db).list_teams(), pydantic_teams),
+        (
+            "list_boards", args.boards,
+            lambda db: BoardTaskService(db).list_boards(list_boards_request), pydantic_boards(team_ids[0])
+        ),
+        ("export_board", export_task_count, lambda db: BoardTaskService(db).export_board(export_request), None)
+    ]
+
+    rows = []
+    for name, row_count, call, pydantic_call in methods:
+        seconds = best_seconds(call, args.repeat)
+        pydantic_seconds = best_seconds(pydantic_call, args.repeat) if pydantic_call else None
+        rows.append({
+            'method': name,
+            'rows': row_count,
+            'rows/s': row_count / seconds,
+            'pydantic rows/s': row_count / pydantic_seconds if pydantic_seconds else None
+        })
+    report(f"List methods, best of {args.repeat} runs", rows)
+
+
+if __name__ == "__main__":
+    main()
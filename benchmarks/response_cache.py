@@ -0,0 +1,81 @@
+"""Requests per second of GET /users and GET /boards/{team_id} with the response cache off and on.
+
+The requests go through the app in process with the test client, over --users users and a team with --boards
+boards. With --write-every N a write to the listed tables follows every N reads, a user rename for the users
+and a task status update for the boards, so the table shows the cache as reads get mixed with writes.
+
+    python -m benchmarks.response_cache --users 10000 --requests 500 --write-every 0 10
+"""
+import argparse
+
+from fastapi.testclient import TestClient
+
+from benchmarks.common import percentile, report, seed_boards, seed_tasks, seed_teams, seed_users, timed
+
+from config import SETTINGS
+from constants.constraint_constants import TaskStatuses
+from database.database import session
+from main import app
+from utils.response_cache import RESPONSE_CACHE
+
+
+def run_reads(client, path: str, requests: int, write_every: int, write):
+    """sends the reads with a write after every write_every of them, returns the read latencies"""
+    latencies = []
+    for index in range(requests):
+        with timed() as read:
+            response = client.get(path)
+        assert response.status_code == 200, response.text
+        latencies.append(read['seconds'])
+        if write_every and (index + 1) % write_every == 0:
+            response = write(index)
+            assert response.status_code == 200, response.text
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000, help="users listed by GET /users")
+    parser.add_argument("--boards", type=int, default=500, help="boards listed by GET /boards/{team_id}")
+    parser.add_argument("--requests", type=int, default=500, help="reads per run")
+    parser.add_argument("--write-every", type=int, nargs="+", default=[0, 10], help="reads per write, 0 for none")
+    args = parser.parse_args()
+
+    rows = []
+    with TestClient(app) as client:
+        db = session()
+        user_ids = seed_users(db, args.users)
+        team_id = seed_teams(db, user_ids, 1)[0]
+        task_ids = seed_tasks(db, seed_boards(db, [team_id], args.boards), user_ids, 10)
+        db.close()
+
+        def rename_user(index):
+            user_id = user_ids[index % len(user_ids)]
+            return client.put('/user', json={
+                'id': user_id, 'user': {'name': f"bench-user-{user_id}", 'display_name': f"Renamed {index}"}
+            })
+
+        def update_task_status(index):
+            status = TaskStatuses.in_progress if index // len(task_ids) % 2 == 0 else TaskStatuses.open
+            return client.put('/board/task', json={'id': task_ids[index % len(task_ids)], 'status': status.value})
+
+        for path, write in (("/users", rename_user), (f"/boards/{team_id}", update_task_status)):
+            for write_every in args.write_every:
+                for cache_enabled in (False, True):
+                    SETTINGS.response_cache_enabled = cache_enabled
+                    hits = RESPONSE_CACHE.metrics['hits']
+                    latencies = run_reads(client, path, args.requests, write_every, write)
+                    rows.append({
+                        'path': path,
+                        'reads per write': write_every or None,
+                        'cache': "on" if cache_enabled else "off",
+                        'reads/s': len(latencies) / sum(latencies),
+                        'p50 ms': percentile(latencies, 0.5) * 1000,
+                        'p95 ms': percentile(latencies, 0.95) * 1000,
+                        'hit rate': (RESPONSE_CACHE.metrics['hits'] - hits) / args.requests if cache_enabled else None
+                    })
+    report(f"{args.requests} reads, {args.users} users, {args.boards} boards of 10 tasks", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Time per call of the hot CommonDao lookups with the prebuilt statements of dao_statement_cache and without.
+
+Each call shape runs --calls times on one session, the best of --repeat runs is reported in microseconds per
+call. Lookups by unique name and by id, a row projection by id list and an update by id (with its commit) are
+measured; the difference is the Python time spent building the statements, the SQLite work is the same.
+
+    python -m benchmarks.statement_cache --calls 20000
+"""
+import argparse
+
+from benchmarks.common import report, seed_boards, seed_tasks, seed_teams, seed_users, timed
+
+from config import SETTINGS
+from constants.constraint_constants import TaskStatuses
+from daos.common_dao import CommonDao
+from database import db_models as db_model
+from database.database import session
+from main import create_tables
+from models.row_models import BoardTaskRow, UserRow
+
+
+def call_shapes(user_ids, board_ids, task_ids):
+    statuses = [status.value for status in TaskStatuses]
+    return [
+        ("get_object by name", lambda dao, index: dao.get_object(
+            db_model.User, db_model.User.user_name == f"bench-user-{user_ids[index % len(user_ids)]}"
+        )),
+        ("get_object by id", lambda dao, index: dao.get_object(
+            db_model.Task, db_model.Task.task_id == task_ids[index % len(task_ids)]
+        )),
+        ("get_rows by id", lambda dao, index: dao.get_rows(
+            UserRow, db_model.User, db_model.User.user_id == user_ids[index % len(user_ids)]
+        )),
+        ("get_rows by id list", lambda dao, index: dao.get_rows(
+            BoardTaskRow, db_model.Task, db_model.Task.board_id.in_(board_ids[index % 10:index % 10 + 5])
+        )),
+        ("update_object by id", lambda dao, index: dao.update_object(
+            db_model.Task, db_model.Task.task_id == task_ids[index % len(task_ids)],
+            {'task_status': statuses[index % len(statuses)]}
+        ))
+    ]
+
+
+def microseconds_per_call(call, calls: int, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        db = session()
+        dao = CommonDao(db)
+        try:
+            with timed() as run:
+                for index in range(calls):
+                    call(dao, index)
+        finally:
+            db.close()
+        runs.append(run['seconds'])
+    return min(runs) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000, help="calls per run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per call shape, the best one is reported")
+    args = parser.parse_args()
+
+    create_tables()
+    db = session()
+    user_ids = seed_users(db, 10000)
+    board_ids = seed_boards(db, seed_teams(db, user_ids, 10), 100)
+    task_ids = seed_tasks(db, board_ids, user_ids, 10)
+    db.close()
+
+    rows = []
+    for name, call in call_shapes(user_ids, board_ids, task_ids):
+        SETTINGS.dao_statement_cache = False
+        built = microseconds_per_call(call, args.calls, args.repeat)
+        SETTINGS.dao_statement_cache = True
+        cached = microseconds_per_call(call, args.calls, args.repeat)
+        rows.append({'call': name, 'built us': built, 'cached us': cached, 'speedup': built / cached})
+    report(f"CommonDao, best of {args.repeat} runs of {args.calls} calls", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Time in status and the CSV export over a large task status history.
+
+The history is inserted straight into task_status_transitions, every task cycling through OPEN, IN_PROGRESS and
+COMPLETE, spread over the boards of one team. Time in status is computed for one board and for the whole team,
+and the team history is streamed as CSV. Peak memory is measured with tracemalloc in a separate run, so it does
+not slow down the timed one.
+
+    python -m benchmarks.status_history --transitions 10000000 --tasks 100000 --boards 10
+"""
+import argparse
+import json
+import tracemalloc
+
+from benchmarks.common import insert_rows, report, seed_boards, seed_tasks, seed_teams, seed_users, timed
+
+from constants.constraint_constants import TaskStatuses
+from database import db_models as db_model
+from database.database import session
+from main import create_tables
+from services.status_history_service import StatusHistoryService
+
+STATUS_CYCLE = [status.value for status in TaskStatuses]
+# the history starts on 2024-01-01 and every stay lasts between one minute and a few hours
+FIRST_TRANSITION_MS = 1704067200000
+
+
+def seed_history(db, board_ids, task_ids, per_task: int):
+    """replaces the history of the tasks with per_task transitions each"""
+    board_of_task = {
+        task_id: board_ids[index * len(board_ids) // len(task_ids)] for index, task_id in enumerate(task_ids)
+    }
+    db.execute(db_model.TaskStatusTransition.__table__.delete())
+    insert_rows(db, db_model.TaskStatusTransition.__table__, (
+        {
+            'task_id': task_id,
+            'board_id': board_of_task[task_id],
+            'from_status': STATUS_CYCLE[(step - 1) % len(STATUS_CYCLE)] if step else None,
+            'to_status': STATUS_CYCLE[step % len(STATUS_CYCLE)],
+            'transition_ms': FIRST_TRANSITION_MS + step * 3600000 + (task_id * 7919 + step * 104729) % 3540000
+        }
+        for task_id in task_ids
+        for step in range(per_task)
+    ))
+    db.commit()
+
+
+def run(call):
+    db = session()
+    try:
+        return call(StatusHistoryService(db))
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transitions", type=int, default=10000000, help="status transitions in the history")
+    parser.add_argument("--tasks", type=int, default=100000, help="tasks the transitions are spread over")
+    parser.add_argument("--boards", type=int, default=10, help="boards of the team the tasks are spread over")
+    args = parser.parse_args()
+
+    create_tables()
+    db = session()
+    user_ids = seed_users(db, 10)
+    team_id = seed_teams(db, user_ids, 1)[0]
+    board_ids = seed_boards(db, [team_id], args.boards)
+    task_ids = seed_tasks(db, board_ids, user_ids, args.tasks // args.boards)
+    per_task = args.transitions // len(task_ids)
+    with timed() as seeding:
+        seed_history(db, board_ids, task_ids, per_task)
+    db.close()
+    transitions = per_task * len(task_ids)
+    print(f"Seeded {transitions} transitions in {seeding['seconds']:.0f}s")
+
+    board_request = json.dumps({'board_id': board_ids[0]})
+    team_request = json.dumps({'team_id': team_id})
+    runs = [
+        ("time in status, one board", transitions // args.boards,
+         lambda service: service.get_time_in_status(board_request)),
+        ("time in status, team", transitions, lambda service: service.get_time_in_status(team_request)),
+        ("CSV export, team", transitions, lambda service: sum(map(len, service.dump_transitions_csv(team_request))))
+    ]
+
+    rows = []
+    for name, run_transitions, call in runs:
+        with timed() as timing:
+            run(call)
+        tracemalloc.start()
+        run(call)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append({
+            'run': name,
+            'transitions': run_transitions,
+            'seconds': timing['seconds'],
+            'transitions/s': run_transitions / timing['seconds'],
+            'peak MB': peak_bytes / 2 ** 20
+        })
+    report("Status history", rows)
+
+
+if __name__ == "__main__":
+    main()
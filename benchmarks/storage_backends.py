@@ -0,0 +1,113 @@
+"""Write throughput, lookups and startup time of the sqlite and log storage backends.
+
+Both backends are driven through CommonDao the way the services use it: every create and update is its own
+commit and every lookup by unique name runs on a new session, like one request. Startup is the time until
+the first lookup can be answered, opening the SQLite file or replaying the log store (before and after
+compaction).
+
+    python -m benchmarks.storage_backends --rows 20000 [--fsync]
+"""
+import argparse
+
+from benchmarks.common import SCRATCH_DIR, report, timed
+
+from config import SETTINGS
+from database import db_models as db_model
+from database.database import create_database_engine, session
+from daos.common_dao import CommonDao
+from daos.log_storage_backend import LogStorageBackend
+from daos.storage_backend import SqlAlchemyStorageBackend
+from main import create_tables
+
+
+def run_workload(new_dao, rows: int):
+    """creates, updates and looks up users through the daos returned by new_dao"""
+    dao = new_dao()
+    with timed() as creates:
+        user_ids = [
+            dao.create_object(db_model.User(user_name=f"user-{index}", user_display_name="Bench User")).user_id
+            for index in range(rows)
+        ]
+    with timed() as updates:
+        for user_id in user_ids:
+            dao.update_object(db_model.User, db_model.User.user_id == user_id, {'user_display_name': "Renamed"})
+    with timed() as lookups:
+        for index in range(rows):
+            assert new_dao().get_object(db_model.User, db_model.User.user_name == f"user-{index}") is not None
+    return {
+        'creates/s': rows / creates['seconds'],
+        'updates/s': rows / updates['seconds'],
+        'lookups/s': rows / lookups['seconds']
+    }
+
+
+def sqlite_backend(rows: int):
+    create_tables()
+    sessions = []
+
+    def new_dao():
+        # the session of the previous "request" is done
+        while sessions:
+            sessions.pop().close()
+        sessions.append(session())
+        return CommonDao(sessions[-1], SqlAlchemyStorageBackend(sessions[-1]))
+
+    results = run_workload(new_dao, rows)
+    new_dao().db.close()
+
+    with timed() as startup:
+        restarted_engine = create_database_engine(SETTINGS.database_url)
+        restarted_session = session(bind=restarted_engine)
+        CommonDao(restarted_session, SqlAlchemyStorageBackend(restarted_session)).get_object(
+            db_model.User, db_model.User.user_name == "user-0"
+        )
+    restarted_session.close()
+    restarted_engine.dispose()
+    return {'backend': "sqlite", **results, 'startup s': startup['seconds'], 'compacted startup s': None}
+
+
+def log_backend(rows: int, fsync: bool):
+    directory = f"{SCRATCH_DIR}/log_store"
+    # never compacted during the run, so the first restart replays every record
+    log_store = LogStorageBackend(directory, compact_every=rows * 10, fsync=fsync)
+    log_store.load()
+    # CommonDao keeps the unit of work state on the session, the log backend does not use it otherwise
+    state_session = session()
+    results = run_workload(lambda: CommonDao(state_session, log_store), rows)
+    log_store.close()
+
+    def restart():
+        restarted = LogStorageBackend(directory, compact_every=rows * 10, fsync=fsync)
+        restarted.load()
+        restarted.get_object(db_model.User, db_model.User.user_name == "user-0")
+        return restarted
+
+    with timed() as replay:
+        restarted = restart()
+    restarted.compact()
+    restarted.close()
+    with timed() as compacted_replay:
+        restart().close()
+    state_session.close()
+    return {
+        'backend': "log" + (" (fsync)" if fsync else ""),
+        **results,
+        'startup s': replay['seconds'],
+        'compacted startup s': compacted_replay['seconds']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="users created, updated and looked up")
+    parser.add_argument("--fsync", action="store_true", help="fsync every log store append")
+    args = parser.parse_args()
+
+    report(
+        f"CommonDao on {args.rows} users, sqlite in WAL mode with synchronous=NORMAL",
+        [sqlite_backend(args.rows), log_backend(args.rows, args.fsync)]
+    )
+
+
+if __name__ == "__main__":
+    main()
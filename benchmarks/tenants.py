@@ -0,0 +1,99 @@
+"""Task writes per second of --writers processes spread over 1..N tenant databases.
+
+Every writer process sends --writes task creations (POST /board/task) on a board of its own through the app
+in process with the test client, naming its tenant with the X-Tenant-Id header. The writers share the tenant
+databases round robin, the first row writes them all to the default database instead. Writers on one SQLite
+file queue on its write lock, so writes per second should grow with the tenants up to the cores of the machine.
+
+    python -m benchmarks.tenants --writers 8 --tenants 1 2 4 8 --writes 300
+"""
+import argparse
+import multiprocessing
+import uuid
+from typing import Optional
+
+from fastapi.testclient import TestClient
+
+from benchmarks.common import percentile, report, seed_boards, seed_teams, seed_users, timed
+
+from config import SETTINGS
+from database.database import engine, session, TENANT_ENGINES
+from main import app, create_tables
+
+
+def enable_tenant_routing():
+    # the X-Tenant-Id header is read by get_db, which checks the setting on every request
+    SETTINGS.tenant_routing_enabled = True
+
+
+def seed_writer_boards(tenant_id: Optional[str], writers: int):
+    """provisions the tenant and a team with a board per writer on it, returns (board_id, user_id) per writer"""
+    if tenant_id is None:
+        db = session()
+    else:
+        db = session(bind=TENANT_ENGINES.create(tenant_id))
+    try:
+        user_ids = seed_users(db, writers)
+        board_ids = seed_boards(db, seed_teams(db, user_ids, 1), writers)
+    finally:
+        db.close()
+    return list(zip(board_ids, user_ids))
+
+
+def write_tasks(job):
+    """sends the task creations of one writer once every writer is ready, returns their latencies and errors"""
+    tenant_id, board_id, user_id, writes, start = job
+    client = TestClient(app)
+    headers = {'X-Tenant-Id': tenant_id} if tenant_id is not None else {}
+    title_prefix = uuid.uuid4().hex[:8]
+    latencies, errors = [], 0
+    start.wait()
+    for index in range(writes):
+        with timed() as write:
+            response = client.post('/board/task', headers=headers, json={
+                'title': f"{title_prefix}-{index}", 'description': "Bench Task",
+                'board_id': board_id, 'user_id': user_id
+            })
+        latencies.append(write['seconds'])
+        errors += response.status_code != 200
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8, help="writer processes")
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 2, 4, 8], help="tenant databases per run")
+    parser.add_argument("--writes", type=int, default=300, help="task creations per writer")
+    args = parser.parse_args()
+
+    create_tables()
+    enable_tenant_routing()
+    manager = multiprocessing.Manager()
+    rows = []
+    for tenants in [0] + args.tenants:
+        tenant_ids = [None] if tenants == 0 else [f"bench-{tenants}-{index}" for index in range(tenants)]
+        writer_tenants = [tenant_ids[writer % len(tenant_ids)] for writer in range(args.writers)]
+        boards = {tenant_id: iter(seed_writer_boards(tenant_id, writer_tenants.count(tenant_id)))
+                  for tenant_id in tenant_ids}
+        # the writers open the tenant databases themselves, no connection is carried over the fork
+        engine.dispose()
+        TENANT_ENGINES.dispose()
+        start = manager.Barrier(args.writers)
+        jobs = [(tenant_id, *next(boards[tenant_id]), args.writes, start) for tenant_id in writer_tenants]
+
+        with multiprocessing.Pool(args.writers, initializer=enable_tenant_routing) as pool:
+            with timed() as run:
+                results = pool.map(write_tasks, jobs)
+        latencies = [latency for writer_latencies, _ in results for latency in writer_latencies]
+        rows.append({
+            'tenants': tenants or "default db",
+            'writes/s': len(latencies) / run['seconds'],
+            'p50 ms': percentile(latencies, 0.5) * 1000,
+            'p95 ms': percentile(latencies, 0.95) * 1000,
+            'errors': sum(errors for _, errors in results)
+        })
+    report(f"{args.writers} writers, {args.writes} task creations each", rows)
+
+
+if __name__ == "__main__":
+    main()
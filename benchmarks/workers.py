@@ -0,0 +1,159 @@
+"""Load test of the server with 1..N uvicorn workers sharing the SQLite file.
+
+For every worker count the server is started with FACTWISE_WORKERS, then client processes send board reads
+(GET /boards/{team_id}) alone, and afterwards task creations (POST /board/task) alongside the same reads.
+Reads per second should grow with the workers up to the cores of the machine, and no write may fail with
+'database is locked'. The response cache is off unless --response-cache is given, so every read hits SQLite.
+
+    python -m benchmarks.workers --workers 1 2 4 --clients 16 --reads 4000 --writes 1000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from benchmarks.common import SCRATCH_DIR, percentile, report, seed_boards, seed_tasks, seed_teams, seed_users, timed
+
+from database.database import session
+from main import create_tables
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SERVER_START_TIMEOUT_S = 30
+
+
+def send(job):
+    """runs the requests of one client, returns the latencies and error count per kind of request"""
+    base_url, requests = job
+    results = {'read': ([], 0), 'write': ([], 0)}
+    for kind, method, path, body in requests:
+        latencies, errors = results[kind]
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            base_url + path, data=data, method=method, headers={'Content-Type': 'application/json'}
+        )
+        start_time = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+            latencies.append(time.perf_counter() - start_time)
+        except (urllib.error.URLError, OSError):
+            errors += 1
+        results[kind] = (latencies, errors)
+    return results
+
+
+def run_clients(pool, base_url: str, requests, clients: int):
+    """spreads the requests over the client processes, returns the wall time and merged results"""
+    jobs = [(base_url, requests[index::clients]) for index in range(clients)]
+    with timed() as run:
+        client_results = pool.map(send, jobs)
+    merged = {}
+    for kind in ('read', 'write'):
+        merged[kind] = (
+            [latency for result in client_results for latency in result[kind][0]],
+            sum(result[kind][1] for result in client_results)
+        )
+    return run['seconds'], merged
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(workers: int, response_cache: bool):
+    port = free_port()
+    environment = dict(
+        os.environ,
+        FACTWISE_WORKERS=str(workers),
+        FACTWISE_PORT=str(port),
+        FACTWISE_RESPONSE_CACHE_ENABLED=str(response_cache).lower()
+    )
+    log_file = open(f"{SCRATCH_DIR}/server-{workers}.log", "w")
+    server = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=ROOT_DIR, env=environment, stdout=log_file, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_S
+    while True:
+        try:
+            with urllib.request.urlopen(base_url + "/readyz", timeout=1):
+                return server, base_url, log_file
+        except (urllib.error.URLError, OSError):
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise RuntimeError(f"Server with {workers} workers did not start, see {log_file.name}")
+            time.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to run")
+    parser.add_argument("--clients", type=int, default=16, help="client processes sending requests")
+    parser.add_argument("--reads", type=int, default=4000, help="board reads per phase")
+    parser.add_argument("--writes", type=int, default=1000, help="task creations of the mixed phase")
+    parser.add_argument("--teams", type=int, default=200, help="teams whose boards are read")
+    parser.add_argument("--response-cache", action="store_true", help="serve repeated reads from the cache")
+    args = parser.parse_args()
+
+    create_tables()
+    db = session()
+    user_ids = seed_users(db, args.teams)
+    team_ids = seed_teams(db, user_ids, args.teams)
+    board_ids = seed_boards(db, team_ids, args.teams * 5)
+    seed_tasks(db, board_ids, user_ids, 10)
+    db.close()
+
+    reads = [('read', 'GET', f"/boards/{team_ids[index % len(team_ids)]}", None) for index in range(args.reads)]
+    rows = []
+    with multiprocessing.Pool(args.clients) as pool:
+        for workers in args.workers:
+            server, base_url, log_file = start_server(workers, args.response_cache)
+            try:
+                read_seconds, read_results = run_clients(pool, base_url, reads, args.clients)
+                writes = [
+                    ('write', 'POST', "/board/task", {
+                        'title': f"load-task-{workers}-{index}",
+                        'description': "Load Task",
+                        'board_id': board_ids[index % len(board_ids)],
+                        'user_id': user_ids[index % len(user_ids)]
+                    })
+                    for index in range(args.writes)
+                ]
+                # interleaved, every client sends both kinds
+                mixed = [request for pair in zip(reads, writes) for request in pair] + reads[len(writes):]
+                mixed_seconds, mixed_results = run_clients(pool, base_url, mixed, args.clients)
+            finally:
+                server.terminate()
+                server.wait()
+                log_file.close()
+
+            read_latencies, read_errors = read_results['read']
+            mixed_read_latencies, mixed_read_errors = mixed_results['read']
+            write_latencies, write_errors = mixed_results['write']
+            # logged by run_with_write_retry in the workers
+            lock_retries = Path(log_file.name).read_text().count("Database is locked, retrying")
+            rows.append({
+                'workers': workers,
+                'reads/s': len(read_latencies) / read_seconds,
+                'read p95 ms': percentile(read_latencies, 0.95) * 1000 if read_latencies else None,
+                'mixed reads/s': len(mixed_read_latencies) / mixed_seconds,
+                'writes/s': len(write_latencies) / mixed_seconds,
+                'write p95 ms': percentile(write_latencies, 0.95) * 1000 if write_latencies else None,
+                'read errors': read_errors + mixed_read_errors,
+                'write errors': write_errors,
+                'lock retries': lock_retries
+            })
+    report(f"{args.clients} clients, {os.cpu_count()} cpus, response cache {args.response_cache}", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Application settings.
+Every setting can be overridden with an environment variable prefixed with FACTWISE_,
+e.g. FACTWISE_STORAGE_BACKEND=log
+"""
+from typing import Dict
+
+from pydantic import BaseSettings
+
+
+class Settings(BaseSettings):
+    database_url: str = "sqlite:///db/factwise_board.db"
+    sql_echo: bool = True
+    # server, every worker is a separate process sharing the SQLite file
+    host: str = "127.0.0.1"
+    port: int = 8000
+    workers: int = 1
+    # SQLite write coordination between workers
+    db_busy_timeout_ms: int = 5000
+    db_write_retries: int = 5
+    db_write_backoff_ms: int = 20
+    # connections kept open per database, more are opened up to max_overflow under load
+    db_pool_size: int = 8
+    db_pool_max_overflow: int = 32
+    # before /readyz reports ready, open the pool and run the hot read routes once
+    warm_up_enabled: bool = True
+    # coalesce task status updates of concurrent requests into one transaction
+    group_commit_enabled: bool = False
+    group_commit_window_ms: int = 5
+    group_commit_max_batch: int = 500
+    # move boards closed for this many days to the archive tables, 0 disables the background job
+    archive_after_days: int = 0
+    archive_interval_seconds: int = 3600
+    archive_batch_size: int = 500
+    # multi-board export, 0 uses one render process per cpu
+    export_workers: int = 0
+    # bulk import, rows per transaction and where uploads and resume checkpoints are kept
+    import_chunk_size: int = 5000
+    import_dir: str = "db/imports"
+    # online snapshots and dumps
+    backup_dir: str = "db/backups"
+    backup_pages_per_step: int = 1024
+    backup_step_sleep_ms: int = 5
+    # X-Admin-Token of the admin routes writing files (snapshots, dumps, tenants), no token configured refuses them
+    admin_token: str = ""
+    # admission control of write requests per worker: token bucket per client address and router, concurrent
+    # writes per router beyond max_in_flight are rejected with 503
+    admission_enabled: bool = False
+    admission_rate: float = 20.0
+    admission_burst: int = 40
+    admission_max_in_flight: int = 16
+    # per router overrides, e.g. {"/import": {"rate": 0.2, "burst": 1, "max_in_flight": 1}}, a rate of 0 closes
+    # the router to writes
+    admission_routes: Dict[str, Dict[str, float]] = {}
+
+    # storage used by CommonDao: "sqlite" or "log" (append-only file engine). The log store only covers the
+    # CommonDao paths (get/create/update objects and rows), the app refuses to start with it
+    storage_backend: str = "sqlite"
+    log_store_dir: str = "db/log_store"
+    log_store_compact_every: int = 10000
+    log_store_fsync: bool = False
+    # run the hot lookups of the sqlite backend with prebuilt statements, see daos.statement_cache
+    dao_statement_cache: bool = True
+    # encoded responses of GET /users and GET /boards/{team_id}, dropped when their tables change
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 1024
+    # one SQLite file per tenant (X-Tenant-Id header or /tenants/<id>/ path prefix) under tenant_db_dir,
+    # at most tenant_max_engines tenant databases are kept open per worker
+    tenant_routing_enabled: bool = False
+    tenant_db_dir: str = "db/tenants"
+    tenant_max_engines: int = 32
+    # profiling of single requests sent with X-Profile: cprofile|sample (or ?profile=) and X-Admin-Token,
+    # profiling_continuous also samples the stacks of every running handler per route
+    profiling_enabled: bool = False
+    profiling_admin_token: str = ""
+    profiling_sample_interval_ms: float = 1.0
+    profiling_max_stored: int = 50
+    profiling_top_entries: int = 40
+    profiling_continuous: bool = False
+    profiling_continuous_interval_ms: float = 10.0
+    # serve graph reads (boards, team users, user teams) from memory
+    graph_replica_enabled: bool = False
+
+    class Config:
+        env_prefix = "factwise_"
+
+
+SETTINGS = Settings()
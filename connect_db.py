@@ -1,9 +1,23 @@
-from database.database import session
+from fastapi import HTTPException, Request
+
+from config import SETTINGS
+from database.database import session, TENANT_ENGINES
+from utils.tenant_routing import request_tenant
 
 
 # Dependency
-def get_db():
-    db = session()
+def get_db(request: Request):
+    tenant_id = request_tenant(request) if SETTINGS.tenant_routing_enabled else None
+    if tenant_id is None:
+        db = session()
+    else:
+        try:
+            db = session(bind=TENANT_ENGINES.get(tenant_id))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        db.info['tenant_id'] = tenant_id
     try:
         yield db
     finally:
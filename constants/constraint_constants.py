@@ -19,3 +19,15 @@ class BoardAndTaskConstraints(enum.Enum):
     board_description_len = 128
     task_title_len = 64
     task_description_len = 128
+    task_status_len = 20
+
+
+class TaskStatuses(enum.Enum):
+    open = "OPEN"
+    in_progress = "IN_PROGRESS"
+    complete = "COMPLETE"
+
+
+class BatchConstraints(enum.Enum):
+    max_lookup_ids = 1000
+    max_delete_ids = 1000
@@ -0,0 +1,22 @@
+"""Board activity event constants
+"""
+import enum
+
+
+class BoardEventTypes(enum.Enum):
+    task_added = "TASK_ADDED"
+    task_status_updated = "TASK_STATUS_UPDATED"
+    board_closed = "BOARD_CLOSED"
+    team_users_added = "TEAM_USERS_ADDED"
+    team_users_removed = "TEAM_USERS_REMOVED"
+
+
+class BoardEventConstraints(enum.Enum):
+    default_changes_limit = 500
+    max_changes_limit = 5000
+    subscriber_queue_size = 256
+    keep_alive_seconds = 15
+
+
+class StatusHistoryConstraints(enum.Enum):
+    fetch_chunk_size = 100000
@@ -1,11 +1,17 @@
-from typing import Union, Any, List, Dict
+from contextlib import contextmanager
+from typing import Union, Any, List, Dict, Optional, Type, NamedTuple, Callable, Iterator, TypeVar
 from sqlalchemy.orm import Session
 from database import db_models as db_model
+from daos.group_commit import get_group_committer
+from daos.storage_backend import StorageBackend, get_storage_backend
+
+T = TypeVar("T")
 
 
 class CommonDao:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, backend: Optional[StorageBackend] = None):
         self.db = db
+        self.backend = backend or get_storage_backend(db)
 
     def get_object(
             self,
@@ -18,7 +24,7 @@ class CommonDao:
         :param filter_condition: filter condition
         :type filter_condition:
         """
-        return self.db.query(object_type).filter(filter_condition).first()
+        return self.backend.get_object(object_type, filter_condition)
 
     def create_object(
             self,
@@ -28,10 +34,7 @@ class CommonDao:
         :param object_payload:
         :type object_payload: Union[db_model.User, db_model.Team, db_model.Board, db_model.Task]
         """
-        self.db.add(object_payload)
-        self.db.commit()
-        self.db.refresh(object_payload)
-        return object_payload
+        return self.backend.create_object(object_payload, commit=not self.in_unit_of_work)
 
     def get_objects(
             self,
@@ -43,7 +46,7 @@ class CommonDao:
         :return: list of objects
         :rtype:
         """
-        return self.db.query(object_type).all()
+        return self.backend.get_objects(object_type)
 
     def update_object(
             self,
@@ -61,6 +64,85 @@ class CommonDao:
         :return: status (0 or 1)
         :rtype: into
         """
-        status = self.db.query(object_type).filter(filter_condition).update(update_payload)
-        self.db.commit()
-        return status
+        if self.in_unit_of_work:
+            return self.backend.update_object(object_type, filter_condition, update_payload, commit=False)
+        return self.backend.update_object(object_type, filter_condition, update_payload)
+
+    def get_rows(
+            self,
+            row_type: Type[NamedTuple],
+            object_type: Union[db_model.User, db_model.Team, db_model.Board, db_model.Task],
+            filter_condition: Optional[Any] = None
+    ) -> List[NamedTuple]:
+        """ get lightweight rows with only the columns named by the row type fields
+        :param row_type: NamedTuple whose fields are column names of object_type
+        :type row_type: Type[NamedTuple]
+        :param object_type: object to fetch columns from
+        :type object_type: Union[db_model.User, db_model.Team, db_model.Board, db_model.Task]
+        :param filter_condition: optional filter condition
+        :type filter_condition: Any
+        :return: list of row_type tuples ordered by primary key
+        :rtype: List[NamedTuple]
+        """
+        return self.backend.get_rows(row_type, object_type, filter_condition)
+
+    @property
+    def in_unit_of_work(self) -> bool:
+        return self.db.info.get('uow_depth', 0) > 0
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator["CommonDao"]:
+        """ transaction scope spanning several DAO and service calls on this session,
+        writes inside it are flushed and committed once at the end, any exception rolls all of them back.
+        Nested scopes join the outermost one.
+        """
+        depth = self.db.info.get('uow_depth', 0)
+        if depth == 0:
+            self.db.info['uow_callbacks'] = []
+        self.db.info['uow_depth'] = depth + 1
+        try:
+            yield self
+            if depth == 0:
+                self.backend.commit()
+        except Exception:
+            if depth == 0:
+                self.backend.rollback()
+                self.db.info['uow_callbacks'] = []
+            raise
+        finally:
+            self.db.info['uow_depth'] = depth
+
+        if depth == 0:
+            callbacks = self.db.info.pop('uow_callbacks')
+            for callback in callbacks:
+                callback()
+
+    def group_commit(self, write: Callable[[Session], T]) -> T:
+        """ runs write as a unit of work committed together with the concurrent group commit writes of other
+        requests and returns once that commit is done. write gets the session of the batch, everything it
+        does through DAOs and services on that session joins the batch and its on_commit callbacks run after it.
+        Inside a unit of work write joins it on this session instead.
+        :param write: function applying the writes on the given session, must not commit
+        :type write: Callable[[Session], T]
+        :return: result of write
+        """
+        if self.in_unit_of_work:
+            return write(self.db)
+        return get_group_committer(self.db.get_bind(), self.db.info.get('tenant_id')).submit(write)
+
+    def commit(self):
+        """ commits pending changes of the session, deferred to the end of the unit of work if inside one
+        """
+        if not self.in_unit_of_work:
+            self.backend.commit()
+
+    def on_commit(self, callback: Callable[[], None]):
+        """ runs callback once the current changes are committed, right away outside of a unit of work
+        and dropped if the unit of work rolls back
+        :param callback: function to run after commit
+        :type callback: Callable[[], None]
+        """
+        if self.in_unit_of_work:
+            self.db.info['uow_callbacks'].append(callback)
+        else:
+            callback()
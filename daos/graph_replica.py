@@ -0,0 +1,310 @@
+"""In-memory read replica of the users <-> teams <-> boards <-> tasks graph.
+
+Rows are kept as tuples in ID keyed maps and relations as adjacency arrays of IDs,
+loaded once at startup and kept current by the service write paths.
+"""
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Any, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import db_models as db_model
+from logger import LOGGER
+
+
+def _id_array() -> array:
+    return array('q')
+
+
+class GraphReplica:
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        # user_id -> (user_name, user_display_name, create_time)
+        self.users: Dict[int, tuple] = {}
+        # team_id -> (team_name, description, team_admin, create_time)
+        self.teams: Dict[int, tuple] = {}
+        # board_id -> (board_name, board_status, board_team_id)
+        self.boards: Dict[int, tuple] = {}
+        self.team_users: Dict[int, array] = defaultdict(_id_array)
+        self.user_teams: Dict[int, array] = defaultdict(_id_array)
+        self.team_boards: Dict[int, array] = defaultdict(_id_array)
+        self.board_tasks: Dict[int, array] = defaultdict(_id_array)
+
+    # loading
+    def load(self, db: Session):
+        """builds the replica from the database with column projected queries
+        :param db: database session
+        :type db: Session
+        """
+        start_time = time.perf_counter()
+        with self._lock:
+            self._reset()
+            self._fill(db)
+            self.loaded = True
+        LOGGER.info(
+            f"Loaded graph replica with {len(self.users)} users, {len(self.teams)} teams, "
+            f"{len(self.boards)} boards in {time.perf_counter() - start_time:.3f}s"
+        )
+
+    def _fill(self, db: Session):
+        for user_id, user_name, display_name, create_time in db.query(
+                db_model.User.user_id, db_model.User.user_name,
+                db_model.User.user_display_name, db_model.User.create_time
+        ):
+            self.users[user_id] = (user_name, display_name, create_time)
+
+        for team_id, team_name, description, team_admin, create_time in db.query(
+                db_model.Team.team_id, db_model.Team.team_name, db_model.Team.description,
+                db_model.Team.team_admin, db_model.Team.create_time
+        ):
+            self.teams[team_id] = (team_name, description, team_admin, create_time)
+
+        for board_id, board_name, board_status, team_id in db.query(
+                db_model.Board.board_id, db_model.Board.board_name,
+                db_model.Board.board_status, db_model.Board.board_team_id
+        ).order_by(db_model.Board.board_id):
+            self.boards[board_id] = (board_name, board_status, team_id)
+            self.team_boards[team_id].append(board_id)
+
+        for task_id, board_id in db.query(
+                db_model.Task.task_id, db_model.Task.board_id
+        ).order_by(db_model.Task.task_id):
+            self.board_tasks[board_id].append(task_id)
+
+        # memberships of soft deleted users and teams are kept in the table but not in the graph
+        association = db_model.user_team_association
+        for user_id, team_id in db.query(association.c.user_id, association.c.team_id).join(
+                db_model.User, db_model.User.user_id == association.c.user_id
+        ).join(
+                db_model.Team, db_model.Team.team_id == association.c.team_id
+        ).filter(db_model.User.deleted_at.is_(None), db_model.Team.deleted_at.is_(None)):
+            self.team_users[team_id].append(user_id)
+            self.user_teams[user_id].append(team_id)
+
+    # write paths, no-op until the replica is loaded
+    def put_user(self, user_model: db_model.User):
+        if not self.loaded:
+            return
+        with self._lock:
+            self.users[user_model.user_id] = (
+                user_model.user_name, user_model.user_display_name, user_model.create_time
+            )
+
+    def put_team(self, team_model: db_model.Team):
+        if not self.loaded:
+            return
+        with self._lock:
+            self.teams[team_model.team_id] = (
+                team_model.team_name, team_model.description, team_model.team_admin, team_model.create_time
+            )
+
+    def put_board(self, board_model: db_model.Board):
+        if not self.loaded:
+            return
+        with self._lock:
+            if board_model.board_id not in self.boards:
+                self.team_boards[board_model.board_team_id].append(board_model.board_id)
+            self.boards[board_model.board_id] = (
+                board_model.board_name, board_model.board_status, board_model.board_team_id
+            )
+
+    def remove_boards(self, board_ids: List[int]):
+        if not self.loaded:
+            return
+        with self._lock:
+            for board_id in board_ids:
+                board = self.boards.pop(board_id, None)
+                self.board_tasks.pop(board_id, None)
+                if board is not None and board_id in self.team_boards[board[2]]:
+                    self.team_boards[board[2]].remove(board_id)
+
+    def remove_tasks(self, board_task_ids: List[Tuple[int, int]]):
+        """removes the tasks given as (board_id, task_id) pairs"""
+        if not self.loaded:
+            return
+        removed = defaultdict(set)
+        for board_id, task_id in board_task_ids:
+            removed[board_id].add(task_id)
+        with self._lock:
+            for board_id, task_ids in removed.items():
+                if board_id in self.board_tasks:
+                    self.board_tasks[board_id] = array(
+                        'q', (task_id for task_id in self.board_tasks[board_id] if task_id not in task_ids)
+                    )
+
+    def remove_users(self, user_ids: List[int]):
+        """removes the users with their memberships, teams they administered are left without admin"""
+        if not self.loaded:
+            return
+        removed = set(user_ids)
+        with self._lock:
+            for user_id in removed:
+                self.users.pop(user_id, None)
+                for team_id in self.user_teams.pop(user_id, ()):
+                    self.team_users[team_id] = array(
+                        'q', (member_id for member_id in self.team_users[team_id] if member_id != user_id)
+                    )
+            for team_id, team in self.teams.items():
+                if team[2] in removed:
+                    self.teams[team_id] = (team[0], team[1], None, team[3])
+
+    def remove_teams(self, team_ids: List[int]):
+        """removes the teams with their memberships and boards"""
+        if not self.loaded:
+            return
+        with self._lock:
+            for team_id in team_ids:
+                self.remove_boards(list(self.team_boards.get(team_id, ())))
+                self.team_boards.pop(team_id, None)
+                self.teams.pop(team_id, None)
+                for user_id in self.team_users.pop(team_id, ()):
+                    self.user_teams[user_id] = array(
+                        'q', (member_team_id for member_team_id in self.user_teams[user_id] if member_team_id != team_id)
+                    )
+
+    def add_task(self, board_id: int, task_id: int):
+        if not self.loaded:
+            return
+        with self._lock:
+            self.board_tasks[board_id].append(task_id)
+
+    def add_team_users(self, team_id: int, user_ids: List[int]):
+        if not self.loaded:
+            return
+        with self._lock:
+            for user_id in user_ids:
+                self.team_users[team_id].append(user_id)
+                self.user_teams[user_id].append(team_id)
+
+    def remove_team_users(self, team_id: int, user_ids: List[int]):
+        if not self.loaded:
+            return
+        with self._lock:
+            for user_id in user_ids:
+                if user_id in self.team_users[team_id]:
+                    self.team_users[team_id].remove(user_id)
+                if team_id in self.user_teams[user_id]:
+                    self.user_teams[user_id].remove(team_id)
+
+    # reads, shaped like the corresponding service responses
+    def describe_team(self, team_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            team = self.teams.get(team_id)
+            if team is None:
+                return None
+            return {
+                'name': team[0],
+                'description': team[1],
+                'creation_time': str(team[3]),
+                'admin': team[2]
+            }
+
+    def list_team_users(self, team_id: int) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            if team_id not in self.teams:
+                return None
+            return [
+                {
+                    'id': user_id,
+                    'name': self.users[user_id][0],
+                    'display_name': self.users[user_id][1]
+                }
+                for user_id in self.team_users.get(team_id, ())
+                if user_id in self.users
+            ]
+
+    def get_user_teams(self, user_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            if user_id not in self.users:
+                return []
+            return [
+                {
+                    'id': team_id,
+                    'name': self.teams[team_id][0],
+                    'description': self.teams[team_id][1]
+                }
+                for team_id in self.user_teams.get(user_id, ())
+                if team_id in self.teams
+            ]
+
+    def list_boards(self, team_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    'id': board_id,
+                    'name': self.boards[board_id][0],
+                    'status': self.boards[board_id][1],
+                    'tasks': list(self.board_tasks.get(board_id, ()))
+                }
+                for board_id in self.team_boards.get(team_id, ())
+            ]
+
+    # maintenance
+    def verify(self, db: Session) -> Dict[str, int]:
+        """compares the replica against a fresh load from the database
+        :param db: database session
+        :type db: Session
+        :return: number of mismatching entries per section, all zero when consistent
+        :rtype: Dict[str, int]
+        """
+        fresh = GraphReplica()
+        fresh._fill(db)
+
+        mismatches = {}
+        with self._lock:
+            for section in ('users', 'teams', 'boards'):
+                current, expected = getattr(self, section), getattr(fresh, section)
+                mismatches[section] = sum(
+                    1 for key in current.keys() | expected.keys() if current.get(key) != expected.get(key)
+                )
+            for section in ('team_users', 'user_teams', 'team_boards', 'board_tasks'):
+                current, expected = getattr(self, section), getattr(fresh, section)
+                mismatches[section] = sum(
+                    1 for key in current.keys() | expected.keys()
+                    if sorted(current.get(key, ())) != sorted(expected.get(key, ()))
+                )
+        if any(mismatches.values()):
+            LOGGER.warning(f"Graph replica is inconsistent with the database: {mismatches}")
+        return mismatches
+
+    def memory_report(self) -> Dict[str, Any]:
+        """approximate memory held by the replica, extrapolated per million tasks"""
+        with self._lock:
+            row_bytes = 0
+            for rows in (self.users, self.teams, self.boards):
+                row_bytes += sys.getsizeof(rows)
+                row_bytes += sum(sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row) for row in rows.values())
+
+            adjacency_bytes = 0
+            for adjacency in (self.team_users, self.user_teams, self.team_boards):
+                adjacency_bytes += sys.getsizeof(adjacency) + sum(sys.getsizeof(ids) for ids in adjacency.values())
+
+            task_bytes = sys.getsizeof(self.board_tasks) + sum(
+                sys.getsizeof(ids) for ids in self.board_tasks.values()
+            )
+            task_count = sum(len(ids) for ids in self.board_tasks.values())
+            bytes_per_task = task_bytes / task_count if task_count else self.board_tasks.default_factory().itemsize
+
+            return {
+                'users': len(self.users),
+                'teams': len(self.teams),
+                'boards': len(self.boards),
+                'tasks': task_count,
+                'row_bytes': row_bytes,
+                'adjacency_bytes': adjacency_bytes,
+                'task_bytes': task_bytes,
+                'total_bytes': row_bytes + adjacency_bytes + task_bytes,
+                'bytes_per_task': round(bytes_per_task, 2),
+                'task_bytes_per_million_tasks': int(bytes_per_task * 1_000_000)
+            }
+
+
+GRAPH_REPLICA = GraphReplica()
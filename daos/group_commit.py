@@ -0,0 +1,179 @@
+"""Group commit of writes coming from concurrent requests.
+
+Writes are queued to a single writer thread per engine which runs everything that
+arrived within SETTINGS.group_commit_window_ms in one transaction, so a burst of
+updates pays for one commit (and fsync) instead of one per request. Each caller is
+acknowledged only after the transaction holding its write has committed.
+
+The batch session runs as an open unit of work, so DAO and service calls made by a
+write (e.g. recording its event) join the batch instead of committing, and their
+on_commit callbacks run once the batch is committed.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from config import SETTINGS
+from database.database import run_with_write_retry
+from logger import LOGGER
+
+T = TypeVar("T")
+
+_STOP = object()
+
+
+class GroupCommitter:
+    def __init__(self, bind: Engine, window_ms: int, max_batch: int, tenant_id: Optional[str] = None):
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=bind)
+        # set on the batch sessions like on the request sessions of the tenant
+        self.tenant_id = tenant_id
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._stopped = False
+        self._stop_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, write: Callable[[Session], T]) -> T:
+        """queues a write and blocks until the batch holding it is committed
+        :param write: function applying the write on the given session, must not commit
+        :type write: Callable[[Session], T]
+        :return: result of write
+        """
+        future = Future()
+        with self._stop_lock:
+            queued = not self._stopped
+            if queued:
+                self._queue.put((write, future))
+        if not queued:
+            # the committer of a closed tenant database, commit on the calling thread
+            self._commit_batch([(write, future)])
+        return future.result()
+
+    def stop(self):
+        """commits what is already queued and stops the writer thread"""
+        with self._stop_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._commit_batch(batch)
+            if stop:
+                return
+
+    def _commit_batch(self, batch: List[Tuple[Callable[[Session], T], Future]]):
+        db = self.session_factory()
+        db.info['uow_depth'] = 1
+        if self.tenant_id is not None:
+            db.info['tenant_id'] = self.tenant_id
+        try:
+            def write_batch():
+                db.info['uow_callbacks'] = []
+                results = [write(db) for write, _ in batch]
+                db.commit()
+                return results
+
+            try:
+                results = run_with_write_retry(write_batch, rollback=db.rollback)
+            except Exception as e:
+                # do not fail every caller for one bad write, commit them one by one
+                LOGGER.warning(f"Group commit of {len(batch)} writes failed, committing individually: {e}")
+                db.rollback()
+                for write, future in batch:
+                    self._commit_single(db, write, future)
+                return
+
+            self._run_callbacks(db)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            LOGGER.info(f"Group committed {len(batch)} writes")
+        finally:
+            db.close()
+
+    def _commit_single(self, db: Session, write: Callable[[Session], T], future: Future):
+        try:
+            def write_single():
+                db.info['uow_callbacks'] = []
+                result = write(db)
+                db.commit()
+                return result
+
+            result = run_with_write_retry(write_single, rollback=db.rollback)
+        except Exception as e:
+            db.rollback()
+            future.set_exception(e)
+            return
+        self._run_callbacks(db)
+        future.set_result(result)
+
+    @staticmethod
+    def _run_callbacks(db: Session):
+        for callback in db.info.pop('uow_callbacks', []):
+            try:
+                callback()
+            except Exception as e:
+                LOGGER.warning(f"Callback after group commit failed: {e!r}")
+
+
+_GROUP_COMMITTERS: Dict[Engine, GroupCommitter] = {}
+_GROUP_COMMITTERS_LOCK = threading.Lock()
+
+
+def get_group_committer(bind: Engine, tenant_id: Optional[str] = None) -> GroupCommitter:
+    """returns the group committer of the engine, starting it on first use
+    :param bind: engine of the database
+    :type bind: Engine
+    :param tenant_id: tenant of the database, None for the default database
+    :type tenant_id: Optional[str]
+    """
+    with _GROUP_COMMITTERS_LOCK:
+        if bind not in _GROUP_COMMITTERS:
+            _GROUP_COMMITTERS[bind] = GroupCommitter(
+                bind, SETTINGS.group_commit_window_ms, SETTINGS.group_commit_max_batch, tenant_id
+            )
+        return _GROUP_COMMITTERS[bind]
+
+
+def stop_group_committer(bind: Engine):
+    """stops the group committer of the engine if it has one"""
+    with _GROUP_COMMITTERS_LOCK:
+        committer = _GROUP_COMMITTERS.pop(bind, None)
+    if committer is not None:
+        committer.stop()
+
+
+def stop_group_committers():
+    with _GROUP_COMMITTERS_LOCK:
+        for committer in _GROUP_COMMITTERS.values():
+            committer.stop()
+        _GROUP_COMMITTERS.clear()
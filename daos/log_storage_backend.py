@@ -0,0 +1,352 @@
+"""Append-only file storage engine.
+
+Each table is persisted as a log of json records under SETTINGS.log_store_dir. Rows are
+held in memory with a hash index on the primary key and on every unique column, the log
+is replayed on startup and periodically compacted into a snapshot of the live rows.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Table
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+
+from config import SETTINGS
+from database.database import Base
+from daos.storage_backend import StorageBackend, unique_column_keys
+from logger import LOGGER
+from custom_exceptions.constraint_exception import ObjectAlreadyPresentException
+
+
+class LogTable:
+    def __init__(self, table: Table, directory: Path, compact_every: int, fsync: bool):
+        self.name = table.name
+        self.primary_key = list(table.primary_key.columns)[0].key
+        self.column_keys = [column.key for column in table.columns]
+        self.datetime_keys = {column.key for column in table.columns if isinstance(column.type, DateTime)}
+        # server side func.now() defaults of timestamps are filled in on insert, other defaults are literals
+        self.default_now_keys = [
+            column.key for column in table.columns
+            if isinstance(column.type, DateTime) and column.server_default is not None
+        ]
+        self.literal_defaults = {
+            column.key: _literal_default(column) for column in table.columns
+            if column.key not in self.default_now_keys and (
+                (column.default is not None and column.default.is_scalar) or column.server_default is not None
+            )
+        }
+        self.update_now_keys = [column.key for column in table.columns if column.onupdate is not None]
+        self.unique_indexes: Dict[str, Dict[Any, int]] = {key: {} for key in unique_column_keys(table)}
+        self.log_path = directory / f"{self.name}.log"
+        self.snapshot_path = directory / f"{self.name}.snapshot"
+        self.compact_every = compact_every
+        self.fsync = fsync
+
+        self.rows: Dict[int, Dict[str, Any]] = {}
+        self.next_id = 1
+        self.appends_since_compaction = 0
+        self.lock = threading.RLock()
+        self._log_file = None
+
+    # persistence
+    def load(self) -> int:
+        """rebuilds rows and indexes from the snapshot followed by the log
+        :return: number of log records replayed
+        :rtype: int
+        """
+        with self.lock:
+            if self.snapshot_path.exists():
+                with open(self.snapshot_path) as snapshot_file:
+                    for line in snapshot_file:
+                        self._put(self._decode(json.loads(line)))
+
+            replayed = 0
+            if self.log_path.exists():
+                replayed_bytes = 0
+                with open(self.log_path, 'rb') as log_file:
+                    for line in log_file:
+                        try:
+                            # a record is acknowledged once its newline is written
+                            record = json.loads(line) if line.endswith(b"\n") else None
+                        except json.JSONDecodeError:
+                            record = None
+                        if record is None:
+                            # torn write at the tail of the log, nothing after it was acknowledged
+                            LOGGER.warning(f"Ignoring incomplete record at the end of {self.log_path}")
+                            break
+                        self._apply(record)
+                        replayed += 1
+                        replayed_bytes += len(line)
+                if replayed_bytes < self.log_path.stat().st_size:
+                    # the next append would otherwise extend the torn record and be lost with it
+                    os.truncate(self.log_path, replayed_bytes)
+
+            self.appends_since_compaction = replayed
+            self._log_file = open(self.log_path, 'a')
+            return replayed
+
+    def compact(self):
+        """writes the live rows into a new snapshot and starts an empty log"""
+        with self.lock:
+            tmp_path = self.snapshot_path.with_suffix('.snapshot.tmp')
+            with open(tmp_path, 'w') as snapshot_file:
+                for row in self.rows.values():
+                    snapshot_file.write(json.dumps(self._encode(row)) + "\n")
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # replaying the old log over the new snapshot is idempotent, so a crash here is safe
+            self._log_file.close()
+            self._log_file = open(self.log_path, 'w')
+            self.appends_since_compaction = 0
+            LOGGER.info(f"Compacted log store table: {self.name}, live rows: {len(self.rows)}")
+
+    def close(self):
+        with self.lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+
+    def _append(self, record: Dict[str, Any]):
+        self._log_file.write(json.dumps(record) + "\n")
+        self._log_file.flush()
+        if self.fsync:
+            os.fsync(self._log_file.fileno())
+
+        self.appends_since_compaction += 1
+
+    def _maybe_compact(self):
+        if self.appends_since_compaction >= self.compact_every:
+            self.compact()
+
+    def _apply(self, record: Dict[str, Any]):
+        if record['op'] == 'put':
+            self._put(self._decode(record['row']))
+        elif record['op'] == 'set':
+            self._set(record['id'], self._decode(record['values']))
+
+    def _encode(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value.isoformat() if key in self.datetime_keys and value is not None else value
+            for key, value in values.items()
+        }
+
+    def _decode(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: datetime.fromisoformat(value) if key in self.datetime_keys and value is not None else value
+            for key, value in values.items()
+        }
+
+    # in-memory state
+    def _put(self, row: Dict[str, Any]):
+        row_id = row[self.primary_key]
+        if row_id in self.rows:
+            self._unindex(self.rows[row_id])
+        self.rows[row_id] = row
+        for key, index in self.unique_indexes.items():
+            if row.get(key) is not None:
+                index[row[key]] = row_id
+        self.next_id = max(self.next_id, row_id + 1)
+
+    def _set(self, row_id: int, values: Dict[str, Any]):
+        row = self.rows.get(row_id)
+        if row is None:
+            return
+        self._unindex(row)
+        row.update(values)
+        self._put(row)
+
+    def _unindex(self, row: Dict[str, Any]):
+        for key, index in self.unique_indexes.items():
+            if index.get(row.get(key)) == row[self.primary_key]:
+                del index[row[key]]
+
+    # operations
+    def insert(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            for key, index in self.unique_indexes.items():
+                if values.get(key) is not None and values[key] in index:
+                    raise ObjectAlreadyPresentException(message=f"{self.name}.{key} must be unique")
+
+            row = {key: values.get(key) for key in self.column_keys}
+            if row[self.primary_key] is None:
+                row[self.primary_key] = self.next_id
+            now = datetime.now()
+            for key in self.default_now_keys:
+                if row[key] is None:
+                    row[key] = now
+            for key, default in self.literal_defaults.items():
+                if row[key] is None:
+                    row[key] = default
+
+            self._append({'op': 'put', 'row': self._encode(row)})
+            self._put(row)
+            self._maybe_compact()
+            return dict(row)
+
+    def update(self, terms: List[Tuple[str, tuple]], values: Dict[str, Any]) -> int:
+        with self.lock:
+            matched = self.find(terms)
+            if not matched:
+                return 0
+
+            for key, index in self.unique_indexes.items():
+                if key in values and index.get(values[key], matched[0][self.primary_key]) != matched[0][self.primary_key]:
+                    raise ObjectAlreadyPresentException(message=f"{self.name}.{key} must be unique")
+
+            values = dict(values)
+            now = datetime.now()
+            for key in self.update_now_keys:
+                values.setdefault(key, now)
+
+            for row in matched:
+                row_id = row[self.primary_key]
+                self._append({'op': 'set', 'id': row_id, 'values': self._encode(values)})
+                self._set(row_id, values)
+            self._maybe_compact()
+            return len(matched)
+
+    def find(self, terms: List[Tuple[str, tuple]]) -> List[Dict[str, Any]]:
+        with self.lock:
+            candidates = None
+            for key, values in terms:
+                if key == self.primary_key:
+                    candidates = [self.rows[value] for value in values if value in self.rows]
+                    break
+                if key in self.unique_indexes:
+                    index = self.unique_indexes[key]
+                    candidates = [self.rows[index[value]] for value in values if value in index]
+                    break
+            if candidates is None:
+                candidates = self.rows.values()
+
+            return [
+                dict(row) for row in candidates
+                if all(row.get(key) in values for key, values in terms)
+            ]
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [dict(self.rows[row_id]) for row_id in sorted(self.rows)]
+
+
+class LogStorageBackend(StorageBackend):
+    """
+    Storage backend keeping one append-only LogTable per mapped table.
+    Returned objects are detached model instances, relationships are not loaded.
+    """
+
+    def __init__(
+            self,
+            directory: str = SETTINGS.log_store_dir,
+            compact_every: int = SETTINGS.log_store_compact_every,
+            fsync: bool = SETTINGS.log_store_fsync
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.tables: Dict[str, LogTable] = {
+            table.name: LogTable(table, self.directory, compact_every, fsync)
+            for table in Base.metadata.sorted_tables
+            if table.primary_key.columns
+        }
+
+    def load(self):
+        start_time = time.perf_counter()
+        replayed = sum(table.load() for table in self.tables.values())
+        rows = sum(len(table.rows) for table in self.tables.values())
+        LOGGER.info(
+            f"Loaded log store with {rows} rows, replayed {replayed} log records "
+            f"in {time.perf_counter() - start_time:.3f}s"
+        )
+
+    def compact(self):
+        for table in self.tables.values():
+            table.compact()
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+
+    def get_object(self, object_type, filter_condition):
+        rows = self.tables[object_type.__tablename__].find(_terms(filter_condition))
+        return object_type(**rows[0]) if rows else None
+
+    def create_object(self, object_payload, commit=True):
+        table = self.tables[object_payload.__tablename__]
+        row = table.insert(
+            {key: getattr(object_payload, key) for key in table.column_keys}
+        )
+        for key, value in row.items():
+            setattr(object_payload, key, value)
+        return object_payload
+
+    def get_objects(self, object_type):
+        return [object_type(**row) for row in self.tables[object_type.__tablename__].all()]
+
+    def update_object(self, object_type, filter_condition, update_payload, commit=True):
+        return self.tables[object_type.__tablename__].update(_terms(filter_condition), update_payload)
+
+    def commit(self):
+        # every write is appended to the log as it happens
+        pass
+
+    def rollback(self):
+        LOGGER.warning("Log store writes are not transactional, nothing to roll back")
+
+    def get_rows(self, row_type, object_type, filter_condition=None):
+        table = self.tables[object_type.__tablename__]
+        rows = table.all() if filter_condition is None else table.find(_terms(filter_condition))
+        rows.sort(key=lambda row: row[table.primary_key])
+        return [row_type._make(row.get(field) for field in row_type._fields) for row in rows]
+
+
+def _literal_default(column: Column) -> Any:
+    """the python default of the column, else its server default converted to the column type"""
+    if column.default is not None and column.default.is_scalar:
+        return column.default.arg
+    server_default = column.server_default.arg
+    return column.type.python_type(server_default if isinstance(server_default, str) else server_default.text)
+
+
+def _terms(condition: Any) -> List[Tuple[str, tuple]]:
+    """flattens a filter condition made of column == value and column.in_(values) terms joined by and_
+    :param condition: SQLAlchemy filter condition
+    :type condition: Any
+    :return: list of (column key, allowed values) pairs
+    :rtype: List[Tuple[str, tuple]]
+    """
+    if isinstance(condition, BooleanClauseList) and condition.operator is operators.and_:
+        terms = []
+        for clause in condition.clauses:
+            terms.extend(_terms(clause))
+        return terms
+
+    if isinstance(condition, BinaryExpression) and isinstance(condition.right, BindParameter):
+        if condition.operator is operators.eq:
+            return [(condition.left.key, (condition.right.effective_value,))]
+        if condition.operator is operators.in_op:
+            return [(condition.left.key, tuple(condition.right.effective_value))]
+
+    raise NotImplementedError(f"Log store cannot evaluate condition: {condition}")
+
+
+_LOG_STORE: Optional[LogStorageBackend] = None
+_LOG_STORE_LOCK = threading.Lock()
+
+
+def get_log_store() -> LogStorageBackend:
+    """returns the process wide log store, loading it on first use"""
+    global _LOG_STORE
+    if _LOG_STORE is None:
+        with _LOG_STORE_LOCK:
+            if _LOG_STORE is None:
+                log_store = LogStorageBackend()
+                log_store.load()
+                _LOG_STORE = log_store
+    return _LOG_STORE
@@ -0,0 +1,105 @@
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy.orm import Session
+
+from database import db_models as db_model
+from daos.graph_replica import GRAPH_REPLICA
+
+
+class MembershipLoader:
+    """
+    Batches team membership lookups of a request (dataloader pattern).
+    Every id is fetched at most once per session, the ids missing from the cache are
+    resolved together with one join on users_to_teams.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._user_teams: Dict[int, List[Dict[str, Any]]] = {}
+        self._team_users: Dict[int, List[Dict[str, Any]]] = {}
+
+    def load_user_teams(self, user_ids: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        :param user_ids: user ids, may repeat
+        :return: teams of every given user id, unknown users have no teams
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        missing_ids = [user_id for user_id in user_ids if user_id not in self._user_teams]
+        if missing_ids:
+            self._user_teams.update(self._fetch_user_teams(missing_ids))
+        return {user_id: self._user_teams[user_id] for user_id in user_ids}
+
+    def load_team_users(self, team_ids: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        :param team_ids: team ids, may repeat
+        :return: users of every given team id, unknown teams have no users
+        """
+        team_ids = list(dict.fromkeys(team_ids))
+        missing_ids = [team_id for team_id in team_ids if team_id not in self._team_users]
+        if missing_ids:
+            self._team_users.update(self._fetch_team_users(missing_ids))
+        return {team_id: self._team_users[team_id] for team_id in team_ids}
+
+    def _fetch_user_teams(self, user_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        if GRAPH_REPLICA.loaded:
+            return {user_id: GRAPH_REPLICA.get_user_teams(user_id) for user_id in user_ids}
+
+        association = db_model.user_team_association
+        user_teams = {user_id: [] for user_id in user_ids}
+        rows = self.db.query(
+            association.c.user_id,
+            db_model.Team.team_id,
+            db_model.Team.team_name,
+            db_model.Team.description
+        ).join(
+            db_model.Team, db_model.Team.team_id == association.c.team_id
+        ).filter(
+            association.c.user_id.in_(user_ids)
+        ).order_by(association.c.user_id, db_model.Team.team_id)
+        for user_id, team_id, team_name, description in rows:
+            user_teams[user_id].append(
+                {
+                    'id': team_id,
+                    'name': team_name,
+                    'description': description
+                }
+            )
+        return user_teams
+
+    def _fetch_team_users(self, team_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        if GRAPH_REPLICA.loaded:
+            return {team_id: GRAPH_REPLICA.list_team_users(team_id) or [] for team_id in team_ids}
+
+        association = db_model.user_team_association
+        team_users = {team_id: [] for team_id in team_ids}
+        rows = self.db.query(
+            association.c.team_id,
+            db_model.User.user_id,
+            db_model.User.user_name,
+            db_model.User.user_display_name
+        ).join(
+            db_model.User, db_model.User.user_id == association.c.user_id
+        ).filter(
+            association.c.team_id.in_(team_ids)
+        ).order_by(association.c.team_id, db_model.User.user_id)
+        for team_id, user_id, user_name, user_display_name in rows:
+            team_users[team_id].append(
+                {
+                    'id': user_id,
+                    'name': user_name,
+                    'display_name': user_display_name
+                }
+            )
+        return team_users
+
+
+def get_membership_loader(db: Session) -> MembershipLoader:
+    """returns the loader of the session, shared by all services of the request"""
+    if 'membership_loader' not in db.info:
+        db.info['membership_loader'] = MembershipLoader(db)
+    return db.info['membership_loader']
+
+
+def reset_membership_loader(db: Session):
+    """drops the memberships cached for the session, called after memberships change"""
+    db.info.pop('membership_loader', None)
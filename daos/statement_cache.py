@@ -0,0 +1,43 @@
+"""Statements of the hot DAO lookups, built once per shape with bound parameters.
+
+A call then only binds its values, instead of building a Query, its filter expression and the
+cache key of the compiled SQL on every request. Values are passed as "value" for the filter column
+(a list for in_ lookups) and as "new_<key>" for the updated columns.
+"""
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.sql import Select, Update
+
+
+def _filter_column(object_type, key: str, many: bool):
+    column = getattr(object_type, key)
+    return column.in_(bindparam('value', expanding=True)) if many else column == bindparam('value')
+
+
+@lru_cache(maxsize=None)
+def first_by(object_type, key: str) -> Select:
+    """first object whose column key equals value"""
+    return select(object_type).where(_filter_column(object_type, key, False)).limit(1)
+
+
+@lru_cache(maxsize=None)
+def rows_by(object_type, fields: Tuple[str, ...], key: Optional[str], many: bool = False) -> Select:
+    """the fields of the objects whose column key equals value (or is in value), all objects without a key,
+    ordered by primary key
+    """
+    statement = select(*[getattr(object_type, field) for field in fields])
+    if key is not None:
+        statement = statement.where(_filter_column(object_type, key, many))
+    return statement.order_by(*object_type.__table__.primary_key.columns)
+
+
+@lru_cache(maxsize=None)
+def update_by(object_type, key: str, update_keys: Tuple[str, ...]) -> Update:
+    """sets the update_keys columns of the objects whose column key equals value, the session is not synchronized"""
+    return update(object_type).where(
+        _filter_column(object_type, key, False)
+    ).values(
+        {update_key: bindparam(f'new_{update_key}') for update_key in update_keys}
+    ).execution_options(synchronize_session=False)
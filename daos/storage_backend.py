@@ -0,0 +1,229 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Union, Any, List, Dict, Optional, Type, NamedTuple, Tuple
+from sqlalchemy import Table, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+
+from config import SETTINGS
+from database import db_models as db_model
+from database.database import run_with_write_retry
+from daos import statement_cache
+
+
+class StorageBackend(ABC):
+    """
+    Storage operations used by CommonDao, implemented once per storage engine.
+    """
+
+    @abstractmethod
+    def get_object(
+            self,
+            object_type: Union[db_model.User, db_model.Team, db_model.Board, db_model.Task],
+            filter_condition: Any
+    ) -> Union[db_model.Team, db_model.User, db_model.Board, db_model.Task]:
+        """first object of the type matching the condition, None if there is none"""
+
+    @abstractmethod
+    def create_object(
+            self,
+            object_payload: Union[db_model.User, db_model.Team, db_model.Board, db_model.Task],
+            commit: bool = True
+    ) -> Union[db_model.Team, db_model.User, db_model.Board, db_model.Task]:
+        """stores the new object and returns it with its primary key and defaults filled in"""
+
+    @abstractmethod
+    def get_objects(
+            self,
+            object_type: Union[db_model.User, db_model.Team, db_model.Board, db_model.Task],
+    ) -> Union[List[db_model.Team], List[db_model.User], List[db_model.Board], List[db_model.Task]]:
+        """every object of the type"""
+
+    @abstractmethod
+    def update_object(
+            self,
+            object_type: Union[db_model.User, db_model.Team, db_model.Board, db_model.Task],
+            filter_condition: Any,
+            update_payload: Dict[str, str],
+            commit: bool = True
+    ) -> int:
+        """updates the matching rows with the payload and returns how many were updated"""
+
+    @abstractmethod
+    def commit(self):
+        """makes the writes done without commit durable"""
+
+    @abstractmethod
+    def rollback(self):
+        """drops the writes done without commit"""
+
+    @abstractmethod
+    def get_rows(
+            self,
+            row_type: Type[NamedTuple],
+            object_type: Union[db_model.User, db_model.Team, db_model.Board, db_model.Task],
+            filter_condition: Optional[Any] = None
+    ) -> List[NamedTuple]:
+        """the matching rows as row_type tuples of the named columns, ordered by primary key"""
+
+
+class SqlAlchemyStorageBackend(StorageBackend):
+    """
+    Default backend, persists through the SQLAlchemy session into SQLite.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_object(self, object_type, filter_condition):
+        table = object_type.__table__
+        lookup = _column_lookup(table, filter_condition)
+        if lookup is None or lookup[2]:
+            return self.db.query(object_type).filter(filter_condition).first()
+
+        key, value, _ = lookup
+        if key == table.primary_key.columns[0].key:
+            # served from the identity map when the row was already loaded by this session
+            return self._remember_names(self.db.get(object_type, value))
+        if key not in unique_column_keys(table):
+            return self._first(object_type, filter_condition, key, value)
+
+        # unique name -> primary key of the rows found in this request, misses are not kept
+        lookup_cache = self.db.info.setdefault('lookup_cache', {})
+        cache_key = (table.name, key, value)
+        if cache_key in lookup_cache:
+            object_model = self.db.get(object_type, lookup_cache[cache_key])
+            if object_model is not None and getattr(object_model, key) == value:
+                return object_model
+            del lookup_cache[cache_key]
+
+        return self._remember_names(self._first(object_type, filter_condition, key, value))
+
+    def _first(self, object_type, filter_condition, key, value):
+        if SETTINGS.dao_statement_cache:
+            return self.db.execute(statement_cache.first_by(object_type, key), {'value': value}).scalars().first()
+        return self.db.query(object_type).filter(filter_condition).first()
+
+    def _remember_names(self, object_model):
+        if object_model is not None:
+            table = object_model.__table__
+            lookup_cache = self.db.info.setdefault('lookup_cache', {})
+            primary_key = getattr(object_model, table.primary_key.columns[0].key)
+            for key in unique_column_keys(table):
+                lookup_cache[(table.name, key, getattr(object_model, key))] = primary_key
+        return object_model
+
+    def create_object(self, object_payload, commit=True):
+        if not commit:
+            # inside a unit of work, flush to get the primary key and leave the commit to the caller
+            self.db.add(object_payload)
+            self.db.flush()
+            return object_payload
+
+        def write():
+            self.db.add(object_payload)
+            self.db.commit()
+            self.db.refresh(object_payload)
+            return object_payload
+
+        return run_with_write_retry(write, rollback=self.db.rollback)
+
+    def get_objects(self, object_type):
+        return self.db.query(object_type).all()
+
+    def update_object(self, object_type, filter_condition, update_payload, commit=True):
+        if not commit:
+            return self._update(object_type, filter_condition, update_payload)
+
+        def write():
+            status = self._update(object_type, filter_condition, update_payload)
+            self.db.commit()
+            return status
+
+        return run_with_write_retry(write, rollback=self.db.rollback)
+
+    def _update(self, object_type, filter_condition, update_payload) -> int:
+        table = object_type.__table__
+        lookup = _column_lookup(table, filter_condition) if SETTINGS.dao_statement_cache else None
+        if (
+                lookup is None
+                or lookup[0] != table.primary_key.columns[0].key
+                or lookup[2]
+                or not all(isinstance(update_key, str) for update_key in update_payload)
+        ):
+            return self.db.query(object_type).filter(filter_condition).update(update_payload)
+
+        key, value, _ = lookup
+        status = self.db.execute(
+            statement_cache.update_by(object_type, key, tuple(update_payload)),
+            {'value': value, **{f'new_{update_key}': new_value for update_key, new_value in update_payload.items()}}
+        ).rowcount
+        # the cached statement leaves the session alone, a loaded copy of the row is expired instead
+        loaded = self.db.identity_map.get(inspect(object_type).identity_key_from_primary_key([value]))
+        if loaded is not None:
+            self.db.expire(loaded)
+        return status
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def get_rows(self, row_type, object_type, filter_condition=None):
+        lookup = None
+        if SETTINGS.dao_statement_cache:
+            lookup = (None, None, False) if filter_condition is None else _column_lookup(
+                object_type.__table__, filter_condition
+            )
+        if lookup is not None:
+            key, value, many = lookup
+            statement = statement_cache.rows_by(object_type, row_type._fields, key, many)
+            return [row_type._make(row) for row in self.db.execute(statement, {'value': value})]
+
+        query = self.db.query(*[getattr(object_type, field) for field in row_type._fields])
+        if filter_condition is not None:
+            query = query.filter(filter_condition)
+        query = query.order_by(*object_type.__table__.primary_key.columns)
+        return [row_type._make(row) for row in query]
+
+
+@lru_cache(maxsize=None)
+def unique_column_keys(table: Table) -> Tuple[str, ...]:
+    """keys of the columns with a unique constraint or a single column unique index, partial ones included"""
+    return tuple(column.key for column in table.columns if column.unique) + tuple(
+        index.columns[0].key for index in table.indexes if index.unique and len(index.columns) == 1
+    )
+
+
+def _column_lookup(table: Table, condition: Any) -> Optional[Tuple[str, Any, bool]]:
+    """(column key, value, False) when the condition is a single column == value of the table,
+    (column key, values, True) for column.in_(values)
+    """
+    if (
+            isinstance(condition, BinaryExpression)
+            and condition.operator in (operators.eq, operators.in_op)
+            and isinstance(condition.right, BindParameter)
+            and getattr(condition.left, 'table', None) is table
+    ):
+        many = condition.operator is operators.in_op
+        value = condition.right.effective_value
+        return condition.left.key, list(value) if many else value, many
+    return None
+
+
+def get_storage_backend(db: Session) -> StorageBackend:
+    """returns the storage backend configured with SETTINGS.storage_backend
+    :param db: request session, used by the sqlite backend
+    :type db: Session
+    """
+    if SETTINGS.storage_backend == "sqlite":
+        return SqlAlchemyStorageBackend(db)
+
+    if SETTINGS.storage_backend == "log":
+        # imported lazily, the log store is only loaded when selected
+        from daos.log_storage_backend import get_log_store
+        return get_log_store()
+
+    raise ValueError(f"Unknown storage backend: {SETTINGS.storage_backend}")
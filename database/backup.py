@@ -0,0 +1,267 @@
+"""Online snapshots and logical dump/restore of the database.
+
+A snapshot is a page copy made with the SQLite backup API, a few pages per step so writers
+are not held off for the whole copy and WAL readers are never blocked. A dump is a gzip
+compressed NDJSON file with the rows of every table read in one read transaction, restored
+into a new database file with the indexes and triggers created after the data is loaded.
+"""
+import gzip
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable, CreateIndex
+
+from database import db_models
+from logger import LOGGER
+
+DUMP_FORMAT = "factwise-dump"
+DUMP_VERSION = 1
+# rows per executemany when restoring
+RESTORE_BATCH_SIZE = 10000
+SEQUENCE_TABLE = "sqlite_sequence"
+
+
+def snapshot_database(bind: Engine, target_path: str, pages_per_step: int, step_sleep_ms: int) -> Dict[str, Any]:
+    """copies the live database into a new SQLite file with the backup API
+    :param bind: engine of the database to copy
+    :type bind: Engine
+    :param target_path: new database file
+    :type target_path: str
+    :param pages_per_step: pages copied while holding the read lock
+    :type pages_per_step: int
+    :param step_sleep_ms: pause between steps, lets writers in
+    :type step_sleep_ms: int
+    :return: snapshot file, pages and duration
+    """
+    target = _new_file(target_path)
+    with _removed_on_failure(target):
+        start_time = time.perf_counter()
+        steps = 0
+        pages = 0
+
+        def progress(status, remaining, total):
+            nonlocal steps, pages
+            steps += 1
+            pages = total
+
+        source_connection = bind.raw_connection()
+        target_connection = sqlite3.connect(target)
+        try:
+            source_connection.connection.backup(
+                target_connection, pages=pages_per_step, progress=progress, sleep=step_sleep_ms / 1000
+            )
+        finally:
+            target_connection.close()
+            source_connection.close()
+
+    seconds = time.perf_counter() - start_time
+    LOGGER.info(f"Snapshot of {pages} pages in {steps} steps written to {target} in {seconds:.2f}s")
+    return {'file': str(target), 'pages': pages, 'steps': steps, 'seconds': seconds}
+
+
+def dump_database(bind: Engine, target_path: str) -> Dict[str, Any]:
+    """writes the rows of every table into a gzip compressed NDJSON dump, all read from one snapshot
+    :param bind: engine of the database to dump
+    :type bind: Engine
+    :param target_path: new dump file
+    :type target_path: str
+    :return: dump file, rows per table and duration
+    """
+    target = _new_file(target_path)
+    with _removed_on_failure(target):
+        start_time = time.perf_counter()
+        table_rows = {}
+
+        connection = bind.raw_connection()
+        try:
+            cursor = connection.cursor()
+            # one read transaction, the tables are consistent with each other while writers go on
+            cursor.execute("BEGIN")
+            with gzip.open(target, 'wt', encoding='utf-8', compresslevel=6) as dump:
+                _write_line(
+                    dump, {'format': DUMP_FORMAT, 'version': DUMP_VERSION, 'created': datetime.now().isoformat()}
+                )
+                for table in db_models.Base.metadata.sorted_tables:
+                    columns = [column.name for column in table.columns]
+                    _write_line(dump, {'table': table.name, 'columns': columns})
+                    cursor.execute(f"SELECT {', '.join(columns)} FROM {table.name}")
+                    rows = 0
+                    while True:
+                        batch = cursor.fetchmany(RESTORE_BATCH_SIZE)
+                        if not batch:
+                            break
+                        dump.writelines(json.dumps(row, separators=(',', ':')) + "\n" for row in batch)
+                        rows += len(batch)
+                    table_rows[table.name] = rows
+                # ids of deleted and archived rows are never handed out again, the restore keeps it that way.
+                # The table only exists once a table with AUTOINCREMENT was created
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEQUENCE_TABLE,)
+                )
+                if cursor.fetchone():
+                    cursor.execute(f"SELECT name, seq FROM {SEQUENCE_TABLE}")
+                    _write_line(dump, {'table': SEQUENCE_TABLE, 'columns': ['name', 'seq']})
+                    dump.writelines(json.dumps(row, separators=(',', ':')) + "\n" for row in cursor.fetchall())
+                _write_line(dump, {'end': True, 'rows': table_rows})
+            cursor.execute("COMMIT")
+        finally:
+            connection.close()
+
+    seconds = time.perf_counter() - start_time
+    LOGGER.info(f"Dumped {sum(table_rows.values())} rows to {target} in {seconds:.2f}s")
+    return {'file': str(target), 'rows': table_rows, 'seconds': seconds}
+
+
+def restore_database(dump_path: str, target_path: str) -> Dict[str, Any]:
+    """restores a dump into a new database file.
+    Tables are created without indexes, rows are bulk loaded in one transaction with journaling off,
+    the indexes and triggers are created afterwards so they are built once over the loaded data
+    :param dump_path: dump written by dump_database
+    :type dump_path: str
+    :param target_path: new database file, swapped in for the live one while the app is stopped
+    :type target_path: str
+    :return: restored file, rows per table and duration
+    """
+    target = _new_file(target_path)
+    bind = create_engine(f"sqlite:///{target}")
+    with _removed_on_failure(target, bind):
+        start_time = time.perf_counter()
+        tables = db_models.Base.metadata.tables
+        table_rows = {}
+
+        with bind.connect() as connection:
+            for table in db_models.Base.metadata.sorted_tables:
+                connection.execute(CreateTable(table))
+
+        connection = bind.raw_connection()
+        try:
+            cursor = connection.cursor()
+            # a fresh file, a failed restore is simply run again
+            cursor.execute("PRAGMA journal_mode=OFF")
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.execute("BEGIN")
+            with gzip.open(dump_path, 'rt', encoding='utf-8') as dump:
+                lines = iter(dump)
+                header = json.loads(next(lines))
+                if header.get('format') != DUMP_FORMAT or header.get('version') != DUMP_VERSION:
+                    raise ValueError(f"{dump_path} is not a version {DUMP_VERSION} database dump")
+
+                completed = False
+                for table_header, rows in _dump_sections(lines):
+                    if table_header.get('end'):
+                        completed = True
+                        break
+                    table_name = table_header['table']
+                    if table_name == SEQUENCE_TABLE:
+                        # sequences made by the loaded rows are raised to where the dumped database was
+                        sequences = list(rows)
+                        cursor.executemany(
+                            f"UPDATE {SEQUENCE_TABLE} SET seq = max(seq, ?) WHERE name = ?",
+                            [(seq, name) for name, seq in sequences]
+                        )
+                        cursor.executemany(
+                            f"INSERT INTO {SEQUENCE_TABLE} (name, seq) SELECT ?, ? "
+                            f"WHERE NOT EXISTS (SELECT 1 FROM {SEQUENCE_TABLE} WHERE name = ?)",
+                            [(name, seq, name) for name, seq in sequences]
+                        )
+                        continue
+                    if table_name not in tables:
+                        LOGGER.warning(f"Skipping table {table_name} of the dump, it is not in the models")
+                        for _ in rows:
+                            pass
+                        continue
+                    table_rows[table_name] = _load_table(cursor, tables[table_name], table_header['columns'], rows)
+                if not completed:
+                    raise ValueError(f"{dump_path} is truncated")
+            cursor.execute("COMMIT")
+        finally:
+            connection.close()
+
+        load_seconds = time.perf_counter() - start_time
+        with bind.begin() as connection:
+            for table in db_models.Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.execute(CreateIndex(index))
+            for trigger in db_models.TASK_STATUS_TRIGGERS:
+                connection.execute(trigger)
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+        bind.dispose()
+
+    seconds = time.perf_counter() - start_time
+    LOGGER.info(
+        f"Restored {sum(table_rows.values())} rows into {target} in {seconds:.2f}s "
+        f"(load {load_seconds:.2f}s, indexes {seconds - load_seconds:.2f}s)"
+    )
+    return {'file': str(target), 'rows': table_rows, 'load_seconds': load_seconds, 'seconds': seconds}
+
+
+def _load_table(cursor, table, dump_columns: List[str], rows: Iterator[List[Any]]) -> int:
+    # columns removed from the models since the dump are dropped, added ones take their defaults
+    positions = [position for position, column in enumerate(dump_columns) if column in table.columns]
+    columns = [dump_columns[position] for position in positions]
+    statement = (
+        f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    )
+    loaded = 0
+    batch = []
+    for row in rows:
+        batch.append([row[position] for position in positions])
+        if len(batch) == RESTORE_BATCH_SIZE:
+            cursor.executemany(statement, batch)
+            loaded += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(statement, batch)
+        loaded += len(batch)
+    return loaded
+
+
+def _dump_sections(lines: Iterator[str]):
+    """yields (section header, rows of the section) while reading the dump once"""
+    pending = [None]
+
+    def section_rows():
+        for line in lines:
+            record = json.loads(line)
+            if isinstance(record, dict):
+                pending[0] = record
+                return
+            yield record
+
+    header = json.loads(next(lines))
+    while header is not None:
+        pending[0] = None
+        yield header, section_rows()
+        header = pending[0]
+
+
+def _write_line(dump, record: Dict[str, Any]):
+    dump.write(json.dumps(record) + "\n")
+
+
+@contextmanager
+def _removed_on_failure(target: Path, bind: Optional[Engine] = None):
+    """a failed snapshot, dump or restore leaves no partial file behind"""
+    try:
+        yield
+    except BaseException:
+        if bind is not None:
+            bind.dispose()
+        for path in (target, *(target.with_name(target.name + suffix) for suffix in ('-wal', '-shm', '-journal'))):
+            path.unlink(missing_ok=True)
+        raise
+
+
+def _new_file(target_path: str) -> Path:
+    target = Path(target_path)
+    if target.exists():
+        raise FileExistsError(f"{target} already exists")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    return target
@@ -1,14 +1,203 @@
-from sqlalchemy import create_engine
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 
+from config import SETTINGS
+from logger import LOGGER
+
+T = TypeVar("T")
+
+# tenant ids become file names, so only plain names are accepted
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """WAL lets readers in every worker run alongside the single writer,
+    busy_timeout makes a writer wait for the write lock instead of failing right away
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SETTINGS.db_busy_timeout_ms}")
+    cursor.close()
+
+
+def create_database_engine(database_url: str) -> Engine:
+    """engine with the connection settings every database of the app uses"""
+    # pooled instead of the NullPool default of file databases, a request reuses a configured connection
+    database_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False},
+        echo=SETTINGS.sql_echo,
+        poolclass=QueuePool,
+        pool_size=SETTINGS.db_pool_size,
+        max_overflow=SETTINGS.db_pool_max_overflow
+    )
+    event.listen(database_engine, "connect", configure_sqlite_connection)
+    return database_engine
+
+
 # create an engine to connect with DB
-engine = create_engine(
-    "sqlite:///db\\factwise_board.db",
-    connect_args={"check_same_thread": False},
-    echo=True
-)
+engine = create_database_engine(SETTINGS.database_url)
 session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Base class for models
 Base = declarative_base()
+
+
+class TenantEngines:
+    """Engines of the tenant databases, one SQLite file per tenant so tenants do not share a write lock.
+    At most max_engines are kept open, the least recently used one is disposed when another tenant is opened.
+    Only tenants whose database exists are opened, a new tenant is provisioned with create. The schema of a
+    tenant is upgraded the first time this process opens it.
+    """
+
+    def __init__(self, directory: str, max_engines: int):
+        self.directory = Path(directory)
+        self.max_engines = max_engines
+        self._engines: "OrderedDict[str, Engine]" = OrderedDict()
+        self._ready = set()
+        self._lock = threading.Lock()
+        self.metrics = {'opened': 0, 'evicted': 0}
+
+    def path(self, tenant_id: str) -> Path:
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"Invalid tenant id {tenant_id!r}, use up to 64 letters, digits, '_' or '-'")
+        return self.directory / f"{tenant_id}.db"
+
+    def get(self, tenant_id: str) -> Engine:
+        """engine of an existing tenant
+        :raises ValueError: tenant_id is not a valid tenant id
+        :raises LookupError: the tenant has no database
+        """
+        return self._open(tenant_id, create=False)
+
+    def create(self, tenant_id: str) -> Engine:
+        """provisions a new tenant, its database is created with the schema
+        :raises ValueError: tenant_id is not a valid tenant id
+        :raises FileExistsError: the tenant already has a database
+        """
+        return self._open(tenant_id, create=True)
+
+    def _open(self, tenant_id: str, create: bool) -> Engine:
+        path = self.path(tenant_id)
+        with self._lock:
+            tenant_engine = self._engines.get(tenant_id)
+            if tenant_engine is not None and not create:
+                self._engines.move_to_end(tenant_id)
+                return tenant_engine
+            if create and (tenant_engine is not None or path.exists()):
+                raise FileExistsError(f"Tenant {tenant_id} already exists")
+            if not create and not path.exists():
+                raise LookupError(f"Tenant {tenant_id} does not exist")
+
+            # opening is rare, holding the lock keeps two requests from creating one schema at once
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tenant_engine = create_database_engine(f"sqlite:///{path}")
+            if tenant_id not in self._ready:
+                from database.schema_upgrade import create_schema
+                create_schema(tenant_engine)
+                self._ready.add(tenant_id)
+            self._engines[tenant_id] = tenant_engine
+            self.metrics['opened'] += 1
+            LOGGER.info(f"Opened database of tenant {tenant_id}")
+
+            while len(self._engines) > self.max_engines:
+                evicted_id, evicted = self._engines.popitem(last=False)
+                self._close(evicted)
+                self.metrics['evicted'] += 1
+                LOGGER.info(f"Closed database of tenant {evicted_id}")
+            return tenant_engine
+
+    def list_tenants(self, counts: bool = False) -> List[Dict[str, Any]]:
+        """every tenant database on disk, with the live rows per table when counts is set"""
+        with self._lock:
+            open_ids = set(self._engines)
+        tenants = []
+        for path in sorted(self.directory.glob("*.db")):
+            tenant = {
+                'tenant_id': path.stem,
+                'size_bytes': path.stat().st_size,
+                'open': path.stem in open_ids
+            }
+            if counts:
+                tenant['rows'] = live_row_counts(path)
+            tenants.append(tenant)
+        return tenants
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.metrics, 'open': len(self._engines), 'max_engines': self.max_engines}
+
+    def dispose(self):
+        with self._lock:
+            for tenant_engine in self._engines.values():
+                self._close(tenant_engine)
+            self._engines.clear()
+
+    @staticmethod
+    def _close(tenant_engine: Engine):
+        from daos.group_commit import stop_group_committer
+
+        stop_group_committer(tenant_engine)
+        # sessions still using the engine keep their connection until they close
+        tenant_engine.dispose()
+
+
+TENANT_ENGINES = TenantEngines(SETTINGS.tenant_db_dir, SETTINGS.tenant_max_engines)
+
+
+def live_row_counts(path: Path) -> Dict[str, Optional[int]]:
+    """rows not soft deleted per table, read over a separate read only connection so listing
+    tenants does not open (and evict) engines
+    """
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        counts = {}
+        for table_name in ("users", "teams", "boards", "tasks"):
+            try:
+                counts[table_name] = connection.execute(
+                    f"SELECT count(*) FROM {table_name} WHERE deleted_at IS NULL"
+                ).fetchone()[0]
+            except sqlite3.OperationalError:
+                counts[table_name] = None
+        return counts
+    finally:
+        connection.close()
+
+
+def is_database_locked(error: OperationalError) -> bool:
+    return "database is locked" in str(error.orig) or "database is busy" in str(error.orig)
+
+
+def run_with_write_retry(write: Callable[[], T], rollback: Optional[Callable[[], None]] = None) -> T:
+    """runs a write, retrying with exponential backoff while another process holds the SQLite write lock
+    :param write: function doing the whole write including its commit, it is called again on retry
+    :type write: Callable[[], T]
+    :param rollback: called after a failed attempt, usually session.rollback
+    :type rollback: Optional[Callable[[], None]]
+    :return: result of write
+    """
+    for attempt in range(SETTINGS.db_write_retries + 1):
+        try:
+            return write()
+        except OperationalError as e:
+            if rollback is not None:
+                rollback()
+            if not is_database_locked(e) or attempt == SETTINGS.db_write_retries:
+                raise
+            delay = SETTINGS.db_write_backoff_ms / 1000 * (2 ** attempt) * random.uniform(0.5, 1.5)
+            LOGGER.warning(f"Database is locked, retrying write in {delay:.3f}s (attempt {attempt + 1})")
+            time.sleep(delay)
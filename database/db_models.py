@@ -1,6 +1,8 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime
-from sqlalchemy.orm import relationship
-from sqlalchemy import func, Table
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Float, Index, DDL, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import relationship, Session, with_loader_criteria
+from sqlalchemy import func, Table, text
+from sqlalchemy.sql import Select
 
 from database.database import Base
 
@@ -12,14 +14,23 @@ user_team_association = Table(
 )
 
 
+# soft deleted rows keep deleted_at set and are left out of ORM queries by exclude_soft_deleted below,
+# names are unique among live rows only through partial unique indexes
+LIVE_ROWS = text("deleted_at IS NULL")
+
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("uq_users_user_name_live", "user_name", unique=True, sqlite_where=LIVE_ROWS),
+    )
 
     user_id = Column(Integer, primary_key=True, index=True, autoincrement="auto")
-    user_name = Column(String(64), unique=True, index=True, nullable=False)
+    user_name = Column(String(64), index=True, nullable=False)
     user_display_name = Column(String(64))
     create_time = Column(DateTime, server_default=func.now())
     update_time = Column(DateTime, onupdate=func.now())
+    deleted_at = Column(DateTime)
 
     def __repr__(self):
         return f"User Model: {self.user_name}"
@@ -31,13 +42,19 @@ class User(Base):
 
 class Team(Base):
     __tablename__ = "teams"
+    __table_args__ = (
+        Index("uq_teams_team_name_live", "team_name", unique=True, sqlite_where=LIVE_ROWS),
+    )
 
     team_id = Column(Integer, primary_key=True, index=True, autoincrement="auto")
-    team_name = Column(String(64), unique=True, index=True, nullable=False)
+    team_name = Column(String(64), index=True, nullable=False)
     description = Column(String(128))
     team_admin = Column(Integer, ForeignKey("users.user_id"))
+    # kept in step with users_to_teams in the same transaction, see TeamService
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
     create_time = Column(DateTime, server_default=func.now())
     update_time = Column(DateTime, onupdate=func.now())
+    deleted_at = Column(DateTime)
 
     def __repr__(self):
         return f"Team Model: {self.team_name}"
@@ -48,15 +65,22 @@ class Team(Base):
 
 class Board(Base):
     __tablename__ = "boards"
+    __table_args__ = (
+        Index("uq_boards_board_name_live", "board_name", unique=True, sqlite_where=LIVE_ROWS),
+        Index("ix_boards_live_team", "board_team_id", sqlite_where=LIVE_ROWS),
+        # never reuse ids of archived or deleted boards
+        {"sqlite_autoincrement": True}
+    )
 
     board_id = Column(Integer, primary_key=True, index=True, autoincrement="auto")
-    board_name = Column(String(64), unique=True, index=True, nullable=False)
+    board_name = Column(String(64), index=True, nullable=False)
     description = Column(String(128))
     board_team_id = Column(Integer, ForeignKey("teams.team_id"))
     board_status = Column(String(10))
     board_end_time = Column(DateTime)
     create_time = Column(DateTime, server_default=func.now())
     update_time = Column(DateTime, onupdate=func.now())
+    deleted_at = Column(DateTime)
 
     def __repr__(self):
         return f"Board Model: {self.board_name}"
@@ -67,16 +91,197 @@ class Board(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("uq_tasks_task_title_live", "task_title", unique=True, sqlite_where=LIVE_ROWS),
+        Index("ix_tasks_live_board", "board_id", sqlite_where=LIVE_ROWS),
+        {"sqlite_autoincrement": True}
+    )
 
     task_id = Column(Integer, primary_key=True, index=True, autoincrement="auto")
-    task_title = Column(String(64), unique=True, index=True, nullable=False)
+    task_title = Column(String(64), index=True, nullable=False)
     description = Column(String(128))
     board_id = Column(Integer, ForeignKey("boards.board_id"))
     task_assign_id = Column(Integer, ForeignKey("users.user_id"))
     task_status = Column(String(20))
     create_time = Column(DateTime, server_default=func.now())
     update_time = Column(DateTime, onupdate=func.now())
+    deleted_at = Column(DateTime)
 
     def __repr__(self):
         return f"Board Model: {self.task_title}"
 
+
+
+class BoardEvent(Base):
+    __tablename__ = "board_events"
+
+    event_seq = Column(Integer, primary_key=True, index=True, autoincrement="auto")
+    event_type = Column(String(32), nullable=False)
+    board_id = Column(Integer, ForeignKey("boards.board_id"), index=True)
+    team_id = Column(Integer, ForeignKey("teams.team_id"), index=True)
+    object_id = Column(Integer)
+    payload = Column(String)
+    create_time = Column(DateTime, server_default=func.now())
+
+    def __repr__(self):
+        return f"Board Event Model: {self.event_seq} {self.event_type}"
+
+
+class TaskStatusTransition(Base):
+    """status history of tasks, written by the triggers below in the transaction changing the task"""
+    __tablename__ = "task_status_transitions"
+    __table_args__ = (
+        Index("ix_task_status_transitions_board_task", "board_id", "task_id", "transition_ms"),
+    )
+
+    transition_id = Column(Integer, primary_key=True, autoincrement="auto")
+    task_id = Column(Integer, ForeignKey("tasks.task_id"), nullable=False)
+    board_id = Column(Integer)
+    from_status = Column(String(20))
+    to_status = Column(String(20))
+    # unix epoch milliseconds, kept as an integer for cheap interval arithmetic
+    transition_ms = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"Task Status Transition Model: {self.task_id} {self.from_status} -> {self.to_status}"
+
+
+_EPOCH_MS_NOW = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+# created with the transitions table, and by the restore after the data is loaded
+TASK_STATUS_TRIGGERS = [
+    DDL(f"""
+CREATE TRIGGER IF NOT EXISTS task_status_history_insert AFTER INSERT ON tasks
+BEGIN
+    INSERT INTO task_status_transitions (task_id, board_id, from_status, to_status, transition_ms)
+    VALUES (NEW.task_id, NEW.board_id, NULL, NEW.task_status, {_EPOCH_MS_NOW});
+END
+"""),
+    DDL(f"""
+CREATE TRIGGER IF NOT EXISTS task_status_history_update AFTER UPDATE OF task_status ON tasks
+WHEN OLD.task_status IS NOT NEW.task_status
+BEGIN
+    INSERT INTO task_status_transitions (task_id, board_id, from_status, to_status, transition_ms)
+    VALUES (NEW.task_id, NEW.board_id, OLD.task_status, NEW.task_status, {_EPOCH_MS_NOW});
+END
+"""),
+]
+for trigger in TASK_STATUS_TRIGGERS:
+    event.listen(TaskStatusTransition.__table__, "after_create", trigger)
+
+
+class TeamDailyStats(Base):
+    """daily task rollup of a team, refreshed incrementally by TeamStatsService"""
+    __tablename__ = "team_daily_stats"
+
+    team_id = Column(Integer, ForeignKey("teams.team_id"), primary_key=True)
+    day = Column(String(10), primary_key=True)
+    tasks_created = Column(Integer, nullable=False, default=0)
+    tasks_completed = Column(Integer, nullable=False, default=0)
+    completion_seconds = Column(Float, nullable=False, default=0)
+    refresh_time = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"Team Daily Stats Model: {self.team_id} {self.day}"
+
+
+class ArchivedBoard(Base):
+    __tablename__ = "archived_boards"
+
+    board_id = Column(Integer, primary_key=True, index=True)
+    board_name = Column(String(64), index=True, nullable=False)
+    description = Column(String(128))
+    board_team_id = Column(Integer, ForeignKey("teams.team_id"), index=True)
+    board_status = Column(String(10))
+    board_end_time = Column(DateTime)
+    create_time = Column(DateTime)
+    update_time = Column(DateTime)
+    archive_time = Column(DateTime, server_default=func.now())
+
+    def __repr__(self):
+        return f"Archived Board Model: {self.board_name}"
+
+    # relationships
+    tasks = relationship("ArchivedTask", backref="board")
+
+
+class ArchivedTask(Base):
+    __tablename__ = "archived_tasks"
+
+    task_id = Column(Integer, primary_key=True, index=True)
+    task_title = Column(String(64), nullable=False)
+    description = Column(String(128))
+    board_id = Column(Integer, ForeignKey("archived_boards.board_id"), index=True)
+    task_assign_id = Column(Integer, ForeignKey("users.user_id"))
+    task_status = Column(String(20))
+    create_time = Column(DateTime)
+    update_time = Column(DateTime)
+    archive_time = Column(DateTime, server_default=func.now())
+
+    def __repr__(self):
+        return f"Archived Task Model: {self.task_title}"
+
+
+SOFT_DELETE_MODELS = (User, Team, Board, Task)
+_LIVE_ROWS_CRITERIA = [
+    with_loader_criteria(model, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+    for model in SOFT_DELETE_MODELS
+]
+
+
+@event.listens_for(Session, "do_orm_execute")
+def exclude_soft_deleted(execute_state):
+    """adds deleted_at IS NULL for the soft deletable models to every ORM select of a session,
+    including relationship loads. Run a statement with execution_options(include_deleted=True) to see them.
+    Loader criteria do not reach into the selects of a union, those filter deleted_at themselves
+    """
+    if (
+            execute_state.is_select
+            and isinstance(execute_state.statement, Select)
+            and not execute_state.is_column_load
+            and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(*_LIVE_ROWS_CRITERIA)
+
+
+class ChangeCounter(Base):
+    """version of a table, bumped in the transaction of every write to it by the listeners below.
+    Cached responses built from a table are valid while its version is unchanged
+    """
+    __tablename__ = "change_counters"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"Change Counter Model: {self.table_name} {self.version}"
+
+
+def bump_change_counters(connection, table_names):
+    """adds one to the versions of the tables, one upsert statement for all of them"""
+    table_names = sorted(set(table_names) - {ChangeCounter.__tablename__})
+    if not table_names:
+        return
+    statement = sqlite_insert(ChangeCounter.__table__).values(
+        [{'table_name': table_name, 'version': 1} for table_name in table_names]
+    )
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[ChangeCounter.table_name],
+        set_={'version': ChangeCounter.version + 1}
+    ))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def count_statement_changes(execute_state):
+    """insert, update and delete statements run through a session, ORM bulk updates included"""
+    if execute_state.is_insert or execute_state.is_update or execute_state.is_delete:
+        bump_change_counters(execute_state.session.connection(), [execute_state.statement.table.name])
+
+
+@event.listens_for(Session, "after_flush")
+def count_flush_changes(db, flush_context):
+    """objects added, changed or deleted by a flush"""
+    bump_change_counters(
+        db.connection(),
+        {model.__table__.name for model in (*db.new, *db.dirty, *db.deleted)}
+    )
@@ -0,0 +1,143 @@
+"""Upgrades of databases created before a column was added to the models.
+create_all only creates missing tables, columns added later are added here,
+tables whose definition changed are rebuilt.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateTable
+
+from database import db_models
+from config import SETTINGS
+from database.database import run_with_write_retry
+from logger import LOGGER
+
+
+def add_team_member_count(connection: Connection):
+    """adds teams.member_count and backfills it from users_to_teams"""
+    connection.execute(text("ALTER TABLE teams ADD COLUMN member_count INTEGER NOT NULL DEFAULT 0"))
+    connection.execute(text(
+        "UPDATE teams SET member_count = "
+        "(SELECT count(*) FROM users_to_teams WHERE users_to_teams.team_id = teams.team_id)"
+    ))
+
+
+def add_deleted_at(table_name: str, name_column: str):
+    """returns the upgrade adding deleted_at for soft deletes, the unique index on the name column
+    is replaced by the partial one covering live rows only
+    """
+    def upgrade(connection: Connection):
+        connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN deleted_at DATETIME"))
+        connection.execute(text(f"DROP INDEX IF EXISTS ix_{table_name}_{name_column}"))
+        for index in db_models.Base.metadata.tables[table_name].indexes:
+            index.create(bind=connection, checkfirst=True)
+    return upgrade
+
+
+def has_autoincrement(connection: Connection, table_name: str) -> bool:
+    """whether the table was created with AUTOINCREMENT, without it SQLite hands out ids of deleted rows again"""
+    table_sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table_name}
+    ).scalar()
+    return table_sql is not None and "AUTOINCREMENT" in table_sql.upper()
+
+
+def rebuild_with_autoincrement(connection: Connection, table_name: str, archive_table_name: str):
+    """rebuilds a table created before sqlite_autoincrement was set on its model, the sequence starts after the
+    highest live or archived id so archived rows keep ids of their own. Ids of hard deleted rows above both
+    are not known anymore and may still be handed out once
+    """
+    table = db_models.Base.metadata.tables[table_name]
+    id_column = table.primary_key.columns[0].name
+    rebuild_name = f"{table_name}_rebuild"
+    column_names = ", ".join(column.name for column in table.columns)
+
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {rebuild_name}")
+    create_sql = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(create_sql.replace(f"CREATE TABLE {table_name} ", f"CREATE TABLE {rebuild_name} ", 1))
+    connection.exec_driver_sql(
+        f"INSERT INTO {rebuild_name} ({column_names}) SELECT {column_names} FROM {table_name}"
+    )
+    connection.exec_driver_sql(f"DROP TABLE {table_name}")
+    connection.exec_driver_sql(f"ALTER TABLE {rebuild_name} RENAME TO {table_name}")
+    for index in table.indexes:
+        index.create(bind=connection)
+    if table_name == db_models.Task.__tablename__:
+        for trigger in db_models.TASK_STATUS_TRIGGERS:
+            connection.execute(trigger)
+
+    connection.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {'name': table_name})
+    connection.execute(
+        text(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT :name, max("
+            f"(SELECT coalesce(max({id_column}), 0) FROM {table_name}), "
+            f"(SELECT coalesce(max({id_column}), 0) FROM {archive_table_name}))"
+        ),
+        {'name': table_name}
+    )
+
+
+# (table, column, upgrade adding the column)
+SCHEMA_UPGRADES = [
+    ("teams", "member_count", add_team_member_count),
+    ("users", "deleted_at", add_deleted_at("users", "user_name")),
+    ("teams", "deleted_at", add_deleted_at("teams", "team_name")),
+    ("boards", "deleted_at", add_deleted_at("boards", "board_name")),
+    ("tasks", "deleted_at", add_deleted_at("tasks", "task_title")),
+]
+# (table, its archive table) never reusing ids, rebuilt when created without AUTOINCREMENT
+AUTOINCREMENT_TABLES = [
+    ("boards", "archived_boards"),
+    ("tasks", "archived_tasks"),
+]
+# stored in PRAGMA user_version once the upgrades ran, the readiness probe compares it
+SCHEMA_VERSION = len(SCHEMA_UPGRADES) + len(AUTOINCREMENT_TABLES)
+
+
+def schema_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def upgrade_schema(bind: Engine):
+    """runs the upgrades whose column is missing, each in its own transaction"""
+    for table_name, column_name, upgrade in SCHEMA_UPGRADES:
+        def write():
+            with bind.begin() as connection:
+                columns = [column['name'] for column in inspect(connection).get_columns(table_name)]
+                if column_name in columns:
+                    return
+                upgrade(connection)
+                LOGGER.info(f"Added column {table_name}.{column_name}")
+
+        run_with_write_retry(write)
+
+    for table_name, archive_table_name in AUTOINCREMENT_TABLES:
+        def rebuild():
+            with bind.begin() as connection:
+                if has_autoincrement(connection, table_name):
+                    return
+                rebuild_with_autoincrement(connection, table_name, archive_table_name)
+                LOGGER.info(f"Rebuilt table {table_name} with AUTOINCREMENT")
+
+        run_with_write_retry(rebuild)
+
+    def write_version():
+        with bind.begin() as connection:
+            if schema_version(connection) < SCHEMA_VERSION:
+                connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    run_with_write_retry(write_version)
+
+
+def create_schema(bind: Engine):
+    """creates the missing tables and runs the upgrades of the database"""
+    for attempt in range(SETTINGS.db_write_retries + 1):
+        try:
+            run_with_write_retry(lambda: db_models.Base.metadata.create_all(bind=bind))
+            upgrade_schema(bind)
+            return
+        except OperationalError as e:
+            # workers starting together race on the DDL, tables and columns made by another worker are skipped on retry
+            raced = "already exists" in str(e.orig) or "duplicate column" in str(e.orig)
+            if not raced or attempt == SETTINGS.db_write_retries:
+                raise
@@ -1,19 +1,110 @@
-import uvicorn
 from fastapi import FastAPI
 
-from database.database import engine
-from database import db_models
+from config import SETTINGS
+from database.database import engine, session, TENANT_ENGINES
+from database.schema_upgrade import create_schema
+from daos.graph_replica import GRAPH_REPLICA
+from daos.group_commit import stop_group_committers
+from services.archive_service import start_archive_job
+from utils.admission_control import ADMISSION_CONTROLLER, AdmissionControlMiddleware
+from utils.tenant_routing import TenantPathMiddleware
+from utils.warm_up import READINESS, warm_up
+from utils.profiling import ProfilingMiddleware, CONTINUOUS_SAMPLER, install_sql_timing
+from logger import LOGGER
 
-from routers import users, teams, project_boards
+from routers import users, teams, project_boards, admin, imports, health
 
 
-db_models.Base.metadata.create_all(bind=engine)
 app = FastAPI()
 
 
 app.include_router(users.router)
 app.include_router(teams.router)
 app.include_router(project_boards.router)
+app.include_router(admin.router)
+app.include_router(imports.router)
+app.include_router(health.router)
+
+if SETTINGS.admission_enabled:
+    # admin routes stay unlimited so an overloaded worker can still be operated
+    ADMISSION_CONTROLLER.configure(
+        [router.prefix for router in (users.router, teams.router, project_boards.router, imports.router)],
+        SETTINGS.admission_rate,
+        SETTINGS.admission_burst,
+        SETTINGS.admission_max_in_flight,
+        SETTINGS.admission_routes
+    )
+    app.add_middleware(AdmissionControlMiddleware)
+
+if SETTINGS.tenant_routing_enabled:
+    # added last so it runs first, admission control sees the path without the tenant prefix
+    app.add_middleware(TenantPathMiddleware)
+
+if SETTINGS.profiling_enabled:
+    # added after the others so it runs first, the wall time of a profiled request covers them
+    install_sql_timing()
+    app.add_middleware(ProfilingMiddleware)
+
+
+@app.on_event("startup")
+def create_tables():
+    if SETTINGS.storage_backend != "sqlite":
+        # memberships, events, history, stats, deletes and imports run on the session, only the CommonDao
+        # paths have a log store, serving the app from it would split the data between both stores
+        raise RuntimeError(
+            f"storage_backend={SETTINGS.storage_backend} only supports the CommonDao paths, the app needs sqlite"
+        )
+    # tenant databases get their schema when they are first opened
+    create_schema(engine)
+
+
+@app.on_event("startup")
+def load_graph_replica():
+    if SETTINGS.graph_replica_enabled and SETTINGS.tenant_routing_enabled:
+        # the replica mirrors one database, serving it to every tenant would mix their data
+        LOGGER.warning("Graph replica is not loaded, it cannot be used together with tenant routing")
+    elif SETTINGS.graph_replica_enabled and SETTINGS.workers > 1:
+        # every worker holds its own replica and only sees its own writes
+        LOGGER.warning("Graph replica is not loaded, it cannot be used with more than one worker")
+    elif SETTINGS.graph_replica_enabled:
+        db = session()
+        try:
+            GRAPH_REPLICA.load(db)
+        finally:
+            db.close()
+
+
+@app.on_event("startup")
+async def warm_up_worker():
+    # runs after the schema is created, handlers run in the order they are registered
+    if SETTINGS.warm_up_enabled:
+        await warm_up(app, engine)
+    else:
+        READINESS.warmed_up = True
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    app.state.background_jobs = start_archive_job()
+    if SETTINGS.profiling_enabled and SETTINGS.profiling_continuous:
+        CONTINUOUS_SAMPLER.start()
+        app.state.background_jobs.append(CONTINUOUS_SAMPLER)
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    for job in app.state.background_jobs:
+        job.stop()
+
+
+@app.on_event("shutdown")
+def flush_group_commits():
+    stop_group_committers()
+
+
+@app.on_event("shutdown")
+def close_tenant_databases():
+    TENANT_ENGINES.dispose()
 
 
 @app.get("/")
@@ -22,4 +113,9 @@ def root():
 
 
 if __name__ == '__main__':
-    uvicorn.run(app)
+    import uvicorn
+
+    # create the schema once before the workers start
+    create_tables()
+    # multiple workers need the app as an import string
+    uvicorn.run("main:app", host=SETTINGS.host, port=SETTINGS.port, workers=SETTINGS.workers)
@@ -0,0 +1,84 @@
+"""Command line tasks run against the configured database.
+
+    python manage.py import tasks.csv --format csv --import-id migration
+    python manage.py snapshot db/backups/board.db
+    python manage.py dump db/backups/board.ndjson.gz
+    python manage.py restore db/backups/board.ndjson.gz db/restored.db
+"""
+import argparse
+import json
+from pathlib import Path
+
+from config import SETTINGS
+from database.database import session, engine
+
+
+def import_command(args: argparse.Namespace):
+    from main import create_tables
+    from services.import_service import ImportService
+
+    create_tables()
+    db = session()
+    try:
+        print(ImportService(db).import_file(json.dumps({
+            'path': args.path,
+            'format': args.format or Path(args.path).suffix.lstrip('.'),
+            'import_id': args.import_id or Path(args.path).stem
+        })))
+    finally:
+        db.close()
+
+
+def snapshot_command(args: argparse.Namespace):
+    from database.backup import snapshot_database
+
+    print(json.dumps(snapshot_database(
+        engine, args.target, SETTINGS.backup_pages_per_step, SETTINGS.backup_step_sleep_ms
+    )))
+
+
+def dump_command(args: argparse.Namespace):
+    from database.backup import dump_database
+
+    print(json.dumps(dump_database(engine, args.target)))
+
+
+def restore_command(args: argparse.Namespace):
+    from database.backup import restore_database
+
+    print(json.dumps(restore_database(args.dump, args.target)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FactWise Board management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import", help="bulk import boards and tasks, rerunning a failed import resumes it"
+    )
+    import_parser.add_argument("path", help="CSV or NDJSON file, one task per row")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    import_parser.add_argument("--import-id", help="checkpoint name, defaults to the file name")
+    import_parser.set_defaults(handler=import_command)
+
+    snapshot_parser = commands.add_parser("snapshot", help="online copy of the database file")
+    snapshot_parser.add_argument("target", help="new SQLite file")
+    snapshot_parser.set_defaults(handler=snapshot_command)
+
+    dump_parser = commands.add_parser("dump", help="compressed logical dump of every table")
+    dump_parser.add_argument("target", help="new .ndjson.gz file")
+    dump_parser.set_defaults(handler=dump_command)
+
+    restore_parser = commands.add_parser(
+        "restore", help="restore a dump into a new database file, swap it in while the app is stopped"
+    )
+    restore_parser.add_argument("dump", help="file written by the dump command")
+    restore_parser.add_argument("target", help="new SQLite file")
+    restore_parser.set_defaults(handler=restore_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 
 from pydantic import BaseModel
 from datetime import datetime
@@ -19,10 +19,24 @@ class TaskModel(BaseModel):
     creation_time: Optional[datetime] = None
 
 
+class BoardTaskModel(BaseModel):
+    title: str
+    description: str
+    user_id: Optional[int]
+
+
+class BoardWithTasksModel(BoardModel):
+    tasks: List[BoardTaskModel]
+
+
 class BoardIdModel(BaseModel):
     id: int
 
 
+class BoardWithTaskIdsModel(BoardIdModel):
+    tasks: List[int]
+
+
 class TaskIdModel(BaseModel):
     id: int
 
@@ -42,3 +56,65 @@ class TeamBoardListModel(BaseModel):
     boards: List[BoardListModel]
 
 
+class BoardsExportModel(BaseModel):
+    out_file: str
+    boards: int
+    seconds: float
+
+
+class BoardEventModel(BaseModel):
+    seq: int
+    type: str
+    board_id: Optional[int]
+    team_id: Optional[int]
+    object_id: Optional[int]
+    payload: Dict[str, Any]
+    time: Optional[datetime] = None
+
+
+class BoardChangesModel(BaseModel):
+    changes: List[BoardEventModel]
+    last_seq: int
+
+
+class ArchivedTaskModel(TaskIdModel):
+    title: str
+    description: Optional[str]
+    user_id: Optional[int]
+    status: Optional[str]
+
+
+class ArchivedBoardModel(BoardIdModel):
+    name: str
+    description: Optional[str]
+    team_id: Optional[int]
+    status: Optional[str]
+    end_time: Optional[str]
+    archive_time: Optional[str]
+    tasks: List[ArchivedTaskModel]
+
+
+class StatusTimeModel(BaseModel):
+    stays: int
+    current: int
+    mean_seconds: Optional[float]
+    p50_seconds: Optional[float]
+    p90_seconds: Optional[float]
+    p99_seconds: Optional[float]
+    max_seconds: Optional[float]
+
+
+class TimeInStatusModel(BaseModel):
+    statuses: Dict[str, StatusTimeModel]
+
+
+class DeleteTasksModel(BaseModel):
+    ids: List[int] = []
+    board_ids: List[int] = []
+    soft: bool = True
+
+
+class DeleteBoardsModel(BaseModel):
+    ids: List[int] = []
+    team_ids: List[int] = []
+    soft: bool = True
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 from pydantic import BaseModel
 from datetime import datetime
@@ -14,4 +14,9 @@ class TeamModel(BaseModel):
     name: str
     description: str
     creation_time: Optional[datetime] = None
-    admin: Optional[int] = None
\ No newline at end of file
+    admin: Optional[int] = None
+
+
+class DeletedRowsModel(BaseModel):
+    soft: bool
+    deleted: Dict[str, int]
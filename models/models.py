@@ -1,12 +1,62 @@
-from typing import List
-from pydantic_sqlalchemy import sqlalchemy_to_pydantic
+"""Pydantic models mirroring the columns of the SQLAlchemy models in database.db_models.
+Defined statically instead of being generated from the mappers at import time,
+keep them in sync when a column is added.
+"""
+from typing import List, Optional
+from datetime import datetime
 
-from database import db_models
+from pydantic import BaseModel
 
-UserBase = sqlalchemy_to_pydantic(db_models.User)
-TeamBase = sqlalchemy_to_pydantic(db_models.Team)
-TaskBase = sqlalchemy_to_pydantic(db_models.Task)
-BoardBase = sqlalchemy_to_pydantic(db_models.Board)
+
+class UserBase(BaseModel):
+    user_id: int
+    user_name: str
+    user_display_name: Optional[str] = None
+    create_time: Optional[datetime] = None
+    update_time: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class TeamBase(BaseModel):
+    team_id: int
+    team_name: str
+    description: Optional[str] = None
+    team_admin: Optional[int] = None
+    create_time: Optional[datetime] = None
+    update_time: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class TaskBase(BaseModel):
+    task_id: int
+    task_title: str
+    description: Optional[str] = None
+    board_id: Optional[int] = None
+    task_assign_id: Optional[int] = None
+    task_status: Optional[str] = None
+    create_time: Optional[datetime] = None
+    update_time: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class BoardBase(BaseModel):
+    board_id: int
+    board_name: str
+    description: Optional[str] = None
+    board_team_id: Optional[int] = None
+    board_status: Optional[str] = None
+    board_end_time: Optional[datetime] = None
+    create_time: Optional[datetime] = None
+    update_time: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
 
 
 class UserWithTeamsAndTasks(UserBase):
@@ -24,4 +74,3 @@ class BoardWithTasks(BoardBase):
 
 class TaskWithUsers(TaskBase):
     user: List[UserBase]
-
@@ -0,0 +1,39 @@
+"""Lightweight rows for internal use in service loops, built directly from
+column projected queries. Pydantic models are only used at the API boundary.
+"""
+from typing import NamedTuple, Optional
+from datetime import datetime
+
+
+class UserRow(NamedTuple):
+    user_id: int
+    user_name: str
+    user_display_name: Optional[str]
+    create_time: Optional[datetime]
+
+
+class TeamRow(NamedTuple):
+    team_id: int
+    team_name: str
+    description: Optional[str]
+    team_admin: Optional[int]
+    create_time: Optional[datetime]
+
+
+class BoardRow(NamedTuple):
+    board_id: int
+    board_name: str
+    board_status: Optional[str]
+
+
+class BoardTaskRow(NamedTuple):
+    task_id: int
+    board_id: int
+
+
+class ExportTaskRow(NamedTuple):
+    team_name: str
+    task_title: str
+    description: Optional[str]
+    user_display_name: Optional[str]
+    task_status: Optional[str]
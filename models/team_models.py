@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 from pydantic import BaseModel
 from datetime import datetime
@@ -31,3 +31,52 @@ class UpdateUserTeamModel(TeamIdModel):
 
 class TeamUsersModel(BaseModel):
     users: List[UserModel]
+
+
+class TeamIdsModel(BaseModel):
+    ids: List[int]
+
+
+class TeamMemberModel(BaseModel):
+    id: int
+    name: str
+    display_name: Optional[str]
+
+
+class TeamsUsersModel(BaseModel):
+    users: Dict[int, List[TeamMemberModel]]
+
+
+class TeamBoardStatsModel(BaseModel):
+    id: int
+    name: str
+    status: Optional[str]
+    end_time: Optional[str]
+    tasks: int
+    completed_tasks: int
+
+
+class TeamUserStatsModel(BaseModel):
+    id: int
+    name: str
+    open_tasks: int
+
+
+class TeamDailyStatsModel(BaseModel):
+    day: str
+    tasks_created: int
+    tasks_completed: int
+    avg_completion_seconds: Optional[float]
+
+
+class TeamStatsModel(BaseModel):
+    boards: List[TeamBoardStatsModel]
+    users: List[TeamUserStatsModel]
+    completed_tasks: int
+    avg_completion_seconds: Optional[float]
+    daily: Optional[List[TeamDailyStatsModel]] = None
+
+
+class DeleteTeamsModel(BaseModel):
+    ids: List[int]
+    soft: bool = True
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 from pydantic import BaseModel
 from datetime import datetime
@@ -31,3 +31,22 @@ class UpdateUserModel(UserIdModel):
 
 class UserTeamsModel(BaseModel):
     teams: List[TeamModel]
+
+
+class UserIdsModel(BaseModel):
+    ids: List[int]
+
+
+class MemberTeamModel(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+
+
+class UsersTeamsModel(BaseModel):
+    teams: Dict[int, List[MemberTeamModel]]
+
+
+class DeleteUsersModel(BaseModel):
+    ids: List[int]
+    soft: bool = True
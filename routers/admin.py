@@ -0,0 +1,171 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+
+from config import SETTINGS
+from database.database import engine, TENANT_ENGINES
+from database.backup import snapshot_database, dump_database
+from daos.graph_replica import GRAPH_REPLICA
+from services.archive_service import ArchiveService, archive_metrics
+from utils.admission_control import ADMISSION_CONTROLLER
+from utils.response_cache import RESPONSE_CACHE
+from utils.profiling import (
+    ProfiledRoute, PROFILE_STORE, CONTINUOUS_SAMPLER, ADMIN_TOKEN_HEADER, is_profiling_admin, is_admin
+)
+from connect_db import get_db
+from custom_exceptions.constraint_exception import ConstraintViolationException
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    route_class=ProfiledRoute
+)
+
+
+def admin(request: Request):
+    if not is_admin(request.headers.get(ADMIN_TOKEN_HEADER.decode())):
+        raise HTTPException(
+            status_code=403, detail="This route needs the admin token"
+        )
+
+
+@router.get("/replica/verify")
+def verify_graph_replica(db: Session = Depends(get_db)):
+    if not GRAPH_REPLICA.loaded:
+        raise HTTPException(
+            status_code=404, detail="Graph replica is not enabled"
+        )
+    mismatches = GRAPH_REPLICA.verify(db)
+    return {
+        'consistent': not any(mismatches.values()),
+        'mismatches': mismatches
+    }
+
+
+@router.get("/replica/memory")
+def graph_replica_memory():
+    if not GRAPH_REPLICA.loaded:
+        raise HTTPException(
+            status_code=404, detail="Graph replica is not enabled"
+        )
+    return GRAPH_REPLICA.memory_report()
+
+
+@router.post("/archive/run")
+def run_archive(days: int = Query(..., ge=0), db: Session = Depends(get_db)):
+    try:
+        return json.loads(
+            ArchiveService(db).archive_closed_boards(json.dumps({'days': days}))
+        )
+    except ConstraintViolationException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+
+@router.get("/archive/metrics")
+def get_archive_metrics():
+    return archive_metrics()
+
+
+@router.get("/admission/metrics")
+def get_admission_metrics():
+    return ADMISSION_CONTROLLER.metrics()
+
+
+@router.get("/response-cache/metrics")
+def get_response_cache_metrics():
+    return RESPONSE_CACHE.report()
+
+
+@router.get("/tenants", dependencies=[Depends(admin)])
+def list_tenants(counts: bool = False):
+    if not SETTINGS.tenant_routing_enabled:
+        raise HTTPException(
+            status_code=404, detail="Tenant routing is not enabled"
+        )
+    return {
+        'engines': TENANT_ENGINES.report(),
+        'tenants': TENANT_ENGINES.list_tenants(counts)
+    }
+
+
+@router.post("/tenants/{tenant_id}", status_code=201, dependencies=[Depends(admin)])
+def create_tenant(tenant_id: str):
+    if not SETTINGS.tenant_routing_enabled:
+        raise HTTPException(
+            status_code=404, detail="Tenant routing is not enabled"
+        )
+    try:
+        TENANT_ENGINES.create(tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {'tenant_id': tenant_id}
+
+
+def profiling_admin(request: Request):
+    if not SETTINGS.profiling_enabled:
+        raise HTTPException(
+            status_code=404, detail="Profiling is not enabled"
+        )
+    if not is_profiling_admin(request.headers.get(ADMIN_TOKEN_HEADER.decode())):
+        raise HTTPException(
+            status_code=403, detail="Profiles need the admin token"
+        )
+
+
+@router.get("/profiles", dependencies=[Depends(profiling_admin)])
+def list_profiles():
+    return {'profiles': PROFILE_STORE.summaries()}
+
+
+@router.get("/profiles/hot-stacks", dependencies=[Depends(profiling_admin)])
+def get_hot_stacks(limit: int = Query(20, ge=1, le=1000)):
+    if not SETTINGS.profiling_continuous:
+        raise HTTPException(
+            status_code=404, detail="Continuous profiling is not enabled"
+        )
+    return CONTINUOUS_SAMPLER.hot_stacks(limit)
+
+
+@router.post("/profiles/hot-stacks/reset", dependencies=[Depends(profiling_admin)])
+def reset_hot_stacks():
+    CONTINUOUS_SAMPLER.reset()
+    return {'reset': True}
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(profiling_admin)])
+def get_profile(profile_id: int):
+    profile = PROFILE_STORE.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=404, detail="Profile not found"
+        )
+    return profile.report()
+
+
+@router.post("/snapshot", dependencies=[Depends(admin)])
+def create_snapshot():
+    try:
+        return snapshot_database(
+            engine, _backup_path("snapshot", ".db"), SETTINGS.backup_pages_per_step, SETTINGS.backup_step_sleep_ms
+        )
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/dump", dependencies=[Depends(admin)])
+def create_dump():
+    try:
+        return dump_database(engine, _backup_path("dump", ".ndjson.gz"))
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+def _backup_path(kind: str, suffix: str) -> str:
+    # microseconds, backups asked for within the same second get their own file
+    return str(Path(SETTINGS.backup_dir) / f"{kind}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}{suffix}")
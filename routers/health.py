@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.database import engine
+from database.schema_upgrade import SCHEMA_VERSION, schema_version
+from utils.warm_up import READINESS
+from utils.profiling import ProfiledRoute
+
+
+router = APIRouter(
+    tags=["health"],
+    route_class=ProfiledRoute
+)
+
+
+@router.get("/healthz")
+def healthz():
+    """liveness, the worker answers and reaches its database"""
+    try:
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+    except SQLAlchemyError as e:
+        return JSONResponse({'status': 'unavailable', 'database': str(e.orig or e)}, status_code=503)
+    return {'status': 'ok'}
+
+
+@router.get("/readyz")
+def readyz():
+    """readiness, the worker is warmed up and its database has the schema of this code"""
+    status = {
+        'warmed_up': READINESS.warmed_up,
+        'expected_schema_version': SCHEMA_VERSION,
+        'warm_up_ms': READINESS.timings
+    }
+    try:
+        with engine.connect() as connection:
+            status['schema_version'] = schema_version(connection)
+    except SQLAlchemyError as e:
+        status['database'] = str(e.orig or e)
+        status['schema_version'] = None
+
+    ready = READINESS.warmed_up and status['schema_version'] == SCHEMA_VERSION
+    return JSONResponse({'status': 'ready' if ready else 'not ready', **status}, status_code=200 if ready else 503)
@@ -0,0 +1,49 @@
+import json
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from config import SETTINGS
+from services.import_service import ImportService
+from connect_db import get_db
+from utils.profiling import ProfiledRoute
+
+
+router = APIRouter(
+    prefix="/import",
+    tags=["import"],
+    route_class=ProfiledRoute
+)
+
+
+@router.post("")
+async def import_boards_and_tasks(
+        request: Request,
+        format: str = Query("csv", regex="^(csv|ndjson)$"),
+        import_id: Optional[str] = Query(None, regex="^[A-Za-z0-9_-]+$"),
+        db: Session = Depends(get_db)
+):
+    """imports the raw CSV or NDJSON request body, posting the same file again with the
+    import_id of a failed import resumes it after its last committed chunk
+    """
+    import_id = import_id or uuid.uuid4().hex
+    import_dir = Path(SETTINGS.import_dir)
+    import_dir.mkdir(parents=True, exist_ok=True)
+    upload_path = import_dir / f"{import_id}.{format}"
+    with open(upload_path, 'wb') as upload:
+        async for body_chunk in request.stream():
+            upload.write(body_chunk)
+
+    import_summary = json.loads(await run_in_threadpool(
+        ImportService(db).import_file,
+        json.dumps({'path': str(upload_path), 'format': format, 'import_id': import_id})
+    ))
+    upload_path.unlink()
+    return {
+        'import_id': import_id,
+        **import_summary
+    }
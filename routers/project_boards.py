@@ -1,17 +1,33 @@
+import asyncio
 import json
+from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from services.board_task_service import BoardTaskService
-from custom_exceptions.constraint_exception import NoDataException, ConstraintViolationException
-from models import board_models
+from services.archive_service import ArchiveService
+from services.status_history_service import StatusHistoryService
+from services.board_export_service import BoardExportService
+from services.delete_service import DeleteService
+from custom_exceptions.constraint_exception import (
+    NoDataException,
+    ConstraintViolationException,
+    ConstraintException
+)
+from models import board_models, common_models
 from connect_db import get_db
+from utils.response_cache import cached_response, encode_response
+from utils.event_broker import EVENT_BROKER, Subscription, team_topic, board_topic
+from constants.event_constants import BoardEventConstraints as e_c
+from utils.profiling import ProfiledRoute
 
 
 router = APIRouter(
     prefix="/board",
-    tags=["boards"]
+    tags=["boards"],
+    route_class=ProfiledRoute
 )
 
 
@@ -20,6 +36,16 @@ def create_board(board_model: board_models.BoardModel, db: Session = Depends(get
     return json.loads(BoardTaskService(db).create_board(board_model.json()))
 
 
+@router.post("/with-tasks", response_model=board_models.BoardWithTaskIdsModel)
+def create_board_with_tasks(board_model: board_models.BoardWithTasksModel, db: Session = Depends(get_db)):
+    try:
+        return json.loads(BoardTaskService(db).create_board_with_tasks(board_model.json()))
+    except ConstraintException as e:
+        raise HTTPException(
+            status_code=400, detail=e.message
+        )
+
+
 @router.post("/task", response_model=board_models.TaskIdModel)
 def create_and_add_task(task_model: board_models.TaskModel, db: Session = Depends(get_db)):
     return json.loads(
@@ -43,15 +69,64 @@ def update_task_status(task_update_model: board_models.UpdateTaskModel, db: Sess
         )
 
 
+@router.delete("/task/{task_id}", response_model=common_models.DeletedRowsModel)
+def delete_task(task_id: int, soft: bool = True, db: Session = Depends(get_db)):
+    deleted_rows = json.loads(DeleteService(db).delete_tasks(json.dumps({'ids': [task_id], 'soft': soft})))
+    if not deleted_rows['deleted']['tasks'] + deleted_rows['deleted'].get('archived_tasks', 0):
+        raise HTTPException(
+            status_code=404, detail="Task Not found"
+        )
+    return deleted_rows
+
+
+@router.post("/tasks/delete", response_model=common_models.DeletedRowsModel)
+def delete_tasks(delete_model: board_models.DeleteTasksModel, db: Session = Depends(get_db)):
+    try:
+        return json.loads(DeleteService(db).delete_tasks(delete_model.json()))
+    except ConstraintException as e:
+        raise HTTPException(
+            status_code=400, detail=e.message
+        )
+
+
+@router.get("s/export", response_model=board_models.BoardsExportModel)
+def export_boards(team_id: Optional[int] = None, workers: Optional[int] = None, db: Session = Depends(get_db)):
+    try:
+        return json.loads(
+            BoardExportService(db).export_boards(json.dumps({'team_id': team_id, 'workers': workers}))
+        )
+    except NoDataException:
+        raise HTTPException(
+            status_code=404, detail="Team Not found"
+        )
+
+
+@router.get("s/export/progress")
+def get_boards_export_progress(db: Session = Depends(get_db)):
+    return json.loads(BoardExportService(db).export_progress())
+
+
+@router.post("s/delete", response_model=common_models.DeletedRowsModel)
+def delete_boards(delete_model: board_models.DeleteBoardsModel, db: Session = Depends(get_db)):
+    try:
+        return json.loads(DeleteService(db).delete_boards(delete_model.json()))
+    except ConstraintException as e:
+        raise HTTPException(
+            status_code=400, detail=e.message
+        )
+
+
 @router.get("s/{team_id}", response_model=board_models.TeamBoardListModel)
 def get_team_boards(team_id: int, db: Session = Depends(get_db)):
-    board_list = json.loads(
-        BoardTaskService(db).list_boards(json.dumps({'id': team_id}))
-    )
+    def build():
+        board_list = json.loads(
+            BoardTaskService(db).list_boards(json.dumps({'id': team_id}))
+        )
+        return encode_response(board_models.TeamBoardListModel, {
+            'boards': board_list
+        })
 
-    return {
-        'boards': board_list
-    }
+    return cached_response(db, ("boards", team_id), ("boards", "tasks"), build)
 
 
 @router.get("/close/{board_id}")
@@ -74,6 +149,16 @@ def close_board(board_id: int, db: Session = Depends(get_db)):
         )
 
 
+@router.delete("/{board_id}", response_model=common_models.DeletedRowsModel)
+def delete_board(board_id: int, soft: bool = True, db: Session = Depends(get_db)):
+    deleted_rows = json.loads(DeleteService(db).delete_boards(json.dumps({'ids': [board_id], 'soft': soft})))
+    if not deleted_rows['deleted']['boards'] + deleted_rows['deleted'].get('archived_boards', 0):
+        raise HTTPException(
+            status_code=404, detail="Board Not found"
+        )
+    return deleted_rows
+
+
 @router.get("/export")
 def export_board(board_id: int, db: Session = Depends(get_db)):
     try:
@@ -87,4 +172,96 @@ def export_board(board_id: int, db: Session = Depends(get_db)):
     except Exception:
         raise HTTPException(
             status_code=500, detail="Some server error"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/archive/{board_id}", response_model=board_models.ArchivedBoardModel)
+def get_archived_board(board_id: int, db: Session = Depends(get_db)):
+    try:
+        return json.loads(
+            ArchiveService(db).describe_archived_board(json.dumps({'id': board_id}))
+        )
+    except NoDataException:
+        raise HTTPException(
+            status_code=404, detail="Archived board Not found"
+        )
+
+
+@router.get("/{board_id}/status-times", response_model=board_models.TimeInStatusModel)
+def get_board_status_times(board_id: int, db: Session = Depends(get_db)):
+    return {
+        'statuses': json.loads(
+            StatusHistoryService(db).get_time_in_status(json.dumps({'board_id': board_id}))
+        )
+    }
+
+
+@router.get("/status-history/export")
+def export_status_history(board_id: Optional[int] = None, team_id: Optional[int] = None, db: Session = Depends(get_db)):
+    try:
+        csv_chunks = StatusHistoryService(db).dump_transitions_csv(
+            json.dumps({'board_id': board_id, 'team_id': team_id})
+        )
+    except NoDataException:
+        raise HTTPException(
+            status_code=404, detail="Team Not found"
+        )
+    return StreamingResponse(
+        csv_chunks,
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=task_status_history.csv"}
+    )
+
+
+@router.get("/{board_id}/changes", response_model=board_models.BoardChangesModel)
+def get_board_changes(board_id: int, since: int = 0, limit: Optional[int] = None, db: Session = Depends(get_db)):
+    try:
+        return json.loads(
+            BoardTaskService(db).list_board_changes(
+                json.dumps(
+                    {'id': board_id, 'since': since, 'limit': limit}
+                )
+            )
+        )
+    except NoDataException:
+        raise HTTPException(
+            status_code=404, detail="Board Not found"
+        )
+
+
+
+async def _board_event_stream(request: Request, subscription: Subscription):
+    try:
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=e_c.keep_alive_seconds.value)
+            except asyncio.TimeoutError:
+                # comment line keeps proxies from closing idle connections
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        EVENT_BROKER.unsubscribe(subscription)
+
+
+@router.get("/subscribe")
+async def subscribe_board_updates(
+        request: Request,
+        team_id: Optional[List[int]] = Query(None),
+        board_id: Optional[List[int]] = Query(None),
+        db: Session = Depends(get_db)
+):
+    # the session is not queried, it resolves the tenant whose events are streamed
+    tenant_id = db.info.get('tenant_id')
+    topics = [team_topic(_id, tenant_id) for _id in team_id or []] + \
+        [board_topic(_id, tenant_id) for _id in board_id or []]
+    if not topics:
+        raise HTTPException(
+            status_code=400, detail="team_id or board_id is required"
+        )
+
+    return StreamingResponse(
+        _board_event_stream(request, EVENT_BROKER.subscribe(topics)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
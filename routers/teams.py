@@ -4,14 +4,19 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from services.team_service import TeamService
-from custom_exceptions.constraint_exception import NoDataException
-from models import team_models
+from services.team_stats_service import TeamStatsService
+from services.status_history_service import StatusHistoryService
+from services.delete_service import DeleteService
+from custom_exceptions.constraint_exception import NoDataException, LimitOverflowException, ConstraintException
+from models import team_models, board_models, common_models
 from connect_db import get_db
+from utils.profiling import ProfiledRoute
 
 
 router = APIRouter(
     prefix="/team",
-    tags=["teams"]
+    tags=["teams"],
+    route_class=ProfiledRoute
 )
 
 
@@ -23,6 +28,26 @@ def get_team(team_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Team not found")
 
 
+@router.get("/{team_id}/stats", response_model=team_models.TeamStatsModel)
+def get_team_stats(team_id: int, daily: bool = False, db: Session = Depends(get_db)):
+    try:
+        return json.loads(TeamStatsService(db).get_team_stats(json.dumps({'id': team_id, 'daily': daily})))
+    except NoDataException:
+        raise HTTPException(status_code=404, detail="Team not found")
+
+
+@router.get("/{team_id}/status-times", response_model=board_models.TimeInStatusModel)
+def get_team_status_times(team_id: int, db: Session = Depends(get_db)):
+    try:
+        return {
+            'statuses': json.loads(
+                StatusHistoryService(db).get_time_in_status(json.dumps({'team_id': team_id}))
+            )
+        }
+    except NoDataException:
+        raise HTTPException(status_code=404, detail="Team not found")
+
+
 @router.post("", response_model=team_models.TeamIdModel)
 def create_team(team_model: team_models.TeamModel, db: Session = Depends(get_db)):
     return json.loads(TeamService(db).create_team(team_model.json()))
@@ -58,6 +83,10 @@ def add_users_to_team(team_user_model: team_models.UpdateUserTeamModel, db: Sess
         raise HTTPException(
             status_code=404, detail="Cannot find given Team"
         )
+    except LimitOverflowException as e:
+        raise HTTPException(
+            status_code=403, detail=e.message
+        )
 
 
 @router.post("/remove_users")
@@ -85,3 +114,32 @@ def get_team_users(team_id: int, db: Session = Depends(get_db)):
         raise HTTPException(
             status_code=404, detail="Cannot find given Team"
         )
+
+
+@router.post("s/users:batch", response_model=team_models.TeamsUsersModel)
+def get_teams_users(team_ids_model: team_models.TeamIdsModel, db: Session = Depends(get_db)):
+    try:
+        teams_users = json.loads(TeamService(db).list_teams_users(team_ids_model.json()))
+    except LimitOverflowException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    return {
+        "users": teams_users
+    }
+
+
+@router.delete("/{team_id}", response_model=common_models.DeletedRowsModel)
+def delete_team(team_id: int, soft: bool = True, db: Session = Depends(get_db)):
+    deleted_rows = json.loads(DeleteService(db).delete_teams(json.dumps({'ids': [team_id], 'soft': soft})))
+    if not deleted_rows['deleted']['teams']:
+        raise HTTPException(
+            status_code=404, detail="Cannot find given Team"
+        )
+    return deleted_rows
+
+
+@router.post("s/delete", response_model=common_models.DeletedRowsModel)
+def delete_teams(delete_model: team_models.DeleteTeamsModel, db: Session = Depends(get_db)):
+    try:
+        return json.loads(DeleteService(db).delete_teams(delete_model.json()))
+    except ConstraintException as e:
+        raise HTTPException(status_code=400, detail=e.message)
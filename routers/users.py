@@ -4,14 +4,18 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from services.user_service import UserService
-from custom_exceptions.constraint_exception import NoDataException
-from models import user_models
+from services.delete_service import DeleteService
+from custom_exceptions.constraint_exception import NoDataException, LimitOverflowException, ConstraintException
+from models import user_models, common_models
 from connect_db import get_db
+from utils.response_cache import cached_response, encode_response
+from utils.profiling import ProfiledRoute
 
 
 router = APIRouter(
     prefix="/user",
-    tags=["users"]
+    tags=["users"],
+    route_class=ProfiledRoute
 )
 
 
@@ -30,10 +34,13 @@ def create_user(user_model: user_models.UserModel, db: Session = Depends(get_db)
 
 @router.get("s", response_model=user_models.UsersListModel)
 def get_users(db: Session = Depends(get_db)):
-    users_list = json.loads(UserService(db).list_users())
-    return {
-        'users': users_list
-    }
+    def build():
+        users_list = json.loads(UserService(db).list_users())
+        return encode_response(user_models.UsersListModel, {
+            'users': users_list
+        })
+
+    return cached_response(db, ("users",), ("users",), build)
 
 
 @router.get("/teams/{user_id}", response_model=user_models.UserTeamsModel)
@@ -62,3 +69,30 @@ def update_user(user_update_model: user_models.UpdateUserModel, db: Session = De
         raise HTTPException(
             status_code=403, detail="cannot update user"
         )
+
+
+@router.post("s/teams:batch", response_model=user_models.UsersTeamsModel)
+def get_users_teams(user_ids_model: user_models.UserIdsModel, db: Session = Depends(get_db)):
+    try:
+        users_teams = json.loads(UserService(db).get_users_teams(user_ids_model.json()))
+    except LimitOverflowException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    return {
+        "teams": users_teams
+    }
+
+
+@router.delete("/{user_id}", response_model=common_models.DeletedRowsModel)
+def delete_user(user_id: int, soft: bool = True, db: Session = Depends(get_db)):
+    deleted_rows = json.loads(DeleteService(db).delete_users(json.dumps({'ids': [user_id], 'soft': soft})))
+    if not deleted_rows['deleted']['users']:
+        raise HTTPException(status_code=404, detail="User not found")
+    return deleted_rows
+
+
+@router.post("s/delete", response_model=common_models.DeletedRowsModel)
+def delete_users(delete_model: user_models.DeleteUsersModel, db: Session = Depends(get_db)):
+    try:
+        return json.loads(DeleteService(db).delete_users(delete_model.json()))
+    except ConstraintException as e:
+        raise HTTPException(status_code=400, detail=e.message)
@@ -0,0 +1,222 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+
+from sqlalchemy import insert, delete, select, func
+from sqlalchemy.orm import Session
+
+from config import SETTINGS
+from database import db_models as db_model
+from database.database import session
+from database.schema_upgrade import AUTOINCREMENT_TABLES, has_autoincrement
+from daos.common_dao import CommonDao
+from daos.graph_replica import GRAPH_REPLICA
+from logger import LOGGER
+from custom_exceptions.constraint_exception import NoDataException, ConstraintViolationException
+
+
+ARCHIVE_METRICS: Dict[str, Any] = {
+    'runs': 0,
+    'boards_moved': 0,
+    'tasks_moved': 0,
+    'last_run': None
+}
+_ARCHIVE_METRICS_LOCK = threading.Lock()
+
+
+class ArchiveService:
+    """Moves long closed boards and their tasks out of the hot boards/tasks tables
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.common_dao = CommonDao(self.db)
+
+    def archive_closed_boards(self, request: str) -> str:
+        """
+        :param request: A json string with the archive age
+        {
+            "days" : "<archive boards closed at least this many days ago>"
+        }
+        :return: A json string with the rows moved and the hot table sizes before and after
+        """
+        # deserialize json
+        archive_details = json.loads(request)
+        for table_name, _ in AUTOINCREMENT_TABLES:
+            if not has_autoincrement(self.db.connection(), table_name):
+                # new rows would take the ids of archived ones
+                raise ConstraintViolationException(
+                    message=f"Table {table_name} reuses ids, upgrade the schema before archiving"
+                )
+        cutoff = datetime.now() - timedelta(days=archive_details['days'])
+
+        hot_sizes_before = self._hot_table_sizes()
+        board_ids = [
+            board_id for board_id, in self.db.query(db_model.Board.board_id).filter(
+                db_model.Board.board_status == 'CLOSED'
+            ).filter(
+                db_model.Board.board_end_time <= cutoff
+            ).order_by(db_model.Board.board_id)
+        ]
+
+        boards_moved = 0
+        tasks_moved = 0
+        for start in range(0, len(board_ids), SETTINGS.archive_batch_size):
+            batch_ids = board_ids[start:start + SETTINGS.archive_batch_size]
+            with self.common_dao.unit_of_work():
+                boards_moved += self._move_rows(
+                    db_model.Board, db_model.ArchivedBoard, db_model.Board.board_id.in_(batch_ids)
+                )
+                self._delete_soft_deleted_history(batch_ids)
+                tasks_moved += self._move_rows(
+                    db_model.Task, db_model.ArchivedTask, db_model.Task.board_id.in_(batch_ids)
+                )
+                self.common_dao.on_commit(lambda ids=batch_ids: GRAPH_REPLICA.remove_boards(ids))
+            LOGGER.info(f"Archived {len(batch_ids)} boards")
+
+        hot_sizes_after = self._hot_table_sizes()
+        run_metrics = {
+            'boards_moved': boards_moved,
+            'tasks_moved': tasks_moved,
+            'hot_boards_before': hot_sizes_before['boards'],
+            'hot_boards_after': hot_sizes_after['boards'],
+            'hot_tasks_before': hot_sizes_before['tasks'],
+            'hot_tasks_after': hot_sizes_after['tasks'],
+            'run_time': str(datetime.now())
+        }
+        with _ARCHIVE_METRICS_LOCK:
+            ARCHIVE_METRICS['runs'] += 1
+            ARCHIVE_METRICS['boards_moved'] += boards_moved
+            ARCHIVE_METRICS['tasks_moved'] += tasks_moved
+            ARCHIVE_METRICS['last_run'] = run_metrics
+
+        LOGGER.info(f"Archive run moved {boards_moved} boards and {tasks_moved} tasks")
+        return json.dumps(run_metrics)
+
+    def describe_archived_board(self, request: str) -> str:
+        """
+        :param request: A json string with the board id
+        {
+            "id" : "<board_id>"
+        }
+        :return: A json string with the archived board and its tasks
+        """
+        # deserialize json
+        board_details = json.loads(request)
+
+        board_model = self.common_dao.get_object(
+            object_type=db_model.ArchivedBoard,
+            filter_condition=db_model.ArchivedBoard.board_id == board_details['id']
+        )
+        if board_model is None:
+            raise NoDataException
+
+        return json.dumps(
+            {
+                'id': board_model.board_id,
+                'name': board_model.board_name,
+                'description': board_model.description,
+                'team_id': board_model.board_team_id,
+                'status': board_model.board_status,
+                'end_time': str(board_model.board_end_time),
+                'archive_time': str(board_model.archive_time),
+                'tasks': [
+                    {
+                        'id': task.task_id,
+                        'title': task.task_title,
+                        'description': task.description,
+                        'user_id': task.task_assign_id,
+                        'status': task.task_status
+                    }
+                    for task in board_model.tasks
+                ]
+            }
+        )
+
+    def _move_rows(self, hot_type, archive_type, filter_condition) -> int:
+        """copies the matching live rows into the archive table and deletes all matching rows from the hot table,
+        soft deleted ones included, one set based statement each
+        """
+        hot_table = hot_type.__table__
+        archive_table = archive_type.__table__
+        column_keys = [column.key for column in hot_table.columns if column.key in archive_table.columns]
+        moved = self.db.execute(
+            insert(archive_table).from_select(
+                column_keys,
+                select(*[hot_table.c[key] for key in column_keys]).where(filter_condition).where(
+                    hot_table.c.deleted_at.is_(None)
+                )
+            )
+        )
+        self.db.execute(delete(hot_table).where(filter_condition))
+        return moved.rowcount
+
+    def _delete_soft_deleted_history(self, board_ids: List[int]):
+        """soft deleted tasks are dropped instead of archived, their status history goes with them"""
+        task_table = db_model.Task.__table__
+        self.db.execute(
+            delete(db_model.TaskStatusTransition.__table__).where(
+                db_model.TaskStatusTransition.task_id.in_(
+                    select(task_table.c.task_id).where(
+                        task_table.c.board_id.in_(board_ids)
+                    ).where(
+                        task_table.c.deleted_at.isnot(None)
+                    )
+                )
+            )
+        )
+
+    def _hot_table_sizes(self) -> Dict[str, int]:
+        return {
+            'boards': self.db.query(func.count(db_model.Board.board_id)).scalar(),
+            'tasks': self.db.query(func.count(db_model.Task.task_id)).scalar()
+        }
+
+
+class ArchiveJob:
+    """Background thread archiving boards closed for SETTINGS.archive_after_days
+    """
+
+    def __init__(self, interval_seconds: int, days: int):
+        self.interval_seconds = interval_seconds
+        self.days = days
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="archive-job", daemon=True)
+        self._thread.start()
+        LOGGER.info(f"Started archive job for boards closed for {self.days} days")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            db = session()
+            try:
+                ArchiveService(db).archive_closed_boards(json.dumps({'days': self.days}))
+            except Exception as e:
+                # another worker may be archiving the same boards, retried on the next run
+                LOGGER.error(f"Archive run failed: {e}")
+            finally:
+                db.close()
+
+
+def archive_metrics() -> Dict[str, Any]:
+    with _ARCHIVE_METRICS_LOCK:
+        return dict(ARCHIVE_METRICS)
+
+
+def start_archive_job() -> List[ArchiveJob]:
+    """starts the archive job when enabled in settings
+    :return: started jobs, to be stopped on shutdown
+    """
+    if SETTINGS.archive_after_days <= 0:
+        return []
+    archive_job = ArchiveJob(SETTINGS.archive_interval_seconds, SETTINGS.archive_after_days)
+    archive_job.start()
+    return [archive_job]
@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+from itertools import groupby
+from typing import Dict, Any, Iterator, Optional
+
+from sqlalchemy import and_, select, union_all, func
+from sqlalchemy.orm import Session
+
+from config import SETTINGS
+from database import db_models as db_model
+from daos.common_dao import CommonDao
+from logger import LOGGER
+from utils import export_board
+from custom_exceptions.constraint_exception import NoDataException
+
+
+EXPORT_PROGRESS: Dict[str, Dict[str, Any]] = {}
+_EXPORT_PROGRESS_LOCK = threading.Lock()
+# log progress every this many boards
+PROGRESS_LOG_EVERY = 500
+
+
+class BoardExportService:
+    """Exports every board of a team, or of all teams, into one zip archive
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.common_dao = CommonDao(self.db)
+
+    def export_boards(self, request: str) -> str:
+        """
+        :param request: A json string with the optional team identifier, all teams without one
+        {
+          "team_id" : "<team_id>",
+          "workers" : "<render processes, defaults to SETTINGS.export_workers>"
+        }
+        :return: A json string with the archive file
+        {
+          "out_file" : "<zip file name>",
+          "boards" : "<boards exported>",
+          "seconds" : "<export duration>"
+        }
+        """
+        # deserialize json
+        export_details = json.loads(request)
+        team_id = export_details.get('team_id')
+
+        if team_id is not None:
+            team_model = self.common_dao.get_object(
+                object_type=db_model.Team,
+                filter_condition=db_model.Team.team_id == team_id
+            )
+            if team_model is None:
+                raise NoDataException
+
+        export_name = f"team_{team_id}" if team_id is not None else "all_boards"
+        tenant_id = self.db.info.get('tenant_id')
+        if tenant_id is not None:
+            # team ids repeat across tenants, so do the progress entries and archive names without the tenant
+            export_name = f"{tenant_id}_{export_name}"
+        total = self._count_boards(team_id)
+        workers = export_details.get('workers') or SETTINGS.export_workers or os.cpu_count()
+        # starting a worker costs more than rendering a few batches, small exports use fewer workers
+        workers = max(1, min(workers, -(-total // export_board.RENDER_BATCH_SIZE)))
+
+        start_time = time.perf_counter()
+        with _EXPORT_PROGRESS_LOCK:
+            EXPORT_PROGRESS[export_name] = {
+                'tenant_id': tenant_id, 'total': total, 'exported': 0, 'finished': False, 'out_file': None
+            }
+
+        def progress(exported: int):
+            with _EXPORT_PROGRESS_LOCK:
+                EXPORT_PROGRESS[export_name]['exported'] = exported
+            if exported % PROGRESS_LOG_EVERY == 0:
+                LOGGER.info(f"Export {export_name}: {exported}/{total} boards")
+
+        file_name = export_board.export_project_boards_archive(
+            self._boards_task_details(team_id),
+            archive_prefix=export_name,
+            workers=workers,
+            progress=progress
+        )
+        seconds = time.perf_counter() - start_time
+        with _EXPORT_PROGRESS_LOCK:
+            EXPORT_PROGRESS[export_name].update({'finished': True, 'out_file': file_name})
+
+        exported = EXPORT_PROGRESS[export_name]['exported']
+        LOGGER.info(
+            f"Export {export_name}: {exported} boards in {seconds:.2f}s "
+            f"({exported / seconds if seconds else 0:.1f} boards/s, {workers} workers)"
+        )
+        return json.dumps(
+            {
+                'out_file': file_name,
+                'boards': exported,
+                'seconds': seconds
+            }
+        )
+
+    def export_progress(self) -> str:
+        """
+        :return: A json string with the progress of the running and finished exports of the session tenant
+        """
+        tenant_id = self.db.info.get('tenant_id')
+        with _EXPORT_PROGRESS_LOCK:
+            return json.dumps(
+                {
+                    export_name: progress for export_name, progress in EXPORT_PROGRESS.items()
+                    if progress['tenant_id'] == tenant_id
+                }
+            )
+
+    def _count_boards(self, team_id: Optional[int]) -> int:
+        total = 0
+        for board_type in (db_model.Board, db_model.ArchivedBoard):
+            query = self.db.query(func.count(board_type.board_id))
+            if team_id is not None:
+                query = query.filter(board_type.board_team_id == team_id)
+            total += query.scalar()
+        return total
+
+    def _boards_task_details(self, team_id: Optional[int]) -> Iterator[Dict[str, Any]]:
+        """board details in the shape of export_board.render_project_board, read with one streamed query
+        over the live and the archived boards
+        """
+        selects = []
+        for board_type, task_type in (
+                (db_model.Board, db_model.Task),
+                (db_model.ArchivedBoard, db_model.ArchivedTask)
+        ):
+            # soft deleted rows are filtered here, loader criteria do not reach into the selects of a union
+            task_conditions = [task_type.task_assign_id.isnot(None)]
+            if task_type is db_model.Task:
+                task_conditions.append(task_type.deleted_at.is_(None))
+            statement = select(
+                board_type.board_id.label('board_id'),
+                board_type.board_name,
+                board_type.description.label('board_description'),
+                board_type.board_status,
+                db_model.Team.team_name,
+                task_type.task_id.label('task_id'),
+                task_type.task_title,
+                task_type.description.label('task_description'),
+                db_model.User.user_display_name,
+                task_type.task_status
+            ).join(
+                db_model.Team, and_(db_model.Team.team_id == board_type.board_team_id, db_model.Team.deleted_at.is_(None))
+            ).outerjoin(
+                # like the single board export, only tasks assigned to a user
+                task_type, and_(task_type.board_id == board_type.board_id, *task_conditions)
+            ).outerjoin(
+                db_model.User, and_(db_model.User.user_id == task_type.task_assign_id, db_model.User.deleted_at.is_(None))
+            )
+            if board_type is db_model.Board:
+                statement = statement.where(board_type.deleted_at.is_(None))
+            if team_id is not None:
+                statement = statement.where(board_type.board_team_id == team_id)
+            selects.append(statement)
+
+        rows = self.db.execute(
+            union_all(*selects).order_by('board_id', 'task_id').execution_options(stream_results=True)
+        )
+        for board_id, board_rows in groupby(rows, key=lambda row: row.board_id):
+            board_rows = list(board_rows)
+            yield {
+                'board_id': board_id,
+                'board_name': board_rows[0].board_name,
+                'board_description': board_rows[0].board_description,
+                'board_status': board_rows[0].board_status,
+                'team_name': board_rows[0].team_name,
+                'task_details': [
+                    {
+                        "task_title": row.task_title,
+                        "task_description": row.task_description,
+                        "user_display_name": row.user_display_name,
+                        "task_status": row.task_status
+                    }
+                    for row in board_rows if row.task_id is not None
+                ]
+            }
@@ -1,15 +1,22 @@
 import json
+from collections import defaultdict
 from datetime import datetime
 from sqlalchemy.orm import Session
 
+from config import SETTINGS
+
 from database import db_models as db_model
 from models import models as pydantic_models
+from models.row_models import BoardRow, BoardTaskRow, ExportTaskRow
 from project_board_base import ProjectBoardBase
 from daos.common_dao import CommonDao
+from daos.graph_replica import GRAPH_REPLICA
 from logger import LOGGER
 from constants.constraint_constants import BoardAndTaskConstraints as b_c
 from utils import constraint_checks as c_c
 from utils import export_board
+from services.event_service import EventService
+from constants.event_constants import BoardEventTypes
 from custom_exceptions.constraint_exception import (
     LimitOverflowException,
     ObjectAlreadyPresentException,
@@ -23,6 +30,7 @@ class BoardTaskService(ProjectBoardBase):
     def __init__(self, db: Session):
         self.db = db
         self.common_dao = CommonDao(self.db)
+        self.event_service = EventService(self.db)
 
     def create_board(self, request: str) -> str:
         # deserialize json
@@ -57,9 +65,10 @@ class BoardTaskService(ProjectBoardBase):
 
             board_model = self.common_dao.create_object(board_obj)
             LOGGER.info(f"board with board_name: {board_details['name']} created")
+            self.common_dao.on_commit(lambda: GRAPH_REPLICA.put_board(board_model))
 
             # convert from sqlalchemy to pydantic model
-            pydantic_board_model = pydantic_models.BoardWithTasks.from_orm(board_model)
+            pydantic_board_model = pydantic_models.BoardBase.from_orm(board_model)
             return json.dumps(
                 {
                     'id': pydantic_board_model.board_id
@@ -98,8 +107,22 @@ class BoardTaskService(ProjectBoardBase):
                 )
                 raise LimitOverflowException(message="description greater than allowed length")
 
-            task_model = self.common_dao.create_object(task_obj)
-            LOGGER.info(f"Task with title: {task_details['title']} created")
+            # the task and its event are committed together
+            with self.common_dao.unit_of_work():
+                task_model = self.common_dao.create_object(task_obj)
+                LOGGER.info(f"Task with title: {task_details['title']} created")
+                self.common_dao.on_commit(lambda: GRAPH_REPLICA.add_task(task_model.board_id, task_model.task_id))
+
+                self.event_service.record_event(
+                    event_type=BoardEventTypes.task_added,
+                    board_id=task_model.board_id,
+                    object_id=task_model.task_id,
+                    payload={
+                        'title': task_model.task_title,
+                        'user_id': task_model.task_assign_id,
+                        'status': task_model.task_status
+                    }
+                )
 
             # convert from sqlalchemy to pydantic model
             pydantic_task_model = pydantic_models.TaskBase.from_orm(task_model)
@@ -113,19 +136,35 @@ class BoardTaskService(ProjectBoardBase):
         # deserialize json
         board_details = json.loads(request)
 
+        if GRAPH_REPLICA.loaded:
+            return json.dumps(GRAPH_REPLICA.list_boards(board_details['id']))
+
         # fetch boards list
-        board_models = self.db.query(db_model.Board).\
-            filter(db_model.Board.board_team_id == board_details['id']).all()
+        board_rows = self.common_dao.get_rows(
+            row_type=BoardRow,
+            object_type=db_model.Board,
+            filter_condition=db_model.Board.board_team_id == board_details['id']
+        )
+
+        # fetch task ids of all the boards in one query
+        board_task_ids = defaultdict(list)
+        if board_rows:
+            task_rows = self.common_dao.get_rows(
+                row_type=BoardTaskRow,
+                object_type=db_model.Task,
+                filter_condition=db_model.Task.board_id.in_([board_row.board_id for board_row in board_rows])
+            )
+            for task_row in task_rows:
+                board_task_ids[task_row.board_id].append(task_row.task_id)
 
         board_list = []
-        for board in board_models:
-            pydantic_board_model = pydantic_models.BoardWithTasks.from_orm(board)
+        for board_row in board_rows:
             board_list.append(
                 {
-                    'id': pydantic_board_model.board_id,
-                    'name': pydantic_board_model.board_name,
-                    'status': pydantic_board_model.board_status,
-                    'tasks': [task.task_id for task in pydantic_board_model.tasks]
+                    'id': board_row.board_id,
+                    'name': board_row.board_name,
+                    'status': board_row.board_status,
+                    'tasks': board_task_ids[board_row.board_id]
                 }
             )
 
@@ -139,11 +178,14 @@ class BoardTaskService(ProjectBoardBase):
             'task_status': task_details['status']
         }
 
-        update_status = self.common_dao.update_object(
-            object_type=db_model.Task,
-            filter_condition=db_model.Task.task_id == task_details['id'],
-            update_payload=update_payload
-        )
+        # the status and its event are committed together
+        if SETTINGS.group_commit_enabled:
+            update_status = self.common_dao.group_commit(
+                lambda db: BoardTaskService(db)._update_task_status(task_details, update_payload)
+            )
+        else:
+            with self.common_dao.unit_of_work():
+                update_status = self._update_task_status(task_details, update_payload)
 
         if update_status == 0:
             LOGGER.warning("could not update task status")
@@ -156,6 +198,29 @@ class BoardTaskService(ProjectBoardBase):
                 }
             )
 
+    def _update_task_status(self, task_details, update_payload) -> int:
+        update_status = self.common_dao.update_object(
+            object_type=db_model.Task,
+            filter_condition=db_model.Task.task_id == task_details['id'],
+            update_payload=update_payload
+        )
+        if not update_status:
+            return update_status
+
+        task_model = self.common_dao.get_object(
+            object_type=db_model.Task,
+            filter_condition=db_model.Task.task_id == task_details['id']
+        )
+        self.event_service.record_event(
+            event_type=BoardEventTypes.task_status_updated,
+            board_id=task_model.board_id,
+            object_id=task_model.task_id,
+            payload={
+                'status': task_details['status']
+            }
+        )
+        return update_status
+
     def close_board(self, request: str) -> str:
         # deserialize json
         board_details = json.loads(request)
@@ -182,11 +247,22 @@ class BoardTaskService(ProjectBoardBase):
             'board_end_time': datetime.now()
         }
 
-        update_status = self.common_dao.update_object(
-            object_type=db_model.Board,
-            filter_condition=db_model.Board.board_id == board_details['id'],
-            update_payload=update_payload
-        )
+        # the status and its event are committed together
+        with self.common_dao.unit_of_work():
+            update_status = self.common_dao.update_object(
+                object_type=db_model.Board,
+                filter_condition=db_model.Board.board_id == board_details['id'],
+                update_payload=update_payload
+            )
+            if update_status:
+                self.common_dao.on_commit(lambda: GRAPH_REPLICA.put_board(board_model))
+                self.event_service.record_event(
+                    event_type=BoardEventTypes.board_closed,
+                    board_id=board_model.board_id,
+                    team_id=board_model.board_team_id,
+                    object_id=board_model.board_id,
+                    payload=update_payload
+                )
 
         if update_status == 0:
             LOGGER.warning("could not update the board status")
@@ -204,25 +280,38 @@ class BoardTaskService(ProjectBoardBase):
         board_details = json.loads(request)
 
         # fetch board model
+        task_type = db_model.Task
         board_model = self.common_dao.get_object(
             object_type=db_model.Board,
             filter_condition=db_model.Board.board_id == board_details['id']
         )
 
+        if board_model is None:
+            # archived boards stay exportable
+            task_type = db_model.ArchivedTask
+            board_model = self.common_dao.get_object(
+                object_type=db_model.ArchivedBoard,
+                filter_condition=db_model.ArchivedBoard.board_id == board_details['id']
+            )
+
         if board_model is None:
             raise NoDataException
 
+        # project only the exported columns
         data = self.db.query(
-            db_model.User,
-            db_model.Team,
-            db_model.Task
+            db_model.Team.team_name,
+            task_type.task_title,
+            task_type.description,
+            db_model.User.user_display_name,
+            task_type.task_status
         ).filter(
-            db_model.User.user_id == db_model.Task.task_assign_id
+            db_model.User.user_id == task_type.task_assign_id
         ).filter(
             db_model.Team.team_id == board_model.board_team_id
         ).filter(
-            db_model.Task.board_id == board_model.board_id
+            task_type.board_id == board_model.board_id
         ).all()
+        data = [ExportTaskRow._make(row) for row in data]
 
         if len(data) == 0:
             LOGGER.warning(f"No Board data to export")
@@ -233,19 +322,16 @@ class BoardTaskService(ProjectBoardBase):
             'board_name': board_model.board_name,
             'board_description': board_model.description,
             'board_status': board_model.board_status,
-            'team_name': data[0].Team.team_name
+            'team_name': data[0].team_name
         }
 
         for row in data:
-            user_model = row.User
-            task_model = row.Task
-
             task_details.append(
                 {
-                    "task_title": task_model.task_title,
-                    "task_description": task_model.description,
-                    "user_display_name": user_model.user_display_name,
-                    "task_status": task_model.task_status
+                    "task_title": row.task_title,
+                    "task_description": row.description,
+                    "user_display_name": row.user_display_name,
+                    "task_status": row.task_status
                 }
             )
 
@@ -257,3 +343,75 @@ class BoardTaskService(ProjectBoardBase):
         except IOError as e:
             LOGGER.error("Could not export board due to following error: " + e)
             raise
+
+    def list_board_changes(self, request: str) -> str:
+        """
+        :param request: A json string with the board id and last seen event sequence
+        {
+            "id" : "<board_id>",
+            "since" : "<last seen event seq>",
+            "limit" : "<max number of events>"
+        }
+        :return: A json string with the board events recorded after since
+        """
+        return self.event_service.list_changes(request)
+
+    def create_board_with_tasks(self, request: str) -> str:
+        """
+        :param request: A json string with the board details and its tasks
+        {
+            "name" : "<board_name>",
+            "description" : "<description>",
+            "team_id" : "<team id>",
+            "tasks" : [
+                {
+                    "title" : "<task_name>",
+                    "description" : "<description>",
+                    "user_id" : "<user_id>"
+                }
+            ]
+        }
+        :return: A json string with the response {"id" : "<board_id>", "tasks" : ["<task_id>"]}
+
+        Board and tasks are created in one transaction, nothing is created if any constraint fails.
+        """
+        # deserialize json
+        board_details = json.loads(request)
+
+        with self.common_dao.unit_of_work():
+            board_id = json.loads(
+                self.create_board(
+                    json.dumps(
+                        {
+                            'name': board_details['name'],
+                            'description': board_details['description'],
+                            'team_id': board_details['team_id']
+                        }
+                    )
+                )
+            )['id']
+
+            task_ids = []
+            for task_details in board_details['tasks']:
+                task_ids.append(
+                    json.loads(
+                        self.add_task(
+                            json.dumps(
+                                {
+                                    'title': task_details['title'],
+                                    'description': task_details['description'],
+                                    'board_id': board_id,
+                                    'user_id': task_details['user_id']
+                                }
+                            )
+                        )
+                    )['id']
+                )
+
+        LOGGER.info(f"Board: {board_details['name']} created with {len(task_ids)} tasks")
+        return json.dumps(
+            {
+                'id': board_id,
+                'tasks': task_ids
+            }
+        )
@@ -0,0 +1,265 @@
+import json
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import delete, update, select, func, or_
+from sqlalchemy.orm import Session
+
+from database import db_models as db_model
+from daos.common_dao import CommonDao
+from daos.graph_replica import GRAPH_REPLICA
+from daos.membership_loader import reset_membership_loader
+from logger import LOGGER
+from constants.constraint_constants import BatchConstraints as b_c
+from custom_exceptions.constraint_exception import LimitOverflowException, ConstraintViolationException
+
+USERS = db_model.User.__table__
+TEAMS = db_model.Team.__table__
+BOARDS = db_model.Board.__table__
+TASKS = db_model.Task.__table__
+MEMBERSHIPS = db_model.user_team_association
+TRANSITIONS = db_model.TaskStatusTransition.__table__
+EVENTS = db_model.BoardEvent.__table__
+DAILY_STATS = db_model.TeamDailyStats.__table__
+ARCHIVED_BOARDS = db_model.ArchivedBoard.__table__
+ARCHIVED_TASKS = db_model.ArchivedTask.__table__
+
+
+class DeleteService:
+    """Single and bulk deletes of tasks, boards, users and teams.
+    Every request is one transaction with one set based statement per table it cascades to.
+    A soft delete sets deleted_at, the rows drop out of ORM queries and free their name for reuse,
+    a hard delete removes the rows together with their history, events and archived copies
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.common_dao = CommonDao(self.db)
+
+    def delete_tasks(self, request: str) -> str:
+        """
+        :param request: A json string with the tasks to delete, by id or by board
+        {
+          "ids" : ["<task_id>", ...],
+          "board_ids" : ["<board_id>", ...],
+          "soft" : "<true to only mark the tasks deleted>"
+        }
+        :return: A json string with the rows changed per table
+        {
+          "soft" : "<soft delete or not>",
+          "deleted" : {"<table>" : "<rows>"}
+        }
+        """
+        # deserialize json
+        delete_details = json.loads(request)
+        task_condition = self._condition(delete_details, TASKS.c.task_id, board_ids=TASKS.c.board_id)
+
+        deleted = {}
+        with self.common_dao.unit_of_work():
+            removed_tasks = self._replica_rows(select(TASKS.c.board_id, TASKS.c.task_id).where(task_condition))
+            if delete_details['soft']:
+                deleted['tasks'] = self._soft_delete(TASKS, task_condition)
+            else:
+                archived_condition = self._condition(
+                    delete_details, ARCHIVED_TASKS.c.task_id, board_ids=ARCHIVED_TASKS.c.board_id
+                )
+                deleted.update(self._hard_delete_tasks(task_condition, archived_condition))
+            self._after_commit(lambda: GRAPH_REPLICA.remove_tasks(removed_tasks))
+
+        LOGGER.info(f"Deleted tasks {delete_details}: {deleted}")
+        return json.dumps({'soft': delete_details['soft'], 'deleted': deleted})
+
+    def delete_boards(self, request: str) -> str:
+        """
+        :param request: A json string with the boards to delete, by id or by team
+        {
+          "ids" : ["<board_id>", ...],
+          "team_ids" : ["<team_id>", ...],
+          "soft" : "<true to only mark the boards and their tasks deleted>"
+        }
+        :return: A json string with the rows changed per table
+        {
+          "soft" : "<soft delete or not>",
+          "deleted" : {"<table>" : "<rows>"}
+        }
+        """
+        # deserialize json
+        delete_details = json.loads(request)
+        board_condition = self._condition(delete_details, BOARDS.c.board_id, team_ids=BOARDS.c.board_team_id)
+
+        deleted = {}
+        with self.common_dao.unit_of_work():
+            removed_boards = [row.board_id for row in self._replica_rows(
+                select(BOARDS.c.board_id).where(board_condition)
+            )]
+            if delete_details['soft']:
+                deleted.update(self._soft_delete_boards(board_condition))
+            else:
+                archived_condition = self._condition(
+                    delete_details, ARCHIVED_BOARDS.c.board_id, team_ids=ARCHIVED_BOARDS.c.board_team_id
+                )
+                deleted.update(self._hard_delete_boards(board_condition, archived_condition))
+            self._after_commit(lambda: GRAPH_REPLICA.remove_boards(removed_boards))
+
+        LOGGER.info(f"Deleted boards {delete_details}: {deleted}")
+        return json.dumps({'soft': delete_details['soft'], 'deleted': deleted})
+
+    def delete_users(self, request: str) -> str:
+        """
+        :param request: A json string with the users to delete
+        {
+          "ids" : ["<user_id>", ...],
+          "soft" : "<true to only mark the users deleted>"
+        }
+        :return: A json string with the rows changed per table
+        {
+          "soft" : "<soft delete or not>",
+          "deleted" : {"<table>" : "<rows>"}
+        }
+        """
+        # deserialize json
+        delete_details = json.loads(request)
+        user_condition = self._condition(delete_details, USERS.c.user_id)
+        membership_condition = MEMBERSHIPS.c.user_id.in_(delete_details['ids'])
+
+        deleted = {}
+        with self.common_dao.unit_of_work():
+            # memberships go in both modes, the member counts of the teams drop with them
+            removed_count = select(func.count()).select_from(MEMBERSHIPS).where(
+                MEMBERSHIPS.c.team_id == TEAMS.c.team_id
+            ).where(membership_condition).scalar_subquery()
+            self.db.execute(
+                update(TEAMS).where(
+                    TEAMS.c.team_id.in_(select(MEMBERSHIPS.c.team_id).where(membership_condition))
+                ).values(member_count=TEAMS.c.member_count - removed_count)
+            )
+            deleted['users_to_teams'] = self._hard_delete(MEMBERSHIPS, membership_condition)
+
+            if delete_details['soft']:
+                deleted['users'] = self._soft_delete(USERS, user_condition)
+            else:
+                deleted['tasks_unassigned'] = self.db.execute(
+                    update(TASKS).where(TASKS.c.task_assign_id.in_(delete_details['ids'])).values(task_assign_id=None)
+                ).rowcount
+                self.db.execute(
+                    update(ARCHIVED_TASKS).where(
+                        ARCHIVED_TASKS.c.task_assign_id.in_(delete_details['ids'])
+                    ).values(task_assign_id=None)
+                )
+                deleted['teams_without_admin'] = self.db.execute(
+                    update(TEAMS).where(TEAMS.c.team_admin.in_(delete_details['ids'])).values(team_admin=None)
+                ).rowcount
+                deleted['users'] = self._hard_delete(USERS, user_condition)
+            self._after_commit(lambda: GRAPH_REPLICA.remove_users(delete_details['ids']))
+
+        LOGGER.info(f"Deleted users {delete_details}: {deleted}")
+        return json.dumps({'soft': delete_details['soft'], 'deleted': deleted})
+
+    def delete_teams(self, request: str) -> str:
+        """
+        :param request: A json string with the teams to delete
+        {
+          "ids" : ["<team_id>", ...],
+          "soft" : "<true to only mark the teams, their boards and tasks deleted>"
+        }
+        :return: A json string with the rows changed per table
+        {
+          "soft" : "<soft delete or not>",
+          "deleted" : {"<table>" : "<rows>"}
+        }
+        """
+        # deserialize json
+        delete_details = json.loads(request)
+        team_condition = self._condition(delete_details, TEAMS.c.team_id)
+        board_condition = BOARDS.c.board_team_id.in_(delete_details['ids'])
+
+        deleted = {}
+        with self.common_dao.unit_of_work():
+            if delete_details['soft']:
+                # memberships are kept, the teams drop out of the user team lists through the loader criteria
+                deleted.update(self._soft_delete_boards(board_condition))
+                deleted['teams'] = self._soft_delete(TEAMS, team_condition)
+            else:
+                deleted.update(self._hard_delete_boards(
+                    board_condition, ARCHIVED_BOARDS.c.board_team_id.in_(delete_details['ids'])
+                ))
+                deleted['board_events'] += self._hard_delete(EVENTS, EVENTS.c.team_id.in_(delete_details['ids']))
+                deleted['team_daily_stats'] = self._hard_delete(
+                    DAILY_STATS, DAILY_STATS.c.team_id.in_(delete_details['ids'])
+                )
+                deleted['users_to_teams'] = self._hard_delete(
+                    MEMBERSHIPS, MEMBERSHIPS.c.team_id.in_(delete_details['ids'])
+                )
+                deleted['teams'] = self._hard_delete(TEAMS, team_condition)
+            self._after_commit(lambda: GRAPH_REPLICA.remove_teams(delete_details['ids']))
+
+        LOGGER.info(f"Deleted teams {delete_details}: {deleted}")
+        return json.dumps({'soft': delete_details['soft'], 'deleted': deleted})
+
+    def _soft_delete_boards(self, board_condition) -> Dict[str, int]:
+        return {
+            'tasks': self._soft_delete(TASKS, TASKS.c.board_id.in_(select(BOARDS.c.board_id).where(board_condition))),
+            'boards': self._soft_delete(BOARDS, board_condition)
+        }
+
+    def _hard_delete_boards(self, board_condition, archived_condition) -> Dict[str, int]:
+        """deletes the live and archived boards with their tasks, task history and events"""
+        board_ids = select(BOARDS.c.board_id).where(board_condition)
+        archived_board_ids = select(ARCHIVED_BOARDS.c.board_id).where(archived_condition)
+        deleted = self._hard_delete_tasks(
+            TASKS.c.board_id.in_(board_ids), ARCHIVED_TASKS.c.board_id.in_(archived_board_ids)
+        )
+        deleted['board_events'] = self._hard_delete(
+            EVENTS, or_(EVENTS.c.board_id.in_(board_ids), EVENTS.c.board_id.in_(archived_board_ids))
+        )
+        deleted['boards'] = self._hard_delete(BOARDS, board_condition)
+        deleted['archived_boards'] = self._hard_delete(ARCHIVED_BOARDS, archived_condition)
+        return deleted
+
+    def _hard_delete_tasks(self, task_condition, archived_condition) -> Dict[str, int]:
+        """deletes the live and archived tasks with their status history"""
+        deleted = {
+            'task_status_transitions': self._hard_delete(
+                TRANSITIONS,
+                or_(
+                    TRANSITIONS.c.task_id.in_(select(TASKS.c.task_id).where(task_condition)),
+                    TRANSITIONS.c.task_id.in_(select(ARCHIVED_TASKS.c.task_id).where(archived_condition))
+                )
+            )
+        }
+        deleted['tasks'] = self._hard_delete(TASKS, task_condition)
+        deleted['archived_tasks'] = self._hard_delete(ARCHIVED_TASKS, archived_condition)
+        return deleted
+
+    def _soft_delete(self, table, condition) -> int:
+        return self.db.execute(
+            update(table).where(condition).where(table.c.deleted_at.is_(None)).values(deleted_at=func.now())
+        ).rowcount
+
+    def _hard_delete(self, table, condition) -> int:
+        return self.db.execute(delete(table).where(condition)).rowcount
+
+    def _replica_rows(self, statement) -> List[Any]:
+        """the rows a delete is about to touch, only read while the graph replica has to drop them"""
+        return self.db.execute(statement).all() if GRAPH_REPLICA.loaded else []
+
+    def _after_commit(self, update_replica: Callable[[], None]):
+        """drops the deleted nodes and edges from the graph replica once the delete is committed"""
+        reset_membership_loader(self.db)
+        if GRAPH_REPLICA.loaded:
+            self.common_dao.on_commit(update_replica)
+
+    @staticmethod
+    def _condition(delete_details: Dict[str, Any], id_column, **parent_columns) -> Any:
+        """rows matching the ids or belonging to one of the parents, e.g. board_ids=TASKS.c.board_id"""
+        conditions = []
+        for key, column in (('ids', id_column), *parent_columns.items()):
+            ids: List[int] = delete_details.get(key) or []
+            if len(ids) > b_c.max_delete_ids.value:
+                raise LimitOverflowException(f"Cannot delete by more than {b_c.max_delete_ids.value} {key} at once")
+            if ids:
+                conditions.append(column.in_(ids))
+        if not conditions:
+            raise ConstraintViolationException(
+                message=f"nothing to delete, give {' or '.join(('ids', *parent_columns))}"
+            )
+        return or_(*conditions)
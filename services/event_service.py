@@ -0,0 +1,182 @@
+import json
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import or_, and_, insert
+from sqlalchemy.orm import Session
+
+from database import db_models as db_model
+from daos.common_dao import CommonDao
+from logger import LOGGER
+from utils.event_broker import EVENT_BROKER, team_topic, board_topic
+from constants.event_constants import BoardEventTypes, BoardEventConstraints as e_c
+from custom_exceptions.constraint_exception import NoDataException
+
+
+class EventService:
+    """Append-only log of board activity, used to serve incremental change feeds
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.common_dao = CommonDao(self.db)
+
+    def record_event(
+            self,
+            event_type: BoardEventTypes,
+            board_id: Optional[int] = None,
+            team_id: Optional[int] = None,
+            object_id: Optional[int] = None,
+            payload: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """appends an event to the board event log
+        :param event_type: type of the event
+        :type event_type: BoardEventTypes
+        :param board_id: board the event belongs to, if any
+        :type board_id: Optional[int]
+        :param team_id: team the event belongs to, if any
+        :type team_id: Optional[int]
+        :param object_id: id of the task/board/team the event is about
+        :type object_id: Optional[int]
+        :param payload: event details
+        :type payload: Optional[Dict[str, Any]]
+        :return: sequence number of the event
+        :rtype: int
+        """
+        if team_id is None and board_id is not None:
+            board_model = self.common_dao.get_object(
+                object_type=db_model.Board,
+                filter_condition=db_model.Board.board_id == board_id
+            )
+            team_id = board_model.board_team_id if board_model else None
+
+        event_obj = db_model.BoardEvent(
+            event_type=event_type.value,
+            board_id=board_id,
+            team_id=team_id,
+            object_id=object_id,
+            payload=json.dumps(payload or {}, default=str)
+        )
+        event_model = self.common_dao.create_object(event_obj)
+        LOGGER.info(f"Recorded event: {event_type.value} with seq: {event_model.event_seq}")
+
+        tenant_id = self.db.info.get('tenant_id')
+        self.common_dao.on_commit(lambda: self.publish_event(event_model, tenant_id))
+        return event_model.event_seq
+
+    def record_events(self, event_type: BoardEventTypes, events: List[Dict[str, Any]]):
+        """appends many events of one type with a single insert, for bulk writes
+        :param event_type: type of the events
+        :type event_type: BoardEventTypes
+        :param events: board_id, team_id, object_id and payload of each event, object ids unique per event type
+        :type events: List[Dict[str, Any]]
+        """
+        if not events:
+            return
+        self.db.execute(
+            insert(db_model.BoardEvent.__table__),
+            [
+                {
+                    'event_type': event_type.value,
+                    'board_id': event['board_id'],
+                    'team_id': event['team_id'],
+                    'object_id': event['object_id'],
+                    'payload': json.dumps(event['payload'], default=str)
+                }
+                for event in events
+            ]
+        )
+        LOGGER.info(f"Recorded {len(events)} events: {event_type.value}")
+
+        if EVENT_BROKER.has_subscribers():
+            event_models = self.db.query(db_model.BoardEvent).filter(
+                db_model.BoardEvent.event_type == event_type.value,
+                db_model.BoardEvent.object_id.in_([event['object_id'] for event in events])
+            ).order_by(db_model.BoardEvent.event_seq).all()
+            # detached so publishing after the commit does not reload every event
+            for event_model in event_models:
+                self.db.expunge(event_model)
+            tenant_id = self.db.info.get('tenant_id')
+            self.common_dao.on_commit(
+                lambda: [self.publish_event(event_model, tenant_id) for event_model in event_models]
+            )
+
+    @staticmethod
+    def publish_event(event_model: db_model.BoardEvent, tenant_id: Optional[str] = None):
+        """pushes a recorded event to the live subscribers of its board and team
+        :param event_model: recorded event
+        :type event_model: db_model.BoardEvent
+        :param tenant_id: tenant whose database holds the event, None for the default database
+        :type tenant_id: Optional[str]
+        """
+        if not EVENT_BROKER.has_subscribers():
+            return
+
+        topics = []
+        if event_model.board_id is not None:
+            topics.append(board_topic(event_model.board_id, tenant_id))
+        if event_model.team_id is not None:
+            topics.append(team_topic(event_model.team_id, tenant_id))
+        EVENT_BROKER.publish(topics, EventService.event_to_dict(event_model))
+
+    @staticmethod
+    def event_to_dict(event_model: db_model.BoardEvent) -> Dict[str, Any]:
+        return {
+            'seq': event_model.event_seq,
+            'type': event_model.event_type,
+            'board_id': event_model.board_id,
+            'team_id': event_model.team_id,
+            'object_id': event_model.object_id,
+            'payload': json.loads(event_model.payload) if event_model.payload else {},
+            'time': str(event_model.create_time)
+        }
+
+    def list_changes(self, request: str) -> str:
+        """
+        :param request: A json string with the board id and last seen sequence
+        {
+            "id" : "<board_id>",
+            "since" : "<last seen event seq>",
+            "limit" : "<max number of events>"
+        }
+        :return: A json string with the events after since, ordered by sequence
+        {
+            "changes" : [{"seq", "type", "board_id", "team_id", "object_id", "payload", "time"}],
+            "last_seq" : "<seq to pass as since on next poll>"
+        }
+        """
+        # deserialize json
+        change_details = json.loads(request)
+        since = change_details.get('since') or 0
+        limit = min(
+            change_details.get('limit') or e_c.default_changes_limit.value,
+            e_c.max_changes_limit.value
+        )
+
+        board_model = self.common_dao.get_object(
+            object_type=db_model.Board,
+            filter_condition=db_model.Board.board_id == change_details['id']
+        )
+        if board_model is None:
+            raise NoDataException
+
+        # board events plus membership events of the owning team
+        event_models = self.db.query(db_model.BoardEvent).filter(
+            db_model.BoardEvent.event_seq > since
+        ).filter(
+            or_(
+                db_model.BoardEvent.board_id == board_model.board_id,
+                and_(
+                    db_model.BoardEvent.board_id.is_(None),
+                    db_model.BoardEvent.team_id == board_model.board_team_id
+                )
+            )
+        ).order_by(db_model.BoardEvent.event_seq).limit(limit).all()
+
+        changes = [self.event_to_dict(event) for event in event_models]
+
+        return json.dumps(
+            {
+                'changes': changes,
+                'last_seq': changes[-1]['seq'] if changes else since
+            }
+        )
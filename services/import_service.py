@@ -0,0 +1,252 @@
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.orm import Session
+
+from config import SETTINGS
+from database import db_models as db_model
+from database.database import run_with_write_retry
+from daos.common_dao import CommonDao
+from daos.graph_replica import GRAPH_REPLICA
+from services.event_service import EventService
+from logger import LOGGER
+from constants.constraint_constants import BoardAndTaskConstraints as b_c, TaskStatuses
+from constants.event_constants import BoardEventTypes
+from utils import bulk_import
+
+# reasons of rejected rows returned in the summary, the counts cover all of them
+MAX_REPORTED_REJECTS = 100
+
+IMPORT_MAX_LENGTHS = {
+    'board_name': b_c.board_name_len.value,
+    'board_description': b_c.board_description_len.value,
+    'task_title': b_c.task_title_len.value,
+    'task_description': b_c.task_description_len.value,
+    'task_status': b_c.task_status_len.value
+}
+# an empty status imports the task as OPEN
+TASK_STATUSES = tuple(status.value for status in TaskStatuses)
+
+
+class ImportService:
+    """Bulk import of boards and tasks from CSV or NDJSON files, one transaction per chunk of rows
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.common_dao = CommonDao(self.db)
+        self.event_service = EventService(self.db)
+        # name -> id lookups cached for the whole import, boards are looked up within their team
+        self.team_ids: Dict[str, int] = {}
+        self.user_ids: Dict[str, int] = {}
+        self.board_ids: Dict[Tuple[int, str], int] = {}
+
+    def import_file(self, request: str) -> str:
+        """
+        :param request: A json string with the file to import
+        {
+          "path" : "<file path>",
+          "format" : "<csv or ndjson>",
+          "import_id" : "<name of the checkpoint, an import with the same id resumes after the last chunk>"
+        }
+        :return: A json string with the import summary
+        {
+          "rows_done" : "<rows read including earlier runs>",
+          "imported" : "<tasks inserted>",
+          "rejected" : "<rows rejected>",
+          "boards_created" : "<boards created>",
+          "rows_per_second" : "<rows read per second in this run>",
+          "rejects" : ["<reason>", ...]
+        }
+        """
+        # deserialize json
+        import_details = json.loads(request)
+
+        import_dir = Path(SETTINGS.import_dir)
+        import_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint_path = import_dir / f"{import_details['import_id']}.checkpoint.json"
+        checkpoint = bulk_import.read_checkpoint(checkpoint_path)
+        if checkpoint['rows_done']:
+            LOGGER.info(f"Resuming import {import_details['import_id']} after row {checkpoint['rows_done']}")
+
+        rejects: List[str] = []
+        start_time = time.perf_counter()
+        rows_start = checkpoint['rows_done']
+        with open(import_details['path'], newline='', encoding='utf-8') as stream:
+            for rows in bulk_import.read_import_chunks(
+                    stream,
+                    import_details['format'],
+                    SETTINGS.import_chunk_size,
+                    skip_rows=checkpoint['rows_done']
+            ):
+                imported, boards_created, chunk_rejects = self._import_chunk(rows)
+                checkpoint['rows_done'] += len(rows)
+                checkpoint['imported'] += imported
+                checkpoint['rejected'] += len(chunk_rejects)
+                checkpoint['boards_created'] += boards_created
+                rejects.extend(chunk_rejects[:MAX_REPORTED_REJECTS - len(rejects)])
+                # a crash between the commit and this write replays the chunk, its rows are then rejected as present
+                bulk_import.write_checkpoint(checkpoint_path, checkpoint)
+                LOGGER.info(
+                    f"Import {import_details['import_id']}: {checkpoint['rows_done']} rows, "
+                    f"{checkpoint['imported']} imported, {checkpoint['rejected']} rejected"
+                )
+
+        seconds = time.perf_counter() - start_time
+        if GRAPH_REPLICA.loaded:
+            GRAPH_REPLICA.load(self.db)
+
+        return json.dumps(
+            {
+                **checkpoint,
+                'rows_per_second': (checkpoint['rows_done'] - rows_start) / seconds if seconds else None,
+                'rejects': rejects
+            }
+        )
+
+    def _import_chunk(self, rows: List[Dict[str, str]]):
+        invalid_rows = bulk_import.find_invalid_rows(rows, IMPORT_MAX_LENGTHS)
+        self._resolve_names(rows)
+        self._resolve_boards(rows)
+
+        present_titles = self._present_titles({row['task_title'] for row in rows})
+        # board names are unique across teams, a name used by another team cannot be created
+        board_name_teams = self._board_name_teams(
+            {row['board_name'] for row in rows if self._board_key(row) not in self.board_ids}
+        )
+        seen_titles: Set[str] = set()
+        for index, row in enumerate(rows):
+            if index in invalid_rows:
+                continue
+            if row['task_status'] and row['task_status'] not in TASK_STATUSES:
+                invalid_rows[index] = f"task_status {row['task_status']} is not one of {', '.join(TASK_STATUSES)}"
+            elif row['team_name'] not in self.team_ids:
+                invalid_rows[index] = f"team {row['team_name']} does not exist"
+            elif row['user_name'] not in self.user_ids:
+                invalid_rows[index] = f"user {row['user_name']} does not exist"
+            elif row['task_title'] in present_titles or row['task_title'] in seen_titles:
+                invalid_rows[index] = "task with same title already present"
+            elif board_name_teams.setdefault(row['board_name'], self.team_ids[row['team_name']]) != \
+                    self.team_ids[row['team_name']]:
+                invalid_rows[index] = f"board {row['board_name']} belongs to another team"
+            seen_titles.add(row['task_title'])
+        valid_rows, chunk_rejects = bulk_import.split_rejected(rows, invalid_rows)
+
+        new_boards = {}
+        for row in valid_rows:
+            board_key = self._board_key(row)
+            if board_key not in self.board_ids and board_key not in new_boards:
+                new_boards[board_key] = {
+                    'board_name': row['board_name'],
+                    'description': row['board_description'],
+                    'board_team_id': board_key[0],
+                    'board_status': 'OPEN'
+                }
+
+        def write():
+            # the boards, tasks and their events are committed together
+            with self.common_dao.unit_of_work():
+                if new_boards:
+                    self.db.execute(insert(db_model.Board.__table__), list(new_boards.values()))
+                    self.board_ids.update(self._lookup_boards(new_boards))
+                if valid_rows:
+                    self.db.execute(
+                        insert(db_model.Task.__table__),
+                        [
+                            {
+                                'task_title': row['task_title'],
+                                'description': row['task_description'],
+                                'board_id': self.board_ids[self._board_key(row)],
+                                'task_assign_id': self.user_ids[row['user_name']],
+                                'task_status': row['task_status'] or TaskStatuses.open.value
+                            }
+                            for row in valid_rows
+                        ]
+                    )
+                    self._record_task_events(valid_rows)
+
+        def rollback():
+            self.db.rollback()
+            for board_key in new_boards:
+                self.board_ids.pop(board_key, None)
+
+        run_with_write_retry(write, rollback=rollback)
+        return len(valid_rows), len(new_boards), chunk_rejects
+
+    def _record_task_events(self, valid_rows: List[Dict[str, str]]):
+        """one TASK_ADDED event per imported task, like tasks added one by one"""
+        task_team_ids = {self.board_ids[self._board_key(row)]: self._board_key(row)[0] for row in valid_rows}
+        task_rows = self.db.query(
+            db_model.Task.task_id, db_model.Task.board_id, db_model.Task.task_title,
+            db_model.Task.task_assign_id, db_model.Task.task_status
+        ).filter(
+            db_model.Task.task_title.in_([row['task_title'] for row in valid_rows])
+        ).order_by(db_model.Task.task_id)
+        self.event_service.record_events(
+            BoardEventTypes.task_added,
+            [
+                {
+                    'board_id': task_row.board_id,
+                    'team_id': task_team_ids[task_row.board_id],
+                    'object_id': task_row.task_id,
+                    'payload': {
+                        'title': task_row.task_title,
+                        'user_id': task_row.task_assign_id,
+                        'status': task_row.task_status
+                    }
+                }
+                for task_row in task_rows
+            ]
+        )
+
+    def _resolve_names(self, rows: List[Dict[str, str]]):
+        """fills the lookups with the teams and users of the chunk not seen before, one query each"""
+        for lookup, name_column, id_column, key in (
+                (self.team_ids, db_model.Team.team_name, db_model.Team.team_id, 'team_name'),
+                (self.user_ids, db_model.User.user_name, db_model.User.user_id, 'user_name')
+        ):
+            names = {row[key] for row in rows} - lookup.keys()
+            if names:
+                lookup.update(self._lookup(name_column, id_column, names))
+
+    def _resolve_boards(self, rows: List[Dict[str, str]]):
+        """fills the board lookup with the (team, board name) pairs of the chunk not seen before"""
+        board_keys = {
+            self._board_key(row) for row in rows if row['team_name'] in self.team_ids
+        } - self.board_ids.keys()
+        if board_keys:
+            self.board_ids.update(self._lookup_boards(board_keys))
+
+    def _board_key(self, row: Dict[str, str]) -> Tuple[int, str]:
+        return self.team_ids.get(row['team_name']), row['board_name']
+
+    def _lookup(self, name_column, id_column, names) -> Dict[str, int]:
+        return dict(self.db.query(name_column, id_column).filter(name_column.in_(list(names))))
+
+    def _lookup_boards(self, board_keys) -> Dict[Tuple[int, str], int]:
+        return {
+            (team_id, board_name): board_id
+            for team_id, board_name, board_id in self.db.query(
+                db_model.Board.board_team_id, db_model.Board.board_name, db_model.Board.board_id
+            ).filter(
+                tuple_(db_model.Board.board_team_id, db_model.Board.board_name).in_(list(board_keys))
+            )
+        }
+
+    def _board_name_teams(self, board_names: Set[str]) -> Dict[str, int]:
+        """team of each live board with one of the names"""
+        return dict(
+            self.db.query(db_model.Board.board_name, db_model.Board.board_team_id).filter(
+                db_model.Board.board_name.in_(list(board_names))
+            )
+        )
+
+    def _present_titles(self, titles: Set[str]) -> Set[str]:
+        return {
+            title for title, in self.db.query(db_model.Task.task_title).filter(
+                db_model.Task.task_title.in_(list(titles))
+            )
+        }
@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import exists, select, union
+from sqlalchemy.orm import Session
+
+from database import db_models as db_model
+from daos.common_dao import CommonDao
+from utils.time_in_status import time_in_status
+from constants.event_constants import StatusHistoryConstraints as s_c
+from custom_exceptions.constraint_exception import NoDataException
+
+TASKS = db_model.Task.__table__
+# the history of a soft deleted task is kept with the task but left out of the reports, like the task itself
+OF_LIVE_TASK = ~exists().where(
+    TASKS.c.task_id == db_model.TaskStatusTransition.task_id
+).where(
+    TASKS.c.deleted_at.isnot(None)
+)
+
+class StatusHistoryService:
+    """Task status history recorded by the task_status_transitions triggers, and time in status metrics on it
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.common_dao = CommonDao(self.db)
+
+    def get_time_in_status(self, request: str) -> str:
+        """
+        :param request: A json string with the board or the team identifier
+        {
+          "board_id" : "<board_id>",
+          "team_id" : "<team_id>"
+        }
+        :return: A json string with the time in status distribution of the tasks
+        {
+          "<status>" : {
+            "stays" : "<finished stays in the status>",
+            "current" : "<tasks currently in the status>",
+            "mean_seconds", "p50_seconds", "p90_seconds", "p99_seconds", "max_seconds"
+          }
+        }
+        """
+        # deserialize json
+        history_details = json.loads(request)
+        board_ids = self._board_ids(history_details.get('board_id'), history_details.get('team_id'))
+
+        statement = select(
+            db_model.TaskStatusTransition.task_id,
+            db_model.TaskStatusTransition.to_status,
+            db_model.TaskStatusTransition.transition_ms
+        ).where(
+            db_model.TaskStatusTransition.board_id.in_(board_ids)
+        ).where(
+            OF_LIVE_TASK
+        ).order_by(
+            db_model.TaskStatusTransition.task_id,
+            db_model.TaskStatusTransition.transition_ms,
+            db_model.TaskStatusTransition.transition_id
+        )
+        return json.dumps(time_in_status(self.db.execute(statement).partitions(s_c.fetch_chunk_size.value)))
+
+    def dump_transitions_csv(self, request: str) -> Iterator[str]:
+        """
+        :param request: A json string with the optional board or team identifier, all transitions without one
+        {
+          "board_id" : "<board_id>",
+          "team_id" : "<team_id>"
+        }
+        :return: CSV text chunks of the transitions, streamed from the database
+        """
+        # deserialize json
+        history_details = json.loads(request)
+
+        statement = select(
+            db_model.TaskStatusTransition.transition_id,
+            db_model.TaskStatusTransition.task_id,
+            db_model.TaskStatusTransition.board_id,
+            db_model.TaskStatusTransition.from_status,
+            db_model.TaskStatusTransition.to_status,
+            db_model.TaskStatusTransition.transition_ms
+        ).where(
+            OF_LIVE_TASK
+        ).order_by(db_model.TaskStatusTransition.transition_id)
+        if history_details.get('board_id') is not None or history_details.get('team_id') is not None:
+            statement = statement.where(db_model.TaskStatusTransition.board_id.in_(
+                self._board_ids(history_details.get('board_id'), history_details.get('team_id'))
+            ))
+        result = self.db.execute(statement.execution_options(stream_results=True))
+
+        def csv_chunks() -> Iterator[str]:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(result.keys())
+            for rows in result.partitions(s_c.fetch_chunk_size.value):
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+        return csv_chunks()
+
+    def _board_ids(self, board_id: Optional[int], team_id: Optional[int]) -> Any:
+        """boards to report on, the boards of a team include its archived boards"""
+        if board_id is not None:
+            return [board_id]
+
+        team_model = self.common_dao.get_object(
+            object_type=db_model.Team,
+            filter_condition=db_model.Team.team_id == team_id
+        )
+        if team_model is None:
+            raise NoDataException
+
+        return union(
+            select(db_model.Board.board_id).where(
+                db_model.Board.board_team_id == team_id
+            ).where(
+                db_model.Board.deleted_at.is_(None)
+            ),
+            select(db_model.ArchivedBoard.board_id).where(db_model.ArchivedBoard.board_team_id == team_id)
+        )
@@ -1,14 +1,20 @@
 import json
 
+from sqlalchemy import and_, func, select
 from sqlalchemy.orm import Session
 
 from database import db_models as db_model
 from models import models as pydantic_models
+from models.row_models import TeamRow
 from team_base import TeamBase
 from daos.common_dao import CommonDao
+from daos.graph_replica import GRAPH_REPLICA
+from daos.membership_loader import get_membership_loader, reset_membership_loader
 from logger import LOGGER
-from constants.constraint_constants import TeamConstraints as t_c
+from constants.constraint_constants import TeamConstraints as t_c, BatchConstraints as b_c
 from utils import constraint_checks as c_c
+from services.event_service import EventService
+from constants.event_constants import BoardEventTypes
 from custom_exceptions.constraint_exception import (
     LimitOverflowException,
     ObjectAlreadyPresentException,
@@ -20,6 +26,7 @@ class TeamService(TeamBase):
     def __init__(self, db: Session):
         self.db = db
         self.common_dao = CommonDao(self.db)
+        self.event_service = EventService(self.db)
 
     def create_team(self, request: str) -> str:
         team_details = json.loads(request)
@@ -52,9 +59,10 @@ class TeamService(TeamBase):
 
             team_model = self.common_dao.create_object(team_obj)
             LOGGER.info(f"Team with team name: {team_details['name']} created")
+            self.common_dao.on_commit(lambda: GRAPH_REPLICA.put_team(team_model))
 
             # convert from sqlalchemy to pydantic model
-            pydantic_team_model = pydantic_models.TeamWithUsers.from_orm(team_model)
+            pydantic_team_model = pydantic_models.TeamBase.from_orm(team_model)
             return json.dumps(
                 {
                     'id': pydantic_team_model.team_id
@@ -66,6 +74,12 @@ class TeamService(TeamBase):
         # deserialize json
         team_details = json.loads(request)
 
+        if GRAPH_REPLICA.loaded:
+            team_description = GRAPH_REPLICA.describe_team(team_details['id'])
+            if team_description is None:
+                raise NoDataException
+            return json.dumps(team_description)
+
         team_model = self.common_dao.get_object(
             object_type=db_model.Team,
             filter_condition=db_model.Team.team_id == team_details['id']
@@ -74,7 +88,7 @@ class TeamService(TeamBase):
             raise NoDataException
 
         # convert from sqlalchemy to pydantic model
-        pydantic_team_model = pydantic_models.TeamWithUsers.from_orm(team_model)
+        pydantic_team_model = pydantic_models.TeamBase.from_orm(team_model)
 
         return json.dumps(
             {
@@ -86,19 +100,19 @@ class TeamService(TeamBase):
         )
 
     def list_teams(self) -> str:
-        team_models = self.common_dao.get_objects(
+        team_rows = self.common_dao.get_rows(
+            row_type=TeamRow,
             object_type=db_model.Team
         )
 
         teams_list = []
-        for team_model in team_models:
-            pydantic_team_model = pydantic_models.TeamWithUsers.from_orm(team_model)
+        for team_row in team_rows:
             teams_list.append(
                 {
-                    'name': pydantic_team_model.team_name,
-                    'display_name': pydantic_team_model.description,
-                    'description': str(pydantic_team_model.create_time),
-                    'admin': pydantic_team_model.team_admin
+                    'name': team_row.team_name,
+                    'display_name': team_row.description,
+                    'description': str(team_row.create_time),
+                    'admin': team_row.team_admin
                 }
             )
         return json.dumps(teams_list)
@@ -127,6 +141,12 @@ class TeamService(TeamBase):
             raise NoDataException
         else:
             LOGGER.info("Updated team details")
+            if GRAPH_REPLICA.loaded:
+                team_model = self.common_dao.get_object(
+                    object_type=db_model.Team,
+                    filter_condition=db_model.Team.team_id == team_update_details['id']
+                )
+                self.common_dao.on_commit(lambda: GRAPH_REPLICA.put_team(team_model))
             return json.dumps(
                 {
                     'status': update_status
@@ -140,16 +160,6 @@ class TeamService(TeamBase):
         team_id = users_team_details['id']
         users = users_team_details['users']
 
-        # check user limit
-        # TODO add better logic for checking and enforcing limit
-        current_users_list = self.list_team_users(json.dumps({'id': team_id}))
-
-        if len(current_users_list) + len(users) > t_c.max_users_per_team.value:
-            raise LimitOverflowException(
-                f"Cannot add more than {t_c.max_users_per_team.value} users, "
-                f"current users in team: {len(current_users_list)}"
-            )
-
         team_model = self.common_dao.get_object(
             object_type=db_model.Team,
             filter_condition=db_model.Team.team_id == team_id
@@ -157,25 +167,69 @@ class TeamService(TeamBase):
         if team_model is None:
             raise NoDataException
 
-        for user_id in users:
-
-            user_model = self.common_dao.get_object(
-                object_type=db_model.User,
-                filter_condition=db_model.User.user_id == user_id
+        # live users of the request which are not yet in the team, the count subquery below is Core
+        # and does not get the soft delete criteria of ORM queries
+        new_member_condition = and_(
+            db_model.User.user_id.in_(users),
+            db_model.User.deleted_at.is_(None),
+            db_model.User.user_id.notin_(
+                select(db_model.user_team_association.c.user_id).where(
+                    db_model.user_team_association.c.team_id == team_id
+                ).scalar_subquery()
             )
-            if user_model is None:
-                LOGGER.warning(f"User with user id : {user_id} does not exists")
-
-            LOGGER.info(f"Added user_id: {user_id} to Team: {team_id}")
-            team_model.users.append(user_model)
+        )
+        new_member_count = select(func.count(db_model.User.user_id)).where(new_member_condition).scalar_subquery()
+
+        with self.common_dao.unit_of_work():
+            # one conditional update checks the cap and reserves the slots, it takes the write lock
+            # so concurrent adds to the team are serialized and cannot overshoot the cap
+            update_status = self.db.query(db_model.Team).filter(
+                db_model.Team.team_id == team_id,
+                db_model.Team.member_count + new_member_count <= t_c.max_users_per_team.value
+            ).update(
+                {db_model.Team.member_count: db_model.Team.member_count + new_member_count},
+                synchronize_session=False
+            )
+            if update_status == 0:
+                self.db.refresh(team_model)
+                raise LimitOverflowException(
+                    f"Cannot add more than {t_c.max_users_per_team.value} users, "
+                    f"current users in team: {team_model.member_count}"
+                )
 
-            self.db.add(team_model)
-            self.db.commit()
+            added_users = [
+                user_id for user_id, in self.db.query(db_model.User.user_id).filter(new_member_condition)
+            ]
+            for user_id in set(users) - set(added_users):
+                LOGGER.warning(f"User with user id : {user_id} does not exists or is already in the team")
+            if added_users:
+                self.db.execute(
+                    db_model.user_team_association.insert(),
+                    [{'user_id': user_id, 'team_id': team_id} for user_id in added_users]
+                )
+            LOGGER.info(f"Added user_ids: {added_users} to Team: {team_id}")
+
+            reset_membership_loader(self.db)
+            self.common_dao.on_commit(lambda: GRAPH_REPLICA.add_team_users(team_id, added_users))
+            self.event_service.record_event(
+                event_type=BoardEventTypes.team_users_added,
+                team_id=team_id,
+                object_id=team_id,
+                payload={
+                    'users': added_users
+                }
+            )
 
     def list_team_users(self, request: str):
         # deserialize json
         team_details = json.loads(request)
 
+        if GRAPH_REPLICA.loaded:
+            team_users = GRAPH_REPLICA.list_team_users(team_details['id'])
+            if team_users is None:
+                raise NoDataException
+            return json.dumps(team_users)
+
         team_model = self.common_dao.get_object(
             object_type=db_model.Team,
             filter_condition=db_model.Team.team_id == team_details['id']
@@ -197,6 +251,32 @@ class TeamService(TeamBase):
             )
         return json.dumps(team_users)
 
+    def list_teams_users(self, request: str) -> str:
+        """
+        :param request: A json string with the team identifiers
+        {
+          "ids" : ["<team_id>", ...]
+        }
+
+        :return: A json string with the users of every team, unknown teams map to an empty list
+        {
+          "<team_id>" : [
+            {
+              "id" : "<user_id>",
+              "name" : "<user_name>",
+              "display_name" : "<display name>"
+            }
+          ]
+        }
+        """
+        # deserialize json
+        team_details = json.loads(request)
+
+        if len(team_details['ids']) > b_c.max_lookup_ids.value:
+            raise LimitOverflowException(f"Cannot look up more than {b_c.max_lookup_ids.value} teams at once")
+
+        return json.dumps(get_membership_loader(self.db).load_team_users(team_details['ids']))
+
     def remove_users_from_team(self, request: str):
         # deserialize json
         users_team_details = json.loads(request)
@@ -211,19 +291,38 @@ class TeamService(TeamBase):
         if team_model is None:
             raise NoDataException
 
-        for user_id in users:
-
-            user_model = self.common_dao.get_object(
-                object_type=db_model.User,
-                filter_condition=db_model.User.user_id == user_id
+        membership_condition = and_(
+            db_model.user_team_association.c.team_id == team_id,
+            db_model.user_team_association.c.user_id.in_(users)
+        )
+        removed_count = select(func.count()).select_from(db_model.user_team_association).where(
+            membership_condition
+        ).scalar_subquery()
+
+        with self.common_dao.unit_of_work():
+            # the count update comes first to take the write lock, the memberships read after it
+            # cannot be changed by a concurrent request before they are deleted
+            self.db.query(db_model.Team).filter(db_model.Team.team_id == team_id).update(
+                {db_model.Team.member_count: db_model.Team.member_count - removed_count},
+                synchronize_session=False
+            )
+            removed_users = [
+                user_id for user_id, in self.db.query(db_model.user_team_association.c.user_id).filter(
+                    membership_condition
+                )
+            ]
+            self.db.execute(db_model.user_team_association.delete().where(membership_condition))
+            for user_id in set(users) - set(removed_users):
+                LOGGER.warning(f"User with user id : {user_id} is not in the team")
+            LOGGER.info(f"Removed user_ids: {removed_users} from Team: {team_id}")
+
+            reset_membership_loader(self.db)
+            self.common_dao.on_commit(lambda: GRAPH_REPLICA.remove_team_users(team_id, removed_users))
+            self.event_service.record_event(
+                event_type=BoardEventTypes.team_users_removed,
+                team_id=team_id,
+                object_id=team_id,
+                payload={
+                    'users': removed_users
+                }
             )
-            if user_model is None:
-                LOGGER.warning(f"User with user id : {user_id} does not exists")
-
-            LOGGER.info(f"Removed user_id: {user_id} from Team: {team_id}")
-            team_model.users.remove(user_model)
-
-            self.db.add(team_model)
-            self.db.commit()
-
-
@@ -0,0 +1,219 @@
+import json
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from database import db_models as db_model
+from daos.common_dao import CommonDao
+from logger import LOGGER
+from custom_exceptions.constraint_exception import NoDataException
+
+
+IS_COMPLETE = db_model.Task.task_status == 'COMPLETE'
+# when a task last became COMPLETE, from its status history. update_time moves with every later change of the
+# task (an edit, the unassigning of a deleted user), it only stands in for tasks completed before the history
+COMPLETED_MS = select(
+    func.max(db_model.TaskStatusTransition.transition_ms)
+).where(
+    db_model.TaskStatusTransition.board_id == db_model.Task.board_id,
+    db_model.TaskStatusTransition.task_id == db_model.Task.task_id,
+    db_model.TaskStatusTransition.to_status == 'COMPLETE'
+).scalar_subquery()
+COMPLETION_JULIAN_DAY = func.coalesce(
+    func.julianday(COMPLETED_MS / 1000.0, 'unixepoch'), func.julianday(db_model.Task.update_time)
+)
+# seconds from creation to completion of a COMPLETE task
+COMPLETION_SECONDS = (COMPLETION_JULIAN_DAY - func.julianday(db_model.Task.create_time)) * 86400
+
+
+class TeamStatsService:
+    """Team throughput statistics, aggregated in SQL over the boards and tasks of the team
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.common_dao = CommonDao(self.db)
+
+    def get_team_stats(self, request: str) -> str:
+        """
+        :param request: A json string with the team identifier
+        {
+          "id" : "<team_id>",
+          "daily" : "<true to include the daily rollup>"
+        }
+        :return: A json string with the team statistics
+        {
+          "boards" : [{"id", "name", "status", "end_time", "tasks", "completed_tasks"}],
+          "users" : [{"id", "name", "open_tasks"}],
+          "completed_tasks" : "<count>",
+          "avg_completion_seconds" : "<average time from creation to COMPLETE>",
+          "daily" : [{"day", "tasks_created", "tasks_completed", "avg_completion_seconds"}]
+        }
+        """
+        # deserialize json
+        team_details = json.loads(request)
+        team_id = team_details['id']
+
+        team_model = self.common_dao.get_object(
+            object_type=db_model.Team,
+            filter_condition=db_model.Team.team_id == team_id
+        )
+        if team_model is None:
+            raise NoDataException
+
+        completed_tasks, avg_completion_seconds = self.db.query(
+            func.count(db_model.Task.task_id),
+            func.avg(COMPLETION_SECONDS)
+        ).join(
+            db_model.Board, db_model.Board.board_id == db_model.Task.board_id
+        ).filter(
+            db_model.Board.board_team_id == team_id,
+            IS_COMPLETE
+        ).one()
+
+        team_stats = {
+            'boards': self._board_stats(team_id),
+            'users': self._user_stats(team_id),
+            'completed_tasks': completed_tasks,
+            'avg_completion_seconds': avg_completion_seconds
+        }
+        if team_details.get('daily'):
+            team_stats['daily'] = self.refresh_daily_stats(team_id)
+        return json.dumps(team_stats)
+
+    def refresh_daily_stats(self, team_id: int) -> List[Dict[str, Any]]:
+        """brings the daily rollup of the team up to date and returns it.
+        A task counts on the day it was created and the day it became COMPLETE, both taken from times later
+        updates of the task do not move. Days before the last stored day are kept as stored, only the last
+        stored day and the days after it are recomputed.
+        """
+        last_day = self.db.query(func.max(db_model.TeamDailyStats.day)).filter(
+            db_model.TeamDailyStats.team_id == team_id
+        ).scalar()
+
+        with self.common_dao.unit_of_work():
+            daily_stats = self._daily_stats(team_id, last_day)
+            stale_rows = self.db.query(db_model.TeamDailyStats).filter(
+                db_model.TeamDailyStats.team_id == team_id
+            )
+            if last_day is not None:
+                stale_rows = stale_rows.filter(db_model.TeamDailyStats.day >= last_day)
+            stale_rows.delete(synchronize_session=False)
+            self.db.bulk_insert_mappings(db_model.TeamDailyStats, list(daily_stats.values()))
+        LOGGER.info(f"Refreshed {len(daily_stats)} daily stats of Team: {team_id} from day: {last_day}")
+
+        return [
+            {
+                'day': day,
+                'tasks_created': tasks_created,
+                'tasks_completed': tasks_completed,
+                'avg_completion_seconds': completion_seconds / tasks_completed if tasks_completed else None
+            }
+            for day, tasks_created, tasks_completed, completion_seconds in self.db.query(
+                db_model.TeamDailyStats.day,
+                db_model.TeamDailyStats.tasks_created,
+                db_model.TeamDailyStats.tasks_completed,
+                db_model.TeamDailyStats.completion_seconds
+            ).filter(
+                db_model.TeamDailyStats.team_id == team_id
+            ).order_by(db_model.TeamDailyStats.day)
+        ]
+
+    def _board_stats(self, team_id: int) -> List[Dict[str, Any]]:
+        rows = self.db.query(
+            db_model.Board.board_id,
+            db_model.Board.board_name,
+            db_model.Board.board_status,
+            db_model.Board.board_end_time,
+            func.count(db_model.Task.task_id),
+            func.count(case((IS_COMPLETE, 1)))
+        ).outerjoin(
+            db_model.Task, db_model.Task.board_id == db_model.Board.board_id
+        ).filter(
+            db_model.Board.board_team_id == team_id
+        ).group_by(
+            db_model.Board.board_id
+        ).order_by(db_model.Board.board_id)
+
+        return [
+            {
+                'id': board_id,
+                'name': board_name,
+                'status': board_status,
+                'end_time': str(board_end_time) if board_end_time else None,
+                'tasks': tasks,
+                'completed_tasks': completed_tasks
+            }
+            for board_id, board_name, board_status, board_end_time, tasks, completed_tasks in rows
+        ]
+
+    def _user_stats(self, team_id: int) -> List[Dict[str, Any]]:
+        # open tasks on the team boards per team member, members without tasks count 0
+        association = db_model.user_team_association
+        rows = self.db.query(
+            db_model.User.user_id,
+            db_model.User.user_name,
+            func.count(db_model.Task.task_id)
+        ).join(
+            association, association.c.user_id == db_model.User.user_id
+        ).outerjoin(
+            db_model.Board, and_(
+                db_model.Board.board_team_id == team_id,
+                db_model.Board.board_status != 'CLOSED'
+            )
+        ).outerjoin(
+            db_model.Task, and_(
+                db_model.Task.board_id == db_model.Board.board_id,
+                db_model.Task.task_assign_id == db_model.User.user_id,
+                ~IS_COMPLETE
+            )
+        ).filter(
+            association.c.team_id == team_id
+        ).group_by(
+            db_model.User.user_id
+        ).order_by(db_model.User.user_id)
+
+        return [
+            {
+                'id': user_id,
+                'name': user_name,
+                'open_tasks': open_tasks
+            }
+            for user_id, user_name, open_tasks in rows
+        ]
+
+    def _daily_stats(self, team_id: int, from_day: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        created_day = func.date(db_model.Task.create_time)
+        completed_day = func.date(COMPLETION_JULIAN_DAY)
+        team_tasks = self.db.query(db_model.Task).join(
+            db_model.Board, db_model.Board.board_id == db_model.Task.board_id
+        ).filter(db_model.Board.board_team_id == team_id)
+
+        created_rows = team_tasks.with_entities(created_day, func.count(db_model.Task.task_id))
+        completed_rows = team_tasks.with_entities(
+            completed_day, func.count(db_model.Task.task_id), func.sum(COMPLETION_SECONDS)
+        ).filter(IS_COMPLETE, COMPLETION_JULIAN_DAY.isnot(None))
+        if from_day is not None:
+            created_rows = created_rows.filter(created_day >= from_day)
+            completed_rows = completed_rows.filter(completed_day >= from_day)
+
+        daily_stats = {}
+
+        def day_stats(day):
+            if day not in daily_stats:
+                daily_stats[day] = {
+                    'team_id': team_id,
+                    'day': day,
+                    'tasks_created': 0,
+                    'tasks_completed': 0,
+                    'completion_seconds': 0
+                }
+            return daily_stats[day]
+
+        for day, tasks_created in created_rows.group_by(created_day):
+            day_stats(day)['tasks_created'] = tasks_created
+        for day, tasks_completed, completion_seconds in completed_rows.group_by(completed_day):
+            day_stats(day)['tasks_completed'] = tasks_completed
+            day_stats(day)['completion_seconds'] = completion_seconds
+        return daily_stats
@@ -4,10 +4,13 @@ from sqlalchemy.orm import Session
 
 from database import db_models as db_model
 from models import models as pydantic_models
+from models.row_models import UserRow
 from user_base import UserBase
 from daos.common_dao import CommonDao
+from daos.graph_replica import GRAPH_REPLICA
+from daos.membership_loader import get_membership_loader
 from logger import LOGGER
-from constants.constraint_constants import UserConstraints as u_c
+from constants.constraint_constants import UserConstraints as u_c, BatchConstraints as b_c
 from utils import constraint_checks as c_c
 from custom_exceptions.constraint_exception import (
     LimitOverflowException,
@@ -66,7 +69,7 @@ class UserService(UserBase):
             raise NoDataException
 
         # convert from sqlalchemy to pydantic model
-        pydantic_user_model = pydantic_models.UserWithTeamsAndTasks.from_orm(user_model)
+        pydantic_user_model = pydantic_models.UserBase.from_orm(user_model)
         return json.dumps(
             {
                 'name': pydantic_user_model.user_name,
@@ -106,9 +109,10 @@ class UserService(UserBase):
 
             user_model = self.common_dao.create_object(user_obj)
             LOGGER.info(f"User with user_name: {user_details['name']} created")
+            self.common_dao.on_commit(lambda: GRAPH_REPLICA.put_user(user_model))
 
             # convert from sqlalchemy to pydantic model
-            pydantic_user_model = pydantic_models.UserWithTeamsAndTasks.from_orm(user_model)
+            pydantic_user_model = pydantic_models.UserBase.from_orm(user_model)
             return json.dumps(
                 {
                     'id': pydantic_user_model.user_id
@@ -116,18 +120,18 @@ class UserService(UserBase):
             )
 
     def list_users(self) -> str:
-        user_models = self.common_dao.get_objects(
+        user_rows = self.common_dao.get_rows(
+            row_type=UserRow,
             object_type=db_model.User
         )
-        print("----------")
+
         user_list = []
-        for user_model in user_models:
-            pydantic_user_model = pydantic_models.UserWithTeamsAndTasks.from_orm(user_model)
+        for user_row in user_rows:
             user_list.append(
                 {
-                    'name': pydantic_user_model.user_name,
-                    'display_name': pydantic_user_model.user_display_name,
-                    'creation_time': str(pydantic_user_model.create_time)
+                    'name': user_row.user_name,
+                    'display_name': user_row.user_display_name,
+                    'creation_time': str(user_row.create_time)
                 }
             )
         return json.dumps(user_list)
@@ -154,6 +158,12 @@ class UserService(UserBase):
             raise NoDataException
         else:
             LOGGER.info("Updated the user details")
+            if GRAPH_REPLICA.loaded:
+                user_model = self.common_dao.get_object(
+                    object_type=db_model.User,
+                    filter_condition=db_model.User.user_id == user_update_details['id']
+                )
+                self.common_dao.on_commit(lambda: GRAPH_REPLICA.put_user(user_model))
             return json.dumps(
                 {
                     'status': update_status
@@ -164,10 +174,13 @@ class UserService(UserBase):
 
         # deserialize json
         user_details = json.loads(request)
-        print(user_details)
+
+        if GRAPH_REPLICA.loaded:
+            return json.dumps(GRAPH_REPLICA.get_user_teams(user_details['id']))
+
         user_model = self.common_dao.get_object(
             object_type=db_model.User,
-            filter_condition=db_model.Team.team_id == user_details['id']
+            filter_condition=db_model.User.user_id == user_details['id']
         )
         if user_model is None:
             return json.dumps(
@@ -189,6 +202,32 @@ class UserService(UserBase):
         return json.dumps(user_teams)
 
 
+    def get_users_teams(self, request: str) -> str:
+        """
+        :param request: A json string with the user identifiers
+        {
+          "ids" : ["<user_id>", ...]
+        }
+
+        :return: A json string with the teams of every user, users without teams map to an empty list
+        {
+          "<user_id>" : [
+            {
+              "id" : "<team_id>",
+              "name" : "<team_name>",
+              "description" : "<some description>"
+            }
+          ]
+        }
+        """
+        # deserialize json
+        user_details = json.loads(request)
+
+        if len(user_details['ids']) > b_c.max_lookup_ids.value:
+            raise LimitOverflowException(f"Cannot look up more than {b_c.max_lookup_ids.value} users at once")
+
+        return json.dumps(get_membership_loader(self.db).load_user_teams(user_details['ids']))
+
 # if __name__ == '__main__':
 #     from database.database import session, engine
 #     from database import db_models
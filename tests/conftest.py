@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+# the app reads its settings and opens the engine at import, point it to a scratch database first
+_DB_DIR = tempfile.mkdtemp(prefix="factwise-tests-")
+os.environ["FACTWISE_DATABASE_URL"] = f"sqlite:///{_DB_DIR}/factwise_board.db"
+os.environ["FACTWISE_SQL_ECHO"] = "false"
+os.environ["FACTWISE_WARM_UP_ENABLED"] = "false"
+for _setting, _directory in (
+        ("FACTWISE_IMPORT_DIR", "imports"),
+        ("FACTWISE_BACKUP_DIR", "backups"),
+        ("FACTWISE_TENANT_DB_DIR", "tenants"),
+        ("FACTWISE_LOG_STORE_DIR", "log_store")
+):
+    os.environ[_setting] = f"{_DB_DIR}/{_directory}"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def unique_name():
+    """names are unique per live row, every test gets its own"""
+    return lambda prefix: f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def create_user(client, unique_name):
+    def create():
+        response = client.post('/user', json={'name': unique_name('user'), 'display_name': 'Test User'})
+        assert response.status_code == 200, response.text
+        return response.json()['id']
+    return create
+
+
+@pytest.fixture
+def create_team(client, unique_name, create_user):
+    def create():
+        response = client.post(
+            '/team', json={'name': unique_name('team'), 'description': 'test team', 'admin': create_user()}
+        )
+        assert response.status_code == 200, response.text
+        return response.json()['id']
+    return create
+
+
+@pytest.fixture
+def create_board_with_tasks(client, unique_name, create_user):
+    """a team with its admin, a board of the team and tasks on it assigned to the admin"""
+    def create(tasks):
+        user_id = create_user()
+        team_response = client.post(
+            '/team', json={'name': unique_name('team'), 'description': 'test team', 'admin': user_id}
+        )
+        assert team_response.status_code == 200, team_response.text
+        team_id = team_response.json()['id']
+        board_response = client.post(
+            '/board', json={'name': unique_name('board'), 'description': 'test board', 'team_id': team_id}
+        )
+        assert board_response.status_code == 200, board_response.text
+        board_id = board_response.json()['id']
+        task_ids = []
+        for _ in range(tasks):
+            task_response = client.post(
+                '/board/task',
+                json={
+                    'title': unique_name('task'), 'description': 'test task', 'board_id': board_id, 'user_id': user_id
+                }
+            )
+            assert task_response.status_code == 200, task_response.text
+            task_ids.append(task_response.json()['id'])
+        return team_id, board_id, task_ids
+    return create
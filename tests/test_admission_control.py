@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils.admission_control import AdmissionController, AdmissionControlMiddleware, CLOSED_RETRY_AFTER
+
+
+@pytest.fixture
+def admitted(client):
+    """a client of the app behind admission control with limits of its own, configured by the test"""
+    controller = AdmissionController()
+    return controller, TestClient(AdmissionControlMiddleware(main.app, controller))
+
+
+def _new_user(admitted_client, unique_name):
+    return admitted_client.post('/user', json={'name': unique_name('user'), 'display_name': 'Test User'})
+
+
+def test_writes_over_the_rate_are_rejected_with_429(admitted, unique_name):
+    controller, admitted_client = admitted
+    controller.configure(['/user'], rate=0.01, burst=2, max_in_flight=10, overrides={})
+
+    statuses = [_new_user(admitted_client, unique_name).status_code for _ in range(3)]
+    rejected = _new_user(admitted_client, unique_name)
+
+    assert statuses == [200, 200, 429]
+    assert rejected.status_code == 429
+    assert int(rejected.headers['Retry-After']) >= 1
+    # reads and the routers without limits are let through
+    assert admitted_client.get('/users').status_code == 200
+    assert admitted_client.post('/team', json={'name': unique_name('team'), 'description': 'd'}).status_code == 200
+    metrics = controller.metrics()['/user']
+    assert (metrics['admitted'], metrics['rate_limited'], metrics['in_flight']) == (2, 2, 0)
+
+
+def test_writes_over_the_in_flight_limit_are_rejected_with_503(admitted, unique_name):
+    controller, admitted_client = admitted
+    controller.configure(['/user'], rate=100, burst=100, max_in_flight=1, overrides={})
+    limits = controller.limits_for('/users/delete')
+    # a write of another request is being handled
+    limits.in_flight = 1
+
+    response = _new_user(admitted_client, unique_name)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert limits.metrics['overloaded'] == 1
+
+    limits.in_flight = 0
+    assert _new_user(admitted_client, unique_name).status_code == 200
+    assert limits.in_flight == 0 and limits.metrics['peak_in_flight'] == 1
+
+
+def test_router_with_a_rate_of_0_is_closed_to_writes(admitted, unique_name):
+    controller, admitted_client = admitted
+    controller.configure(['/user', '/team'], rate=100, burst=100, max_in_flight=10, overrides={'/team': {'rate': 0}})
+
+    response = admitted_client.post('/team', json={'name': unique_name('team'), 'description': 'd'})
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == str(int(CLOSED_RETRY_AFTER))
+    assert _new_user(admitted_client, unique_name).status_code == 200
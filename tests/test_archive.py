@@ -0,0 +1,60 @@
+import pytest
+
+from utils import export_board
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_board, 'EXPORT_DIR_PATH', tmp_path)
+    return tmp_path
+
+
+def _close_board(client, board_id, task_ids):
+    for task_id in task_ids:
+        assert client.put('/board/task', json={'id': task_id, 'status': 'COMPLETE'}).status_code == 200
+    assert client.get(f'/board/close/{board_id}').status_code == 200
+
+
+def test_closed_boards_are_moved_to_the_archive(client, create_board_with_tasks):
+    team_id, closed_board_id, closed_task_ids = create_board_with_tasks(2)
+    _, open_board_id, _ = create_board_with_tasks(1)
+    _close_board(client, closed_board_id, closed_task_ids)
+
+    response = client.post('/admin/archive/run', params={'days': 0})
+
+    assert response.status_code == 200, response.text
+    moved = response.json()
+    assert moved['boards_moved'] >= 1 and moved['tasks_moved'] >= 2
+    assert moved['hot_tasks_after'] == moved['hot_tasks_before'] - moved['tasks_moved']
+    assert client.get(f'/boards/{team_id}').json()['boards'] == []
+
+    archived = client.get(f'/board/archive/{closed_board_id}')
+    assert archived.status_code == 200, archived.text
+    assert archived.json()['status'] == 'CLOSED'
+    assert [task['id'] for task in archived.json()['tasks']] == closed_task_ids
+    assert {task['status'] for task in archived.json()['tasks']} == {'COMPLETE'}
+    # open boards stay in the hot tables
+    assert client.get(f'/board/archive/{open_board_id}').status_code == 404
+
+
+def test_archived_boards_stay_exportable(client, unique_name, create_user, export_dir):
+    user_id = create_user()
+    team_id = client.post(
+        '/team', json={'name': unique_name('team'), 'description': 'test team', 'admin': user_id}
+    ).json()['id']
+    task_titles = [unique_name('task'), unique_name('task')]
+    created = client.post('/board/with-tasks', json={
+        'name': unique_name('board'),
+        'description': 'test board',
+        'team_id': team_id,
+        'tasks': [{'title': title, 'description': 'test task', 'user_id': user_id} for title in task_titles]
+    }).json()
+    _close_board(client, created['id'], created['tasks'])
+    assert client.post('/admin/archive/run', params={'days': 0}).json()['boards_moved'] >= 1
+
+    response = client.get('/board/export', params={'board_id': created['id']})
+
+    assert response.status_code == 200, response.text
+    exported = (export_dir / response.json()['out_file']).read_text()
+    assert all(title in exported for title in task_titles)
+    assert 'CLOSED' in exported
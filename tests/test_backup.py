@@ -0,0 +1,87 @@
+import gzip
+import sqlite3
+
+import pytest
+
+from config import SETTINGS
+from database.backup import dump_database, restore_database
+from database.database import engine
+
+ADMIN_HEADERS = {'X-Admin-Token': 'backup-admin'}
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(SETTINGS, 'admin_token', ADMIN_HEADERS['X-Admin-Token'])
+
+
+def _rows(connection, statement, *parameters):
+    return connection.execute(statement, parameters).fetchall()
+
+
+def test_dump_restores_into_an_equal_database(client, create_board_with_tasks, tmp_path):
+    _, board_id, task_ids = create_board_with_tasks(2)
+    assert client.put('/board/task', json={'id': task_ids[0], 'status': 'IN_PROGRESS'}).status_code == 200
+    # the highest task id is deleted, the restored database must not hand it out again
+    assert client.delete(f'/board/task/{task_ids[1]}', params={'soft': False}).status_code == 200
+
+    dumped = dump_database(engine, str(tmp_path / 'dump.ndjson.gz'))
+    restored = restore_database(dumped['file'], str(tmp_path / 'restored.db'))
+
+    assert restored['rows'] == dumped['rows']
+    live = sqlite3.connect(SETTINGS.database_url[len('sqlite:///'):])
+    copy = sqlite3.connect(restored['file'])
+    try:
+        for statement in (
+                "SELECT * FROM tasks ORDER BY task_id",
+                "SELECT * FROM task_status_transitions ORDER BY transition_id",
+                "SELECT * FROM board_events ORDER BY event_seq",
+                "SELECT name, seq FROM sqlite_sequence ORDER BY name"
+        ):
+            assert _rows(copy, statement) == _rows(live, statement)
+        assert _rows(copy, "SELECT task_status FROM tasks WHERE task_id = ?", task_ids[0]) == [('IN_PROGRESS',)]
+
+        # indexes and triggers are created after the load
+        index_names = {name for name, in _rows(copy, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'uq_tasks_task_title_live' in index_names
+        copy.execute("UPDATE tasks SET task_status = 'COMPLETE' WHERE task_id = ?", (task_ids[0],))
+        assert _rows(
+            copy, "SELECT from_status, to_status FROM task_status_transitions WHERE task_id = ? "
+                  "ORDER BY transition_id DESC LIMIT 1", task_ids[0]
+        ) == [('IN_PROGRESS', 'COMPLETE')]
+        copy.execute(
+            "INSERT INTO tasks (task_title, board_id, task_status) VALUES ('after restore', ?, 'OPEN')", (board_id,)
+        )
+        assert _rows(copy, "SELECT max(task_id) FROM tasks")[0][0] > task_ids[1]
+    finally:
+        live.close()
+        copy.close()
+
+
+def test_truncated_dump_is_not_restored(client, create_board_with_tasks, tmp_path):
+    create_board_with_tasks(1)
+    dumped = dump_database(engine, str(tmp_path / 'dump.ndjson.gz'))
+    with gzip.open(dumped['file'], 'rt', encoding='utf-8') as dump:
+        lines = dump.readlines()
+    with gzip.open(tmp_path / 'truncated.ndjson.gz', 'wt', encoding='utf-8') as truncated:
+        truncated.writelines(lines[:-1])
+
+    with pytest.raises(ValueError, match="truncated"):
+        restore_database(str(tmp_path / 'truncated.ndjson.gz'), str(tmp_path / 'restored.db'))
+    assert not (tmp_path / 'restored.db').exists()
+
+
+def test_backup_routes_need_the_admin_token(client, admin_token):
+    for route in ('/admin/snapshot', '/admin/dump'):
+        assert client.post(route).status_code == 403
+        assert client.post(route, headers={'X-Admin-Token': 'wrong'}).status_code == 403
+
+    first = client.post('/admin/dump', headers=ADMIN_HEADERS)
+    second = client.post('/admin/dump', headers=ADMIN_HEADERS)
+
+    assert first.status_code == 200 and second.status_code == 200, (first.text, second.text)
+    # dumps asked for within the same second get their own file
+    assert first.json()['file'] != second.json()['file']
+    snapshot = client.post('/admin/snapshot', headers=ADMIN_HEADERS)
+    assert snapshot.status_code == 200, snapshot.text
+    assert sqlite3.connect(snapshot.json()['file']).execute("SELECT count(*) FROM tasks").fetchone()[0] > 0
@@ -0,0 +1,70 @@
+import pytest
+
+from services.event_service import EventService
+
+
+def _changes(client, board_id, **params):
+    response = client.get(f'/board/{board_id}/changes', params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_changes_list_the_board_events_in_order(client, create_board_with_tasks, create_user):
+    team_id, board_id, task_ids = create_board_with_tasks(2)
+    assert client.put('/board/task', json={'id': task_ids[0], 'status': 'IN_PROGRESS'}).status_code == 200
+    member_id = create_user()
+    assert client.post('/team/add_users', json={'id': team_id, 'users': [member_id]}).status_code == 200
+
+    feed = _changes(client, board_id)
+
+    assert [change['type'] for change in feed['changes']] == [
+        'TASK_ADDED', 'TASK_ADDED', 'TASK_STATUS_UPDATED', 'TEAM_USERS_ADDED'
+    ]
+    assert [change['object_id'] for change in feed['changes'][:3]] == [task_ids[0], task_ids[1], task_ids[0]]
+    assert feed['changes'][2]['payload']['status'] == 'IN_PROGRESS'
+    assert feed['changes'][3]['payload'] == {'users': [member_id]}
+    assert feed['last_seq'] == feed['changes'][-1]['seq']
+
+
+def test_changes_are_read_incrementally(client, create_board_with_tasks):
+    _, board_id, task_ids = create_board_with_tasks(3)
+    first_page = _changes(client, board_id, limit=2)
+    assert len(first_page['changes']) == 2
+
+    second_page = _changes(client, board_id, since=first_page['last_seq'])
+    assert [change['object_id'] for change in second_page['changes']] == [task_ids[2]]
+
+    assert _changes(client, board_id, since=second_page['last_seq']) == {
+        'changes': [], 'last_seq': second_page['last_seq']
+    }
+
+
+def test_other_boards_do_not_show_up(client, create_board_with_tasks):
+    _, board_id, _ = create_board_with_tasks(1)
+    create_board_with_tasks(1)
+
+    assert {change['board_id'] for change in _changes(client, board_id)['changes']} == {board_id}
+
+
+def test_a_task_is_not_added_without_its_event(client, create_board_with_tasks, unique_name, monkeypatch):
+    team_id, board_id, _ = create_board_with_tasks(1)
+    last_seq = _changes(client, board_id)['last_seq']
+    user_id = client.get(f'/team/{team_id}').json()['admin']
+
+    def failing_record_event(*args, **kwargs):
+        raise RuntimeError("event store unavailable")
+
+    monkeypatch.setattr(EventService, 'record_event', failing_record_event)
+    with pytest.raises(RuntimeError):
+        client.post(
+            '/board/task',
+            json={'title': unique_name('task'), 'description': 'd', 'board_id': board_id, 'user_id': user_id}
+        )
+    monkeypatch.undo()
+
+    assert _changes(client, board_id, since=last_seq)['changes'] == []
+    assert len(client.get(f'/boards/{team_id}').json()['boards'][0]['tasks']) == 1
+
+
+def test_changes_of_an_unknown_board(client):
+    assert client.get('/board/999999/changes').status_code == 404
@@ -0,0 +1,101 @@
+import pytest
+
+from database import db_models as db_model
+from database.database import session
+from daos.common_dao import CommonDao
+
+
+def _team_boards(client, team_id):
+    response = client.get(f'/boards/{team_id}')
+    assert response.status_code == 200, response.text
+    return {board['name']: board for board in response.json()['boards']}
+
+
+def test_board_is_created_with_its_tasks(client, unique_name, create_user):
+    user_id = create_user()
+    team_id = client.post(
+        '/team', json={'name': unique_name('team'), 'description': 'test team', 'admin': user_id}
+    ).json()['id']
+    board_name = unique_name('board')
+
+    response = client.post('/board/with-tasks', json={
+        'name': board_name,
+        'description': 'test board',
+        'team_id': team_id,
+        'tasks': [
+            {'title': unique_name('task'), 'description': 'test task', 'user_id': user_id} for _ in range(3)
+        ]
+    })
+
+    assert response.status_code == 200, response.text
+    created = response.json()
+    assert len(created['tasks']) == 3
+    assert _team_boards(client, team_id)[board_name]['tasks'] == created['tasks']
+    changes = client.get(f"/board/{created['id']}/changes").json()['changes']
+    assert [change['object_id'] for change in changes] == created['tasks']
+
+
+def test_failing_task_rolls_back_the_board_and_earlier_tasks(client, unique_name, create_user):
+    user_id = create_user()
+    team_id = client.post(
+        '/team', json={'name': unique_name('team'), 'description': 'test team', 'admin': user_id}
+    ).json()['id']
+    existing_title = unique_name('task')
+    assert client.post('/board/with-tasks', json={
+        'name': unique_name('board'),
+        'description': 'test board',
+        'team_id': team_id,
+        'tasks': [{'title': existing_title, 'description': 'test task', 'user_id': user_id}]
+    }).status_code == 200
+    board_name, first_title = unique_name('board'), unique_name('task')
+    request = {
+        'name': board_name,
+        'description': 'test board',
+        'team_id': team_id,
+        'tasks': [
+            {'title': first_title, 'description': 'test task', 'user_id': user_id},
+            {'title': existing_title, 'description': 'test task', 'user_id': user_id}
+        ]
+    }
+
+    response = client.post('/board/with-tasks', json=request)
+
+    assert response.status_code == 400, response.text
+    assert board_name not in _team_boards(client, team_id)
+    # neither the board name nor the first task title were taken
+    request['tasks'] = request['tasks'][:1]
+    assert client.post('/board/with-tasks', json=request).status_code == 200
+
+
+def test_nested_units_of_work_commit_once_and_roll_back_together(unique_name):
+    db = session()
+    common_dao = CommonDao(db)
+    committed = []
+    user_names = [unique_name('user'), unique_name('user')]
+    try:
+        with pytest.raises(RuntimeError):
+            with common_dao.unit_of_work():
+                common_dao.create_object(db_model.User(user_name=user_names[0], user_display_name='Test User'))
+                with common_dao.unit_of_work():
+                    common_dao.create_object(db_model.User(user_name=user_names[1], user_display_name='Test User'))
+                    common_dao.on_commit(lambda: committed.append(user_names[1]))
+                raise RuntimeError("fails after the nested unit of work")
+
+        assert committed == []
+        assert db.query(db_model.User).filter(db_model.User.user_name.in_(user_names)).count() == 0
+
+        with common_dao.unit_of_work():
+            common_dao.create_object(db_model.User(user_name=user_names[0], user_display_name='Test User'))
+            with common_dao.unit_of_work():
+                common_dao.on_commit(lambda: committed.append(user_names[0]))
+            # joined the outer unit of work, nothing is committed yet
+            assert committed == []
+        assert committed == [user_names[0]]
+    finally:
+        db.close()
+
+    db = session()
+    try:
+        assert db.query(db_model.User).filter(db_model.User.user_name.in_(user_names)).count() == 1
+    finally:
+        db.close()
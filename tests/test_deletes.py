@@ -0,0 +1,105 @@
+from sqlalchemy import func, select
+
+from constants.constraint_constants import BatchConstraints
+from database import db_models as db_model
+from database.database import session
+
+TASKS = db_model.Task.__table__
+BOARDS = db_model.Board.__table__
+TRANSITIONS = db_model.TaskStatusTransition.__table__
+EVENTS = db_model.BoardEvent.__table__
+
+
+def _count(table, condition):
+    # Core statements on the tables see soft deleted rows too
+    db = session()
+    try:
+        return db.execute(select(func.count()).select_from(table).where(condition)).scalar()
+    finally:
+        db.close()
+
+
+def _board_tasks(client, team_id):
+    return {board['id']: board['tasks'] for board in client.get(f'/boards/{team_id}').json()['boards']}
+
+
+def test_soft_deleted_task_is_hidden_and_frees_its_title(client, create_board_with_tasks, create_user):
+    team_id, board_id, task_ids = create_board_with_tasks(2)
+    title = client.get(f'/board/{board_id}/changes').json()['changes'][0]['payload']['title']
+
+    response = client.delete(f'/board/task/{task_ids[0]}')
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {'soft': True, 'deleted': {'tasks': 1}}
+    assert _board_tasks(client, team_id)[board_id] == task_ids[1:]
+    assert client.delete(f'/board/task/{task_ids[0]}').status_code == 404
+    # the row and its history stay, marked deleted
+    assert _count(TASKS, (TASKS.c.task_id == task_ids[0]) & TASKS.c.deleted_at.isnot(None)) == 1
+    assert _count(TRANSITIONS, TRANSITIONS.c.task_id == task_ids[0]) == 1
+    assert client.post('/board/task', json={
+        'title': title, 'description': 'test task', 'board_id': board_id, 'user_id': create_user()
+    }).status_code == 200
+
+
+def test_hard_deleted_board_takes_its_tasks_history_and_events(client, create_board_with_tasks):
+    team_id, board_id, task_ids = create_board_with_tasks(2)
+    assert client.put('/board/task', json={'id': task_ids[0], 'status': 'IN_PROGRESS'}).status_code == 200
+
+    response = client.delete(f'/board/{board_id}', params={'soft': False})
+
+    assert response.status_code == 200, response.text
+    deleted = response.json()['deleted']
+    assert (deleted['boards'], deleted['tasks'], deleted['task_status_transitions']) == (1, 2, 3)
+    assert deleted['board_events'] == 3
+    assert _board_tasks(client, team_id) == {}
+    assert _count(BOARDS, BOARDS.c.board_id == board_id) == 0
+    assert _count(TASKS, TASKS.c.board_id == board_id) == 0
+    assert _count(TRANSITIONS, TRANSITIONS.c.task_id.in_(task_ids)) == 0
+    assert _count(EVENTS, EVENTS.c.board_id == board_id) == 0
+
+
+def test_soft_deleted_team_hides_its_boards_and_tasks(client, create_board_with_tasks):
+    team_id, board_id, task_ids = create_board_with_tasks(2)
+
+    response = client.delete(f'/team/{team_id}')
+
+    assert response.status_code == 200, response.text
+    assert response.json()['deleted'] == {'boards': 1, 'tasks': 2, 'teams': 1}
+    assert client.get(f'/team/{team_id}').status_code == 404
+    assert _board_tasks(client, team_id) == {}
+    assert _count(TASKS, TASKS.c.task_id.in_(task_ids) & TASKS.c.deleted_at.isnot(None)) == 2
+
+
+def test_deleted_users_leave_their_teams(client, create_board_with_tasks, create_user):
+    team_id, board_id, _ = create_board_with_tasks(0)
+    member_id, soft_user_id, hard_user_id = create_user(), create_user(), create_user()
+    user_names = {user_id: client.get(f'/user/{user_id}').json()['name'] for user_id in (soft_user_id, hard_user_id)}
+    added = client.post('/team/add_users', json={'id': team_id, 'users': [member_id, soft_user_id, hard_user_id]})
+    assert added.status_code == 200, added.text
+    task_id = client.post('/board/task', json={
+        'title': f'task-of-{hard_user_id}', 'description': 'd', 'board_id': board_id, 'user_id': hard_user_id
+    }).json()['id']
+
+    assert client.delete(f'/user/{soft_user_id}').json()['deleted'] == {'users_to_teams': 1, 'users': 1}
+    hard_deleted = client.delete(f'/user/{hard_user_id}', params={'soft': False}).json()['deleted']
+
+    assert hard_deleted['users'] == 1 and hard_deleted['tasks_unassigned'] == 1
+    assert client.get(f'/user/{soft_user_id}').status_code == 404
+    team_user_names = {user['name'] for user in client.get(f'/team/users/{team_id}').json()['users']}
+    assert len(team_user_names) == 1 and team_user_names.isdisjoint(user_names.values())
+    db = session()
+    try:
+        assert db.get(db_model.Team, team_id).member_count == 1
+        assert db.get(db_model.Task, task_id).task_assign_id is None
+    finally:
+        db.close()
+    # the soft deleted name can be taken again
+    assert client.post('/user', json={'name': user_names[soft_user_id], 'display_name': 'Test User'}).status_code == 200
+
+
+def test_bulk_deletes_are_limited(client):
+    ids = list(range(1, BatchConstraints.max_delete_ids.value + 2))
+
+    for route in ('/board/tasks/delete', '/boards/delete', '/users/delete', '/teams/delete'):
+        response = client.post(route, json={'ids': ids})
+        assert response.status_code == 400, (route, response.text)
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from utils.event_broker import EVENT_BROKER, EventBroker, board_topic, team_topic
+
+
+@pytest.fixture
+def loop():
+    event_loop = asyncio.new_event_loop()
+    yield event_loop
+    event_loop.close()
+
+
+def _received(loop, subscription):
+    # deliveries are scheduled on the loop of the subscriber
+    loop.run_until_complete(asyncio.sleep(0))
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+
+def test_subscribers_get_the_messages_of_their_topics_once(loop):
+    broker = EventBroker()
+    board_subscription = broker.subscribe([board_topic(1)], loop)
+    both_subscription = broker.subscribe([board_topic(1), team_topic(7)], loop)
+
+    assert broker.publish([board_topic(1), team_topic(7)], {'seq': 1}) == 2
+    assert broker.publish([board_topic(2), team_topic(8)], {'seq': 2}) == 0
+
+    assert _received(loop, board_subscription) == [{'seq': 1}]
+    assert _received(loop, both_subscription) == [{'seq': 1}]
+
+
+def test_unsubscribed_and_closed_subscribers_get_nothing(loop):
+    broker = EventBroker()
+    subscription = broker.subscribe([board_topic(1)], loop)
+    broker.unsubscribe(subscription)
+    assert broker.publish([board_topic(1)], {'seq': 1}) == 0
+    assert not broker.has_subscribers()
+
+    closed_loop = asyncio.new_event_loop()
+    broker.subscribe([board_topic(1)], closed_loop)
+    closed_loop.close()
+    broker.publish([board_topic(1)], {'seq': 2})
+    assert not broker.has_subscribers()
+
+
+def test_slow_subscribers_lose_their_oldest_messages(loop):
+    broker = EventBroker(max_queue_size=2)
+    subscription = broker.subscribe([board_topic(1)], loop)
+
+    for seq in range(5):
+        broker.publish([board_topic(1)], {'seq': seq})
+
+    assert _received(loop, subscription) == [{'seq': 3}, {'seq': 4}]
+    assert subscription.dropped == 3
+
+
+def test_committed_task_changes_are_published(client, create_board_with_tasks, loop):
+    team_id, board_id, task_ids = create_board_with_tasks(1)
+    subscription = EVENT_BROKER.subscribe([board_topic(board_id)], loop)
+    try:
+        assert client.put('/board/task', json={'id': task_ids[0], 'status': 'COMPLETE'}).status_code == 200
+        assert client.get(f'/board/close/{board_id}').status_code == 200
+    finally:
+        EVENT_BROKER.unsubscribe(subscription)
+
+    events = _received(loop, subscription)
+    assert [(event['type'], event['team_id']) for event in events] == [
+        ('TASK_STATUS_UPDATED', team_id), ('BOARD_CLOSED', team_id)
+    ]
+    assert events[0]['object_id'] == task_ids[0]
+
+
+def test_subscribing_needs_a_topic(client):
+    assert client.get('/board/subscribe').status_code == 400
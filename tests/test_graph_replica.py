@@ -0,0 +1,58 @@
+import pytest
+
+from database.database import session
+from daos.graph_replica import GRAPH_REPLICA
+
+
+@pytest.fixture
+def replica():
+    db = session()
+    try:
+        GRAPH_REPLICA.load(db)
+    finally:
+        db.close()
+    yield GRAPH_REPLICA
+    GRAPH_REPLICA.loaded = False
+    GRAPH_REPLICA._reset()
+
+
+def _reads(client, team_id, user_id):
+    return (
+        client.get(f'/team/{team_id}').json(),
+        client.get(f'/team/users/{team_id}').json(),
+        client.get(f'/user/teams/{user_id}').json(),
+        client.get(f'/boards/{team_id}').json()
+    )
+
+
+def _assert_consistent(client):
+    verification = client.get('/admin/replica/verify').json()
+    assert verification['consistent'], verification['mismatches']
+
+
+def test_replica_follows_the_writes(client, replica, create_board_with_tasks, create_user):
+    team_id, board_id, task_ids = create_board_with_tasks(3)
+    members = [create_user() for _ in range(3)]
+    assert client.post('/team/add_users', json={'id': team_id, 'users': members}).status_code == 200
+    assert client.post('/team/remove_users', json={'id': team_id, 'users': members[:1]}).status_code == 200
+    assert client.delete(f'/board/task/{task_ids[0]}').status_code == 200
+    assert client.delete(f'/board/task/{task_ids[1]}', params={'soft': False}).status_code == 200
+    assert client.delete(f'/user/{members[1]}').status_code == 200
+    _assert_consistent(client)
+
+    replica_reads = _reads(client, team_id, members[2])
+    replica.loaded = False
+    assert _reads(client, team_id, members[2]) == replica_reads
+    assert replica_reads[3]['boards'][0]['tasks'] == [task_ids[2]]
+
+
+def test_deleting_a_team_drops_only_its_nodes(client, replica, create_board_with_tasks):
+    team_id, _, _ = create_board_with_tasks(1)
+    other_team_id, other_board_id, other_task_ids = create_board_with_tasks(2)
+
+    assert client.delete(f'/team/{team_id}').status_code == 200
+
+    _assert_consistent(client)
+    assert client.get(f'/team/{team_id}').status_code == 404
+    boards = client.get(f'/boards/{other_team_id}').json()['boards']
+    assert [(board['id'], board['tasks']) for board in boards] == [(other_board_id, other_task_ids)]
@@ -0,0 +1,88 @@
+import pytest
+
+from config import SETTINGS
+from database import db_models as db_model
+from database.database import session
+from services.import_service import ImportService
+
+HEADER = "team_name,board_name,board_description,task_title,task_description,user_name,task_status\n"
+
+
+@pytest.fixture
+def team_and_user(client, unique_name):
+    user_name, team_name = unique_name('user'), unique_name('team')
+    user_id = client.post('/user', json={'name': user_name, 'display_name': 'Importer'}).json()['id']
+    assert client.post('/team', json={'name': team_name, 'description': 'd', 'admin': user_id}).status_code == 200
+    return team_name, user_name
+
+
+def _tasks(titles):
+    db = session()
+    try:
+        return {
+            task.task_title: task.task_status
+            for task in db.query(db_model.Task).filter(db_model.Task.task_title.in_(titles))
+        }
+    finally:
+        db.close()
+
+
+def test_import_rejects_unknown_statuses(client, unique_name, team_and_user):
+    team_name, user_name = team_and_user
+    board_name = unique_name('board')
+    titles = [unique_name('task') for _ in range(4)]
+    rows = [
+        f"{team_name},{board_name},d,{title},d,{user_name},{status}\n"
+        for title, status in zip(titles, ["", "IN_PROGRESS", "DONE", "complete"])
+    ]
+
+    response = client.post('/import', params={'format': 'csv'}, data=(HEADER + "".join(rows)).encode())
+
+    assert response.status_code == 200, response.text
+    assert response.json()['imported'] == 2
+    assert response.json()['rejected'] == 2
+    assert _tasks(titles) == {titles[0]: 'OPEN', titles[1]: 'IN_PROGRESS'}
+
+
+def test_import_reads_utf8(client, unique_name, team_and_user):
+    team_name, user_name = team_and_user
+    title = unique_name('tâche-ü')
+
+    response = client.post(
+        '/import', params={'format': 'csv'},
+        data=(HEADER + f"{team_name},{unique_name('board')},Übersicht,{title},d,{user_name},\n").encode('utf-8')
+    )
+
+    assert response.json()['imported'] == 1
+    assert title in _tasks([title])
+
+
+def test_failed_import_resumes_after_the_last_committed_chunk(client, unique_name, team_and_user, monkeypatch):
+    team_name, user_name = team_and_user
+    board_name = unique_name('board')
+    titles = [unique_name('task') for _ in range(10)]
+    body = (HEADER + "".join(f"{team_name},{board_name},d,{title},d,{user_name},\n" for title in titles)).encode()
+    import_id = unique_name('import')
+    monkeypatch.setattr(SETTINGS, 'import_chunk_size', 3)
+
+    import_chunk = ImportService._import_chunk
+    calls = []
+
+    def failing_import_chunk(service, rows):
+        calls.append(len(rows))
+        if len(calls) == 3:
+            raise RuntimeError("disk gone")
+        return import_chunk(service, rows)
+
+    monkeypatch.setattr(ImportService, '_import_chunk', failing_import_chunk)
+    with pytest.raises(RuntimeError):
+        client.post('/import', params={'format': 'csv', 'import_id': import_id}, data=body)
+    assert set(_tasks(titles)) == set(titles[:6])
+
+    monkeypatch.setattr(ImportService, '_import_chunk', import_chunk)
+    response = client.post('/import', params={'format': 'csv', 'import_id': import_id}, data=body)
+
+    assert response.status_code == 200, response.text
+    summary = response.json()
+    assert (summary['rows_done'], summary['imported'], summary['rejected']) == (10, 10, 0)
+    assert set(_tasks(titles)) == set(titles)
@@ -0,0 +1,88 @@
+from typing import NamedTuple
+
+import pytest
+
+from database import db_models as db_model
+from daos.log_storage_backend import LogStorageBackend
+from daos.storage_backend import StorageBackend
+from custom_exceptions.constraint_exception import ObjectAlreadyPresentException
+
+
+class UserRow(NamedTuple):
+    user_id: int
+    user_name: str
+    user_display_name: str
+
+
+def _open(directory, compact_every=1000):
+    log_store = LogStorageBackend(str(directory), compact_every=compact_every, fsync=False)
+    log_store.load()
+    return log_store
+
+
+def _users(log_store):
+    return log_store.get_rows(UserRow, db_model.User)
+
+
+def test_storage_backend_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+
+def test_rows_are_replayed_from_the_log(tmp_path):
+    log_store = _open(tmp_path)
+    for name in ("ann", "bob", "cid"):
+        log_store.create_object(db_model.User(user_name=name, user_display_name=name.title()))
+    assert log_store.update_object(db_model.User, db_model.User.user_name == "bob", {'user_display_name': "Bobby"}) == 1
+    team = log_store.create_object(db_model.Team(team_name="core", description="d", team_admin=1))
+    log_store.close()
+
+    reopened = _open(tmp_path)
+
+    assert _users(reopened) == [(1, "ann", "Ann"), (2, "bob", "Bobby"), (3, "cid", "Cid")]
+    reopened_team = reopened.get_object(db_model.Team, db_model.Team.team_id == team.team_id)
+    assert reopened_team.member_count == 0 and reopened_team.create_time is not None
+    assert reopened.create_object(db_model.User(user_name="dan", user_display_name="Dan")).user_id == 4
+    reopened.close()
+
+
+def test_unique_columns_stay_unique_after_replay(tmp_path):
+    log_store = _open(tmp_path)
+    log_store.create_object(db_model.User(user_name="ann", user_display_name="Ann"))
+    log_store.close()
+
+    reopened = _open(tmp_path)
+    with pytest.raises(ObjectAlreadyPresentException):
+        reopened.create_object(db_model.User(user_name="ann", user_display_name="Other"))
+    reopened.close()
+
+
+def test_compaction_writes_a_snapshot_and_empties_the_log(tmp_path):
+    log_store = _open(tmp_path, compact_every=4)
+    for index in range(6):
+        log_store.create_object(db_model.User(user_name=f"user-{index}", user_display_name="User"))
+    log_store.update_object(db_model.User, db_model.User.user_id == 1, {'user_display_name': "First"})
+    log_store.close()
+
+    assert (tmp_path / "users.snapshot").read_text().count("\n") == 4
+    assert (tmp_path / "users.log").read_text().count("\n") == 3
+    reopened = _open(tmp_path, compact_every=4)
+    assert [user.user_display_name for user in _users(reopened)] == ["First"] + ["User"] * 5
+    reopened.close()
+
+
+def test_a_torn_record_at_the_end_of_the_log_is_dropped(tmp_path):
+    log_store = _open(tmp_path)
+    log_store.create_object(db_model.User(user_name="ann", user_display_name="Ann"))
+    log_store.close()
+    with open(tmp_path / "users.log", 'a') as log_file:
+        log_file.write('{"op": "put", "row": {"user_id": 2, "user_na')
+
+    reopened = _open(tmp_path)
+    assert _users(reopened) == [(1, "ann", "Ann")]
+    reopened.create_object(db_model.User(user_name="bob", user_display_name="Bob"))
+    reopened.close()
+
+    reopened = _open(tmp_path)
+    assert _users(reopened) == [(1, "ann", "Ann"), (2, "bob", "Bob")]
+    reopened.close()
@@ -0,0 +1,93 @@
+import json
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from database import db_models as db_model
+from database.database import engine, session
+from daos.common_dao import CommonDao
+from services.team_service import TeamService
+
+# team, cap update, new members, membership insert, event with its team from the identity map
+# and three table versions of the response cache
+ADD_USERS_STATEMENTS = 8
+
+
+@contextmanager
+def count_statements():
+    """counts the SQL statements sent to the database inside the block, connection setup pragmas excluded"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith("PRAGMA"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def db():
+    db_session = session()
+    yield db_session
+    db_session.close()
+
+
+def test_get_object_by_primary_key_is_served_from_the_identity_map(db, create_team):
+    team_id = create_team()
+    common_dao = CommonDao(db)
+
+    with count_statements() as statements:
+        # the identity map holds rows weakly, like a service the test keeps the loaded row
+        team_model = common_dao.get_object(db_model.Team, db_model.Team.team_id == team_id)
+        for _ in range(5):
+            assert common_dao.get_object(db_model.Team, db_model.Team.team_id == team_id) is team_model
+
+    assert len(statements) == 1
+
+
+def test_unique_name_lookups_are_served_from_the_request_cache(db, create_team):
+    team_id = create_team()
+    common_dao = CommonDao(db)
+    team_model = common_dao.get_object(db_model.Team, db_model.Team.team_id == team_id)
+    admin_model = common_dao.get_object(db_model.User, db_model.User.user_id == team_model.team_admin)
+
+    with count_statements() as statements:
+        for _ in range(5):
+            assert common_dao.get_object(db_model.Team, db_model.Team.team_name == team_model.team_name) is team_model
+            assert common_dao.get_object(
+                db_model.User, db_model.User.user_name == admin_model.user_name
+            ) is admin_model
+
+    assert statements == []
+
+
+def test_unknown_names_are_not_cached(db, client, unique_name):
+    common_dao = CommonDao(db)
+    user_name = unique_name('user')
+    assert common_dao.get_object(db_model.User, db_model.User.user_name == user_name) is None
+
+    client.post('/user', json={'name': user_name, 'display_name': 'Test User'})
+
+    assert common_dao.get_object(db_model.User, db_model.User.user_name == user_name) is not None
+
+
+def test_add_users_to_team_statement_count(db, create_team, create_user):
+    team_id = create_team()
+    user_ids = [create_user() for _ in range(10)]
+    team_service = TeamService(db)
+
+    with count_statements() as statements:
+        team_service.add_users_to_team(json.dumps({'id': team_id, 'users': user_ids}))
+
+    assert len(statements) == ADD_USERS_STATEMENTS, statements
+
+    # the same statements for one user, none of them runs per user
+    new_user_id = create_user()
+    with count_statements() as statements:
+        team_service.add_users_to_team(json.dumps({'id': team_id, 'users': [new_user_id]}))
+    assert len(statements) == ADD_USERS_STATEMENTS, statements
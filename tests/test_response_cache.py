@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from config import SETTINGS
+from database.database import session
+from services.import_service import ImportService
+
+
+@pytest.fixture(autouse=True)
+def response_cache(monkeypatch):
+    monkeypatch.setattr(SETTINGS, 'response_cache_enabled', True)
+
+
+def _metrics(client):
+    return client.get('/admin/response-cache/metrics').json()
+
+
+def _user_names(client):
+    response = client.get('/users')
+    assert response.status_code == 200, response.text
+    return {user['name']: user['display_name'] for user in response.json()['users']}
+
+
+def test_user_list_is_served_from_the_cache_until_users_change(client, create_user):
+    user_id = create_user()
+    user_name = client.get(f'/user/{user_id}').json()['name']
+    _user_names(client)
+    hits = _metrics(client)['hits']
+
+    assert user_name in _user_names(client)
+    assert _metrics(client)['hits'] == hits + 1
+
+    assert client.put(
+        '/user', json={'id': user_id, 'user': {'name': user_name, 'display_name': 'Renamed'}}
+    ).status_code == 200
+    assert _user_names(client)[user_name] == 'Renamed'
+
+    new_user_id = create_user()
+    assert client.get(f'/user/{new_user_id}').json()['name'] in _user_names(client)
+
+    assert client.delete(f'/user/{user_id}').status_code == 200
+    assert user_name not in _user_names(client)
+
+
+def test_board_list_follows_task_writes(client, create_board_with_tasks, create_user, unique_name):
+    team_id, board_id, task_ids = create_board_with_tasks(1)
+
+    def board_tasks():
+        return client.get(f'/boards/{team_id}').json()['boards'][0]['tasks']
+
+    assert board_tasks() == task_ids
+    hits = _metrics(client)['hits']
+    assert board_tasks() == task_ids
+    assert _metrics(client)['hits'] == hits + 1
+
+    added = client.post('/board/task', json={
+        'title': unique_name('task'), 'description': 'test task', 'board_id': board_id, 'user_id': create_user()
+    }).json()['id']
+    assert board_tasks() == task_ids + [added]
+
+    assert client.delete(f'/board/task/{task_ids[0]}').status_code == 200
+    assert board_tasks() == [added]
+
+
+def test_writes_outside_of_the_routes_invalidate_the_cache(client, create_board_with_tasks, unique_name, tmp_path):
+    team_id, board_id, task_ids = create_board_with_tasks(1)
+    team_name = client.get(f'/team/{team_id}').json()['name']
+    assert client.get(f'/boards/{team_id}').json()['boards'][0]['tasks'] == task_ids
+    user_name = unique_name('user')
+    assert client.post('/user', json={'name': user_name, 'display_name': 'Importer'}).status_code == 200
+    board_name = client.get(f'/boards/{team_id}').json()['boards'][0]['name']
+    import_path = str(tmp_path / 'tasks.ndjson')
+    with open(import_path, 'w', encoding='utf-8') as import_file:
+        import_file.write(json.dumps({
+            'team_name': team_name, 'board_name': board_name, 'task_title': unique_name('task'), 'user_name': user_name
+        }) + "\n")
+
+    # the bulk import writes with Core statements on its own session
+    db = session()
+    try:
+        summary = json.loads(ImportService(db).import_file(
+            json.dumps({'path': import_path, 'format': 'ndjson', 'import_id': unique_name('cache')})
+        ))
+    finally:
+        db.close()
+
+    assert summary['imported'] == 1, summary
+    assert len(client.get(f'/boards/{team_id}').json()['boards'][0]['tasks']) == 2
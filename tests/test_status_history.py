@@ -0,0 +1,26 @@
+def test_soft_deleted_tasks_leave_the_time_in_status(client, create_board_with_tasks):
+    team_id, board_id, task_ids = create_board_with_tasks(3)
+    for task_id in task_ids:
+        assert client.put('/board/task', json={'id': task_id, 'status': 'IN_PROGRESS'}).status_code == 200
+
+    assert client.delete(f'/board/task/{task_ids[0]}').status_code == 200
+
+    for path in (f'/board/{board_id}/status-times', f'/team/{team_id}/status-times'):
+        statuses = client.get(path).json()['statuses']
+        assert statuses['OPEN']['stays'] == 2, path
+        assert statuses['IN_PROGRESS']['current'] == 2, path
+    exported = client.get('/board/status-history/export', params={'board_id': board_id}).text
+    assert {line.split(',')[1] for line in exported.splitlines()[1:]} == {str(task_id) for task_id in task_ids[1:]}
+
+
+def test_archiving_drops_the_history_of_soft_deleted_tasks(client, create_board_with_tasks):
+    team_id, board_id, task_ids = create_board_with_tasks(2)
+    assert client.delete(f'/board/task/{task_ids[0]}').status_code == 200
+    assert client.put('/board/task', json={'id': task_ids[1], 'status': 'COMPLETE'}).status_code == 200
+    assert client.get(f'/board/close/{board_id}').status_code == 200
+
+    assert client.post('/admin/archive/run', params={'days': 0}).status_code == 200
+
+    assert client.get(f'/board/archive/{board_id}').json()['tasks'][0]['id'] == task_ids[1]
+    exported = client.get('/board/status-history/export', params={'team_id': team_id}).text
+    assert {line.split(',')[1] for line in exported.splitlines()[1:]} == {str(task_ids[1])}
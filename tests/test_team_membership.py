@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func
+
+from database import db_models as db_model
+from database.database import session
+
+
+def _member_counts(team_id):
+    db = session()
+    try:
+        member_count = db.query(db_model.Team.member_count).filter(db_model.Team.team_id == team_id).scalar()
+        memberships = db.query(func.count()).select_from(db_model.user_team_association).filter(
+            db_model.user_team_association.c.team_id == team_id
+        ).scalar()
+        return member_count, memberships
+    finally:
+        db.close()
+
+
+def test_member_count_matches_memberships_after_concurrent_adds_and_removes(client, create_team, create_user):
+    team_id = create_team()
+    user_ids = [create_user() for _ in range(30)]
+
+    def add(users):
+        return client.post('/team/add_users', json={'id': team_id, 'users': users}).status_code
+
+    def remove(users):
+        return client.post('/team/remove_users', json={'id': team_id, 'users': users}).status_code
+
+    # overlapping requests, the same users are added and removed by several of them at once
+    calls = []
+    for start in range(0, len(user_ids), 3):
+        users = user_ids[start:start + 6]
+        calls += [(add, users), (remove, users[:2]), (add, users[1:4]), (remove, users[3:])]
+
+    with ThreadPoolExecutor(16) as executor:
+        statuses = list(executor.map(lambda call: call[0](call[1]), calls))
+
+    assert set(statuses) == {200}
+    member_count, memberships = _member_counts(team_id)
+    assert member_count == memberships
+
+
+def test_concurrent_adds_do_not_overshoot_the_cap(client, create_team, create_user):
+    team_id = create_team()
+    user_ids = [create_user() for _ in range(60)]
+
+    with ThreadPoolExecutor(12) as executor:
+        statuses = list(executor.map(
+            lambda start: client.post(
+                '/team/add_users', json={'id': team_id, 'users': user_ids[start:start + 5]}
+            ).status_code,
+            range(0, len(user_ids), 5)
+        ))
+
+    member_count, memberships = _member_counts(team_id)
+    assert member_count == memberships <= 50
+    assert statuses.count(200) == memberships // 5
+    assert set(statuses) <= {200, 403}
+
+
+def test_soft_deleted_user_is_not_added(client, create_team, create_user):
+    team_id = create_team()
+    live_user_id, deleted_user_id = create_user(), create_user()
+    assert client.delete(f'/user/{deleted_user_id}').status_code == 200
+
+    response = client.post('/team/add_users', json={'id': team_id, 'users': [live_user_id, deleted_user_id]})
+
+    assert response.status_code == 200
+    assert _member_counts(team_id) == (1, 1)
+    team_users = client.get(f'/team/users/{team_id}').json()['users']
+    assert len(team_users) == 1
@@ -0,0 +1,35 @@
+from sqlalchemy import bindparam, text
+
+from database.database import session
+
+
+def _move_update_time(task_ids, modifier):
+    """what a later edit of the tasks does to update_time"""
+    db = session()
+    try:
+        db.execute(
+            text("UPDATE tasks SET update_time = datetime('now', :modifier) WHERE task_id IN :task_ids").bindparams(
+                bindparam('task_ids', expanding=True)
+            ),
+            {'modifier': modifier, 'task_ids': task_ids}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_completion_time_is_taken_from_the_status_history(client, create_board_with_tasks):
+    team_id, board_id, task_ids = create_board_with_tasks(2)
+    for task_id in task_ids:
+        assert client.put('/board/task', json={'id': task_id, 'status': 'COMPLETE'}).status_code == 200
+    stats = client.get(f'/team/{team_id}/stats', params={'daily': True}).json()
+    assert stats['completed_tasks'] == 2
+    assert 0 <= stats['avg_completion_seconds'] < 60
+    [today] = stats['daily']
+    assert (today['tasks_created'], today['tasks_completed']) == (2, 2)
+
+    _move_update_time(task_ids, '+3 days')
+    later_stats = client.get(f'/team/{team_id}/stats', params={'daily': True}).json()
+
+    assert later_stats['avg_completion_seconds'] == stats['avg_completion_seconds']
+    assert later_stats['daily'] == stats['daily']
@@ -0,0 +1,72 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import SETTINGS
+from utils.tenant_routing import TenantPathMiddleware
+
+ADMIN_HEADERS = {'X-Admin-Token': 'tenant-admin'}
+
+
+@pytest.fixture
+def tenant_client(client, monkeypatch):
+    """a client of the app behind the tenant path prefix, with tenant routing and the admin token enabled"""
+    monkeypatch.setattr(SETTINGS, 'tenant_routing_enabled', True)
+    monkeypatch.setattr(SETTINGS, 'admin_token', ADMIN_HEADERS['X-Admin-Token'])
+    return TestClient(TenantPathMiddleware(main.app))
+
+
+@pytest.fixture
+def tenant_id(tenant_client):
+    """a new provisioned tenant"""
+    new_tenant_id = f"tenant-{uuid.uuid4().hex[:8]}"
+    response = tenant_client.post(f'/admin/tenants/{new_tenant_id}', headers=ADMIN_HEADERS)
+    assert response.status_code == 201, response.text
+    return new_tenant_id
+
+
+def _user_names(response):
+    assert response.status_code == 200, response.text
+    return {user['name'] for user in response.json()['users']}
+
+
+def test_tenants_are_provisioned_by_the_admin(tenant_client, tenant_id):
+    assert tenant_client.post(f'/admin/tenants/{tenant_id}', headers=ADMIN_HEADERS).status_code == 409
+    assert tenant_client.post('/admin/tenants/other-tenant').status_code == 403
+    assert tenant_client.get('/admin/tenants', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert tenant_client.post('/admin/tenants/bad.tenant', headers=ADMIN_HEADERS).status_code == 400
+
+    tenants = tenant_client.get('/admin/tenants', headers=ADMIN_HEADERS).json()['tenants']
+
+    assert tenant_id in {tenant['tenant_id'] for tenant in tenants}
+    assert 'other-tenant' not in {tenant['tenant_id'] for tenant in tenants}
+
+
+def test_unknown_and_empty_tenants_are_rejected(tenant_client):
+    assert tenant_client.get('/tenants/unknown-tenant/users').status_code == 404
+    assert tenant_client.get('/users', headers={'X-Tenant-Id': 'unknown-tenant'}).status_code == 404
+    assert tenant_client.get('/tenants//users').status_code == 400
+    assert tenant_client.get('/users', headers={'X-Tenant-Id': ''}).status_code == 400
+
+
+def test_tenant_data_is_isolated(tenant_client, tenant_id, unique_name):
+    other_tenant_id = f"tenant-{uuid.uuid4().hex[:8]}"
+    assert tenant_client.post(f'/admin/tenants/{other_tenant_id}', headers=ADMIN_HEADERS).status_code == 201
+    path_user, header_user, default_user = unique_name('user'), unique_name('user'), unique_name('user')
+
+    assert tenant_client.post(
+        f'/tenants/{tenant_id}/user', json={'name': path_user, 'display_name': 'Path User'}
+    ).status_code == 200
+    assert tenant_client.post(
+        '/user', json={'name': header_user, 'display_name': 'Header User'}, headers={'X-Tenant-Id': tenant_id}
+    ).status_code == 200
+    assert tenant_client.post('/user', json={'name': default_user, 'display_name': 'Default User'}).status_code == 200
+
+    tenant_users = _user_names(tenant_client.get(f'/tenants/{tenant_id}/users'))
+    assert tenant_users == {path_user, header_user}
+    assert _user_names(tenant_client.get('/users', headers={'X-Tenant-Id': tenant_id})) == tenant_users
+    assert _user_names(tenant_client.get(f'/tenants/{other_tenant_id}/users')) == set()
+    default_users = _user_names(tenant_client.get('/users'))
+    assert default_user in default_users and default_users.isdisjoint(tenant_users)
@@ -0,0 +1,187 @@
+"""Admission control of write requests.
+
+Write requests (POST, PUT, PATCH, DELETE) to a limited router pass the in-flight limit of the router and
+the token bucket of their client address before they reach the handler. Requests over the in-flight limit
+are answered with 503 and requests over the rate with 429, both with Retry-After, so a busy worker sheds load
+right away instead of queueing them on the SQLite write lock. Limits and metrics are per worker process.
+
+There is no bucket per team: the app has no authenticated identity to take the team from, and a team named
+by the client (a header, a body field) would let any client drain the budget of another team.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional
+
+from starlette.responses import JSONResponse
+
+from logger import LOGGER
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+# token buckets kept per router, the least recently seen clients are dropped first
+MAX_TRACKED_CLIENTS = 10000
+# Retry-After of routers configured with a rate of 0, which closes them to writes
+CLOSED_RETRY_AFTER = 60.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """takes a token
+        :return: 0 when a token was taken, otherwise the seconds until the next one is available
+        :rtype: float
+        """
+        if self.rate <= 0:
+            return CLOSED_RETRY_AFTER
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RouterLimits:
+    """limits and rejection metrics of the write requests of one router"""
+
+    def __init__(self, prefix: str, rate: float, burst: int, max_in_flight: int):
+        self.prefix = prefix
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.metrics = {
+            'admitted': 0,
+            'rate_limited': 0,
+            'overloaded': 0,
+            'peak_in_flight': 0
+        }
+
+    def bucket(self, client: str) -> TokenBucket:
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            bucket = self.buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self.buckets) > MAX_TRACKED_CLIENTS:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(client)
+        return bucket
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'in_flight': self.in_flight,
+            'clients': len(self.buckets),
+            'rate': self.rate,
+            'burst': self.burst,
+            'max_in_flight': self.max_in_flight
+        }
+
+
+class AdmissionController:
+    def __init__(self):
+        self.routers: Dict[str, RouterLimits] = {}
+
+    def configure(
+            self,
+            router_prefixes: Iterable[str],
+            rate: float,
+            burst: int,
+            max_in_flight: int,
+            overrides: Dict[str, Dict[str, float]]
+    ):
+        """sets the limits of the given routers, replacing earlier ones
+        :param router_prefixes: prefixes of the limited routers, e.g. "/board"
+        :type router_prefixes: Iterable[str]
+        :param rate: write requests per second of a client address, 0 rejects every write
+        :type rate: float
+        :param burst: write requests a client address may send at once
+        :type burst: int
+        :param max_in_flight: write requests handled at the same time by a router
+        :type max_in_flight: int
+        :param overrides: rate, burst and max_in_flight per router prefix
+        :type overrides: Dict[str, Dict[str, float]]
+        """
+        self.routers = {}
+        for prefix in router_prefixes:
+            limits = {
+                'rate': rate,
+                'burst': burst,
+                'max_in_flight': max_in_flight,
+                **overrides.get(prefix, {})
+            }
+            self.routers[prefix] = RouterLimits(
+                prefix,
+                float(limits['rate']),
+                int(limits['burst']),
+                int(limits['max_in_flight'])
+            )
+        LOGGER.info(f"Admission control on writes to {', '.join(self.routers)}")
+
+    def limits_for(self, path: str) -> Optional[RouterLimits]:
+        # plural routes like /boards/... belong to the router with prefix /board
+        return self.routers.get("/" + path.split("/", 2)[1].rstrip("s"))
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {prefix: limits.report() for prefix, limits in self.routers.items()}
+
+
+ADMISSION_CONTROLLER = AdmissionController()
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying ADMISSION_CONTROLLER, the decision is made before the request body is read"""
+
+    def __init__(self, app, controller: AdmissionController = ADMISSION_CONTROLLER):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        limits = self.controller.limits_for(scope["path"])
+        if limits is None:
+            await self.app(scope, receive, send)
+            return
+
+        if limits.in_flight >= limits.max_in_flight:
+            limits.metrics['overloaded'] += 1
+            await _reject(503, "Too many write requests in progress, retry later", 1)(scope, receive, send)
+            return
+
+        retry_after = limits.bucket(_client(scope)).take()
+        if retry_after:
+            limits.metrics['rate_limited'] += 1
+            await _reject(429, "Write rate limit exceeded", retry_after)(scope, receive, send)
+            return
+
+        limits.metrics['admitted'] += 1
+        limits.in_flight += 1
+        limits.metrics['peak_in_flight'] = max(limits.metrics['peak_in_flight'], limits.in_flight)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limits.in_flight -= 1
+
+
+def _client(scope) -> str:
+    """peer address of the connection, behind a proxy uvicorn sets it from X-Forwarded-For with --proxy-headers"""
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {'detail': detail},
+        status_code=status_code,
+        headers={'Retry-After': str(max(1, math.ceil(retry_after)))}
+    )
@@ -0,0 +1,106 @@
+from typing import Dict, Iterator, List, TextIO, Tuple
+import csv
+import json
+import os
+from itertools import islice
+from pathlib import Path
+
+# columns of an import row, one row per task
+IMPORT_COLUMNS = (
+    'team_name',
+    'board_name',
+    'board_description',
+    'task_title',
+    'task_description',
+    'user_name',
+    'task_status'
+)
+REQUIRED_COLUMNS = ('team_name', 'board_name', 'task_title', 'user_name')
+
+
+def read_import_chunks(
+        stream: TextIO,
+        file_format: str,
+        chunk_size: int,
+        skip_rows: int = 0
+) -> Iterator[List[Dict[str, str]]]:
+    """ Util function reading import rows in chunks without loading the whole file
+    :param stream: text stream of the import file
+    :type stream: TextIO
+    :param file_format: "csv" with a header line or "ndjson" with one json object per line
+    :type file_format: str
+    :param chunk_size: rows per chunk
+    :type chunk_size: int
+    :param skip_rows: rows already imported, skipped when resuming
+    :type skip_rows: int
+    """
+    if file_format == "csv":
+        rows = csv.DictReader(stream)
+    elif file_format == "ndjson":
+        rows = (json.loads(line) for line in stream if line.strip())
+    else:
+        raise ValueError(f"Unknown import format: {file_format}")
+
+    rows = islice(rows, skip_rows, None)
+    while True:
+        chunk = [
+            {column: _text(row.get(column)) for column in IMPORT_COLUMNS}
+            for row in islice(rows, chunk_size)
+        ]
+        if not chunk:
+            return
+        yield chunk
+
+
+def find_invalid_rows(rows: List[Dict[str, str]], max_lengths: Dict[str, int]) -> Dict[int, str]:
+    """ Util function validating a chunk column by column with vectorized length checks
+    :param rows: import rows
+    :type rows: List[Dict[str, str]]
+    :param max_lengths: allowed length per column
+    :type max_lengths: Dict[str, int]
+    :return: reason per index of an invalid row
+    """
+    # only needed for imports, keep it out of the startup imports
+    import numpy as np
+
+    invalid_rows = {}
+    for column in IMPORT_COLUMNS:
+        values = np.array([row[column] for row in rows], dtype=str)
+        lengths = np.char.str_len(values)
+        if column in REQUIRED_COLUMNS:
+            for index in np.flatnonzero(lengths == 0):
+                invalid_rows.setdefault(int(index), f"{column} is missing")
+        if column in max_lengths:
+            for index in np.flatnonzero(lengths > max_lengths[column]):
+                invalid_rows.setdefault(int(index), f"{column} greater than allowed length of {max_lengths[column]}")
+    return invalid_rows
+
+
+def read_checkpoint(checkpoint_path: Path) -> Dict[str, int]:
+    """ Util function reading the progress of an import, empty progress if it never ran
+    """
+    if not checkpoint_path.exists():
+        return {'rows_done': 0, 'imported': 0, 'rejected': 0, 'boards_created': 0}
+    with open(checkpoint_path) as file:
+        return json.load(file)
+
+
+def write_checkpoint(checkpoint_path: Path, checkpoint: Dict[str, int]):
+    """ Util function saving the progress of an import, replaced atomically so a crash keeps the previous one
+    """
+    temp_path = checkpoint_path.with_suffix(".tmp")
+    with open(temp_path, 'w') as file:
+        json.dump(checkpoint, file)
+    os.replace(temp_path, checkpoint_path)
+
+
+def split_rejected(rows: List[Dict[str, str]], invalid_rows: Dict[int, str]) -> Tuple[List[Dict[str, str]], List[str]]:
+    """ Util function splitting a chunk into the valid rows and the reasons of the rejected ones
+    """
+    valid_rows = [row for index, row in enumerate(rows) if index not in invalid_rows]
+    reasons = [f"{rows[index]['task_title']}: {reason}" for index, reason in sorted(invalid_rows.items())]
+    return valid_rows, reasons
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value)
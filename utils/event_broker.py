@@ -0,0 +1,102 @@
+"""In-process fan-out of board events to live subscribers."""
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Dict, Any, Iterable, Set, Optional
+
+from logger import LOGGER
+from constants.event_constants import BoardEventConstraints as e_c
+
+
+def team_topic(team_id: int, tenant_id: Optional[str] = None) -> str:
+    # ids repeat across tenant databases, topics of a tenant carry its id
+    return f"{tenant_id}/team:{team_id}" if tenant_id is not None else f"team:{team_id}"
+
+
+def board_topic(board_id: int, tenant_id: Optional[str] = None) -> str:
+    return f"{tenant_id}/board:{board_id}" if tenant_id is not None else f"board:{board_id}"
+
+
+class Subscription:
+    """A single subscriber, owned by the event loop serving its connection.
+    Idle subscribers only hold a queue, no thread.
+    """
+
+    def __init__(self, topics: Iterable[str], loop: asyncio.AbstractEventLoop, max_queue_size: int):
+        self.topics = frozenset(topics)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+
+    def deliver(self, message: Dict[str, Any]):
+        """hands the message over to the subscriber loop, safe to call from any thread
+        :param message: event to deliver
+        :type message: Dict[str, Any]
+        """
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message: Dict[str, Any]):
+        # slow consumers lose their oldest events instead of blocking publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class EventBroker:
+    def __init__(self, max_queue_size: int = e_c.subscriber_queue_size.value):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics: Iterable[str], loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        """registers a subscriber for the given topics, must be called from the subscriber loop
+        :param topics: topics to listen on, see team_topic and board_topic
+        :type topics: Iterable[str]
+        :param loop: loop owning the subscription, defaults to the running loop
+        :type loop: Optional[asyncio.AbstractEventLoop]
+        """
+        subscription = Subscription(topics, loop or asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        LOGGER.info(f"Subscribed to: {', '.join(sorted(subscription.topics))}")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                topic_subscribers = self._subscribers.get(topic)
+                if topic_subscribers is None:
+                    continue
+                topic_subscribers.discard(subscription)
+                if not topic_subscribers:
+                    del self._subscribers[topic]
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, topics: Iterable[str], message: Dict[str, Any]) -> int:
+        """publishes the message to every subscriber of any of the topics, each subscriber gets it once
+        :param topics: topics the message belongs to
+        :type topics: Iterable[str]
+        :param message: event to publish
+        :type message: Dict[str, Any]
+        :return: number of subscribers the message was delivered to
+        :rtype: int
+        """
+        with self._lock:
+            receivers = set()
+            for topic in topics:
+                receivers.update(self._subscribers.get(topic, ()))
+
+        for subscription in receivers:
+            try:
+                subscription.deliver(message)
+            except RuntimeError:
+                # loop of the subscriber is already closed
+                self.unsubscribe(subscription)
+        return len(receivers)
+
+
+EVENT_BROKER = EventBroker()
@@ -1,22 +1,31 @@
-from typing import Dict, Union
+from typing import Dict, Union, Iterable, Callable, Optional, List
 import os
+import zipfile
+from itertools import islice
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
-from tabulate import tabulate
-
 from logger import LOGGER
 
 EXPORT_DIR_PATH = Path("out")
+# boards rendered per worker task by the archive export
+RENDER_BATCH_SIZE = 32
 
 
-def export_project_board(
+def render_project_board(
         board_task_details: Dict[str, Union[str, Dict[str, str]]]
 ) -> str:
-    """ Util function to export the project board to a readable, indented txt file
+    """ Util function rendering the project board as readable, indented text.
+    Free of I/O so boards can be rendered in worker processes
     :param board_task_details: board model details
     :type board_task_details: Dict[str, Union[str, Dict[str, str]]]
     """
+    # only needed for exports, keep it out of the startup imports
+    from tabulate import tabulate
+
     board_details_str = f"Board: {board_task_details['board_name']}   Team: {board_task_details['team_name']}\n"
     board_details_str += f"About Board: {board_task_details['board_description']}\n"
     board_details_str += f"Board Status: {board_task_details['board_status']}\n\n"
@@ -32,6 +41,25 @@ def export_project_board(
             tablefmt="github"
         )
     board_details_str += table_board_data
+    return board_details_str
+
+
+def render_project_boards(
+        boards_task_details: List[Dict[str, Union[str, Dict[str, str]]]]
+) -> List[str]:
+    """ Util function rendering a batch of project boards, one worker task per batch keeps the IPC overhead low
+    """
+    return [render_project_board(board_task_details) for board_task_details in boards_task_details]
+
+
+def export_project_board(
+        board_task_details: Dict[str, Union[str, Dict[str, str]]]
+) -> str:
+    """ Util function to export the project board to a readable, indented txt file
+    :param board_task_details: board model details
+    :type board_task_details: Dict[str, Union[str, Dict[str, str]]]
+    """
+    board_details_str = render_project_board(board_task_details)
 
     file_name = board_task_details['board_name'] + f"_{datetime.now().strftime('%Y%m%d%H%M%S')}.txt"
 
@@ -41,3 +69,65 @@ def export_project_board(
         LOGGER.info("Exported Board")
 
     return file_name
+
+
+def export_project_boards_archive(
+        boards_task_details: Iterable[Dict[str, Union[str, Dict[str, str]]]],
+        archive_prefix: str,
+        workers: int,
+        progress: Optional[Callable[[int], None]] = None
+) -> str:
+    """ Util function to export many project boards into one zip archive.
+    Boards are rendered by a pool of worker processes and written to the archive in order as they finish,
+    at most a few batches per worker are held in memory.
+    :param boards_task_details: board model details, each with the board_id
+    :type boards_task_details: Iterable[Dict[str, Union[str, Dict[str, str]]]]
+    :param archive_prefix: start of the archive file name
+    :type archive_prefix: str
+    :param workers: number of render processes, 1 renders in this process
+    :type workers: int
+    :param progress: called with the number of boards written so far
+    :type progress: Optional[Callable[[int], None]]
+    """
+    file_name = f"{archive_prefix}_{datetime.now().strftime('%Y%m%d%H%M%S')}.zip"
+    EXPORT_DIR_PATH.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    with zipfile.ZipFile(EXPORT_DIR_PATH / file_name, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        def write_board(board_task_details, board_details_str):
+            nonlocal written
+            archive.writestr(
+                f"{board_task_details['team_name']}/{board_task_details['board_id']}_"
+                f"{board_task_details['board_name']}.txt",
+                board_details_str
+            )
+            written += 1
+            if progress:
+                progress(written)
+
+        if workers <= 1:
+            for board_task_details in boards_task_details:
+                write_board(board_task_details, render_project_board(board_task_details))
+        else:
+            # spawn, forking the threaded server process could copy held locks into the workers
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                boards_task_details = iter(boards_task_details)
+                pending = deque()
+
+                def write_batch():
+                    batch, future = pending.popleft()
+                    for board_task_details, board_details_str in zip(batch, future.result()):
+                        write_board(board_task_details, board_details_str)
+
+                while True:
+                    batch = list(islice(boards_task_details, RENDER_BATCH_SIZE))
+                    if not batch:
+                        break
+                    pending.append((batch, executor.submit(render_project_boards, batch)))
+                    while len(pending) >= workers * 2 or (pending and pending[0][1].done()):
+                        write_batch()
+                while pending:
+                    write_batch()
+
+    LOGGER.info(f"Exported {written} boards to {file_name}")
+    return file_name
@@ -0,0 +1,409 @@
+"""Opt-in profiling of route handlers.
+
+With SETTINGS.profiling_enabled a request sent with the X-Profile header (or the profile query parameter) set
+to "cprofile" or "sample" and the admin token in X-Admin-Token has its route handler run under cProfile or
+a stack sampler. The SQL it runs is timed per statement through engine events. The profile is stored,
+its id returned in the X-Profile-Id response header and read with GET /admin/profiles/{profile_id}.
+
+With SETTINGS.profiling_continuous a sampler thread records the stack of every handler running, every
+profiling_continuous_interval_ms, and counts them per route (GET /admin/profiles/hot-stacks).
+Nothing is hooked in while profiling is disabled.
+"""
+import cProfile
+import functools
+import inspect
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.responses import JSONResponse
+
+from config import SETTINGS
+from logger import LOGGER
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "profile"
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+PROFILE_MODES = ("cprofile", "sample")
+# frames kept per sampled stack, from the innermost one
+MAX_STACK_DEPTH = 64
+# distinct stacks counted per route by the continuous sampler, further stacks are counted as OTHER_STACK
+MAX_STACKS_PER_ROUTE = 2000
+OTHER_STACK = "<other>"
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RequestProfile:
+    """profile of one request: handler profile, SQL per statement and wall time"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, mode: str, method: str, path: str):
+        self.profile_id = next(self._ids)
+        self.mode = mode
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.created = datetime.now()
+        self.wall_ms = 0.0
+        self.handler_ms = 0.0
+        self.functions: List[Dict[str, Any]] = []
+        self.stacks: Counter = Counter()
+        self.sql: Dict[str, Dict[str, Any]] = {}
+        self._sql_lock = threading.Lock()
+
+    def add_sql(self, statement: str, elapsed_ms: float):
+        with self._sql_lock:
+            entry = self.sql.setdefault(statement, {'count': 0, 'total_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.profile_id,
+            'mode': self.mode,
+            'method': self.method,
+            'path': self.path,
+            'route': self.route,
+            'created': self.created.isoformat(),
+            'wall_ms': round(self.wall_ms, 3),
+            'handler_ms': round(self.handler_ms, 3),
+            'sql_ms': round(sum(entry['total_ms'] for entry in self.sql.values()), 3),
+            'sql_statements': sum(entry['count'] for entry in self.sql.values())
+        }
+
+    def report(self) -> Dict[str, Any]:
+        sql = sorted(self.sql.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        return {
+            **self.summary(),
+            'sql': [
+                {'statement': statement, 'count': entry['count'], 'total_ms': round(entry['total_ms'], 3)}
+                for statement, entry in sql
+            ],
+            'functions': self.functions,
+            'stacks': [
+                {'stack': stack, 'samples': samples}
+                for stack, samples in self.stacks.most_common(SETTINGS.profiling_top_entries)
+            ]
+        }
+
+
+class ProfileStore:
+    """the latest profiles, the oldest one is dropped beyond max_profiles"""
+
+    def __init__(self, max_profiles: int):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[int, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles[profile.profile_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [profile.summary() for profile in reversed(profiles)]
+
+
+PROFILE_STORE = ProfileStore(SETTINGS.profiling_max_stored)
+_CURRENT_PROFILE: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+class ContinuousSampler:
+    """samples the stacks of the running route handlers and counts them per route"""
+
+    def __init__(self, interval_ms: float):
+        self.interval = interval_ms / 1000
+        # thread id -> route of the handler it runs, written by the handlers
+        self.active: Dict[int, str] = {}
+        self.routes: Dict[str, Counter] = {}
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+        LOGGER.info(f"Started continuous profiling every {self.interval * 1000:g}ms")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, route in list(self.active.items()):
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    stacks = self.routes.setdefault(route, Counter())
+                    stack = _folded_stack(frame)
+                    if stack not in stacks and len(stacks) >= MAX_STACKS_PER_ROUTE:
+                        stack = OTHER_STACK
+                    stacks[stack] += 1
+                    self.samples += 1
+
+    def hot_stacks(self, limit: int) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'samples': self.samples,
+                'interval_ms': self.interval * 1000,
+                'routes': {
+                    route: {
+                        'samples': sum(stacks.values()),
+                        'stacks': [
+                            {'stack': stack, 'samples': samples} for stack, samples in stacks.most_common(limit)
+                        ]
+                    }
+                    for route, stacks in sorted(self.routes.items(), key=lambda item: -sum(item[1].values()))
+                }
+            }
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+            self.samples = 0
+
+
+CONTINUOUS_SAMPLER = ContinuousSampler(SETTINGS.profiling_continuous_interval_ms)
+
+
+class ProfiledRoute(APIRoute):
+    """route class of the routers, runs the handler under the profiler of a profiled request"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if SETTINGS.profiling_enabled:
+            endpoint = _profiled(endpoint, path)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _profiled(endpoint: Callable, route: str) -> Callable:
+    # include_router builds the routes again from the endpoints of the router, which are wrapped already
+    if getattr(endpoint, 'profiled_route', None) is not None:
+        return endpoint
+
+    # FastAPI reads the parameters of the handler through __wrapped__
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_handler(*args, **kwargs):
+            thread_id = _enter(route)
+            try:
+                profile = _CURRENT_PROFILE.get()
+                if profile is None:
+                    return await endpoint(*args, **kwargs)
+                # the event loop thread, cProfile would also count the other requests it serves
+                with _Sampler(profile, thread_id):
+                    return await endpoint(*args, **kwargs)
+            finally:
+                _leave(thread_id)
+        async_handler.profiled_route = route
+        return async_handler
+
+    @functools.wraps(endpoint)
+    def handler(*args, **kwargs):
+        thread_id = _enter(route)
+        try:
+            profile = _CURRENT_PROFILE.get()
+            if profile is None:
+                return endpoint(*args, **kwargs)
+            if profile.mode == "cprofile":
+                return _run_with_cprofile(profile, endpoint, args, kwargs)
+            with _Sampler(profile, thread_id):
+                return endpoint(*args, **kwargs)
+        finally:
+            _leave(thread_id)
+    handler.profiled_route = route
+    return handler
+
+
+def _enter(route: str) -> int:
+    thread_id = threading.get_ident()
+    profile = _CURRENT_PROFILE.get()
+    if profile is not None:
+        profile.route = route
+    if SETTINGS.profiling_continuous:
+        CONTINUOUS_SAMPLER.active[thread_id] = route
+    return thread_id
+
+
+def _leave(thread_id: int):
+    if SETTINGS.profiling_continuous:
+        CONTINUOUS_SAMPLER.active.pop(thread_id, None)
+
+
+def _run_with_cprofile(profile: RequestProfile, endpoint: Callable, args, kwargs):
+    profiler = cProfile.Profile()
+    start_time = time.perf_counter()
+    profiler.enable()
+    try:
+        return endpoint(*args, **kwargs)
+    finally:
+        profiler.disable()
+        profile.handler_ms = (time.perf_counter() - start_time) * 1000
+        stats = pstats.Stats(profiler)
+        # the frames of this module and the profiler itself are left out
+        entries = [
+            entry for entry in stats.stats.items()
+            if entry[0][0] != __file__ and "_lsprof.Profiler" not in entry[0][2]
+        ]
+        top = sorted(entries, key=lambda item: item[1][3], reverse=True)[:SETTINGS.profiling_top_entries]
+        profile.functions = [
+            {
+                'function': f"{_short_path(filename)}:{line}({name})",
+                'calls': calls,
+                'total_ms': round(total_time * 1000, 3),
+                'cumulative_ms': round(cumulative_time * 1000, 3)
+            }
+            for (filename, line, name), (_, calls, total_time, cumulative_time, _) in top
+        ]
+
+
+class _Sampler:
+    """samples the stack of one thread while the block runs"""
+
+    def __init__(self, profile: RequestProfile, thread_id: int):
+        self.profile = profile
+        self.thread_id = thread_id
+        self.interval = SETTINGS.profiling_sample_interval_ms / 1000
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-request", daemon=True)
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        self._thread.start()
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.profile.handler_ms = (time.perf_counter() - self.start_time) * 1000
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.profile.stacks[_folded_stack(frame)] += 1
+
+
+def _folded_stack(frame) -> str:
+    """frames from the outermost to the innermost one separated by ;, as read by flame graph tools"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(f"{_short_path(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+@functools.lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    if filename.startswith(PROJECT_DIR):
+        return os.path.relpath(filename, PROJECT_DIR)
+    parts = filename.replace("\\", "/").split("/")
+    return "/".join(parts[-2:])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _CURRENT_PROFILE.get() is not None:
+        context.profile_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _CURRENT_PROFILE.get()
+    start_time = getattr(context, 'profile_start_time', None)
+    if profile is not None and start_time is not None:
+        profile.add_sql(statement, (time.perf_counter() - start_time) * 1000)
+
+
+def install_sql_timing():
+    """times the statements of profiled requests on every engine, tenant engines included"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware starting the profile of requests asking for one with the admin token"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = _requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if mode not in PROFILE_MODES or not is_profiling_admin(_header(scope, ADMIN_TOKEN_HEADER)):
+            await JSONResponse(
+                {'detail': f"Profiling needs the admin token and a mode of {', '.join(PROFILE_MODES)}"},
+                status_code=403
+            )(scope, receive, send)
+            return
+
+        profile = RequestProfile(mode, scope["method"], scope["path"])
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", str(profile.profile_id).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _CURRENT_PROFILE.set(profile)
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.wall_ms = (time.perf_counter() - start_time) * 1000
+            _CURRENT_PROFILE.reset(token)
+            PROFILE_STORE.add(profile)
+            LOGGER.info(f"Profiled {profile.method} {profile.path} in {profile.wall_ms:.1f}ms, id {profile.profile_id}")
+
+
+def is_profiling_admin(token: Optional[str]) -> bool:
+    # no token configured means nobody may profile
+    return bool(SETTINGS.profiling_admin_token) and token == SETTINGS.profiling_admin_token
+
+
+def is_admin(token: Optional[str]) -> bool:
+    # no token configured means the admin routes are closed
+    return bool(SETTINGS.admin_token) and token == SETTINGS.admin_token
+
+
+def _requested_mode(scope) -> Optional[str]:
+    mode = _header(scope, PROFILE_HEADER)
+    if mode is None and scope.get("query_string"):
+        modes = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY)
+        mode = modes[0] if modes else None
+    return mode
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for header_name, value in scope["headers"]:
+        if header_name == name:
+            return value.decode("latin-1")
+    return None
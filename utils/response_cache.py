@@ -0,0 +1,98 @@
+"""Cache of encoded JSON responses of list endpoints.
+
+An entry holds the response body together with the versions of the tables it was built from
+(see db_models.ChangeCounter). A request reads the current versions with one query and gets the
+stored bytes while they are unchanged, otherwise the response is built and stored again.
+The versions live in the database so writes of every worker invalidate the caches of all of them.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from config import SETTINGS
+from database import db_models as db_model
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {'hits': 0, 'misses': 0}
+
+    def get(self, key: Hashable, versions: Tuple[int, ...]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != versions:
+                self.metrics['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics['hits'] += 1
+            return entry[1]
+
+    def put(self, key: Hashable, versions: Tuple[int, ...], body: bytes):
+        with self._lock:
+            self._entries[key] = (versions, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.metrics, 'entries': len(self._entries), 'max_entries': self.max_entries}
+
+
+RESPONSE_CACHE = ResponseCache(SETTINGS.response_cache_max_entries)
+
+
+def table_versions(db: Session, table_names: Iterable[str]) -> Tuple[int, ...]:
+    """current versions of the tables, 0 for a table never written"""
+    table_names = list(table_names)
+    versions = dict(
+        db.query(db_model.ChangeCounter.table_name, db_model.ChangeCounter.version).filter(
+            db_model.ChangeCounter.table_name.in_(table_names)
+        )
+    )
+    return tuple(versions.get(table_name, 0) for table_name in table_names)
+
+
+def encode_response(response_model, content: Any) -> bytes:
+    """the body FastAPI sends for content returned by a route with this response_model"""
+    model = content if isinstance(content, BaseModel) else response_model(**content)
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def cached_response(
+        db: Session,
+        key: Hashable,
+        table_names: Tuple[str, ...],
+        build: Callable[[], bytes]
+) -> Response:
+    """returns the cached body for key while the tables are unchanged, builds and stores it otherwise
+    :param db: request session, reads the table versions
+    :type db: Session
+    :param key: endpoint and parameters of the request
+    :type key: Hashable
+    :param table_names: tables the response is built from
+    :type table_names: Tuple[str, ...]
+    :param build: builds the encoded body
+    :type build: Callable[[], bytes]
+    """
+    # the log store writes outside of the session, its changes are not counted
+    if not SETTINGS.response_cache_enabled or SETTINGS.storage_backend != "sqlite":
+        return Response(build(), media_type="application/json")
+
+    # read before building, a write racing the build leaves an entry which is already stale
+    versions = table_versions(db, table_names)
+    # tenants have their own tables and versions
+    key = (db.info.get('tenant_id'), key)
+    body = RESPONSE_CACHE.get(key, versions)
+    if body is None:
+        body = build()
+        RESPONSE_CACHE.put(key, versions, body)
+    return Response(body, media_type="application/json")
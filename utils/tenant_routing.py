@@ -0,0 +1,41 @@
+"""Routing of requests to the database of their tenant.
+
+A request names its tenant with the X-Tenant-Id header or with a /tenants/<tenant_id> path prefix,
+e.g. GET /tenants/acme/users. The prefix is stripped by TenantPathMiddleware before routing, so every
+router serves both forms. Requests naming no tenant use the default database.
+"""
+from typing import Optional
+
+from fastapi import Request
+from starlette.responses import JSONResponse
+
+TENANT_HEADER = "x-tenant-id"
+TENANT_PATH_PREFIX = "/tenants/"
+
+
+class TenantPathMiddleware:
+    """ASGI middleware moving the tenant of a /tenants/<tenant_id>/... path into the request state"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(TENANT_PATH_PREFIX):
+            tenant_id, _, path = scope["path"][len(TENANT_PATH_PREFIX):].partition("/")
+            if not tenant_id:
+                # /tenants//users names no tenant, it must not fall through to the default database
+                await JSONResponse({'detail': "Empty tenant id"}, status_code=400)(scope, receive, send)
+                return
+            scope = {**scope, "path": "/" + path, "raw_path": ("/" + path).encode()}
+            scope.setdefault("state", {})["tenant_id"] = tenant_id
+        await self.app(scope, receive, send)
+
+
+def request_tenant(request: Request) -> Optional[str]:
+    """tenant of the request, from the path prefix or else the header. An empty id is returned as is and
+    rejected when the database is opened, it never means the default database
+    """
+    tenant_id = getattr(request.state, "tenant_id", None)
+    if tenant_id is None:
+        tenant_id = request.headers.get(TENANT_HEADER)
+    return tenant_id
@@ -0,0 +1,66 @@
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+# statistics reported for the time spent in a status, in seconds
+PERCENTILES = (50, 90, 99)
+
+
+def time_in_status(
+        transition_chunks: Iterable[Sequence[Tuple[int, str, int]]]
+) -> Dict[str, Dict[str, Any]]:
+    """ Util function computing the distribution of the time tasks spent in each status
+    :param transition_chunks: chunks of (task_id, to_status, transition_ms) rows ordered by task and time
+    :type transition_chunks: Iterable[Sequence[Tuple[int, str, int]]]
+    :return: per status the number of finished stays, their mean, percentiles and max in seconds,
+        and the number of tasks currently in the status
+    """
+    # only needed for the status history metrics, keep it out of the startup imports
+    import numpy as np
+
+    status_codes: Dict[str, int] = {}
+    task_id_parts: List[np.ndarray] = []
+    status_parts: List[np.ndarray] = []
+    time_parts: List[np.ndarray] = []
+    for chunk in transition_chunks:
+        task_id_parts.append(np.fromiter((row[0] for row in chunk), dtype=np.int64, count=len(chunk)))
+        status_parts.append(np.fromiter(
+            (status_codes.setdefault(row[1], len(status_codes)) for row in chunk), dtype=np.int32, count=len(chunk)
+        ))
+        time_parts.append(np.fromiter((row[2] for row in chunk), dtype=np.int64, count=len(chunk)))
+
+    if not status_codes:
+        return {}
+
+    task_ids = np.concatenate(task_id_parts)
+    statuses = np.concatenate(status_parts)
+    times = np.concatenate(time_parts)
+
+    # a stay in a status ends with the next transition of the same task
+    same_task = task_ids[1:] == task_ids[:-1]
+    stay_statuses = statuses[:-1][same_task]
+    stay_seconds = (times[1:] - times[:-1])[same_task] / 1000
+    # the last transition of a task is its current status
+    current_statuses = statuses[np.append(~same_task, True)]
+    current_counts = np.bincount(current_statuses, minlength=len(status_codes))
+
+    order = np.argsort(stay_statuses, kind="stable")
+    stay_statuses = stay_statuses[order]
+    stay_seconds = stay_seconds[order]
+    bounds = np.searchsorted(stay_statuses, np.arange(len(status_codes) + 1))
+
+    distributions = {}
+    for status, code in status_codes.items():
+        seconds = stay_seconds[bounds[code]:bounds[code + 1]]
+        distribution = {
+            'stays': int(seconds.size),
+            'current': int(current_counts[code]),
+            'mean_seconds': None,
+            'max_seconds': None
+        }
+        distribution.update({f'p{percentile}_seconds': None for percentile in PERCENTILES})
+        if seconds.size:
+            distribution['mean_seconds'] = float(seconds.mean())
+            distribution['max_seconds'] = float(seconds.max())
+            for percentile, value in zip(PERCENTILES, np.percentile(seconds, PERCENTILES)):
+                distribution[f'p{percentile}_seconds'] = float(value)
+        distributions[str(status)] = distribution
+    return distributions
@@ -0,0 +1,109 @@
+"""Warm-up of a worker before it reports ready.
+
+Opens the connections of the pool, configures the mappers and sends the hot read routes through the app
+once, so compiled statements, loader strategies and response serialization are in place when the first
+real request arrives. GET /readyz answers 503 until the warm-up has finished.
+"""
+import time
+from typing import Dict, List
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import configure_mappers
+
+from config import SETTINGS
+from database import db_models as db_model
+from logger import LOGGER
+
+
+class Readiness:
+    def __init__(self):
+        self.warmed_up = False
+        self.timings: Dict[str, float] = {}
+
+
+READINESS = Readiness()
+
+
+async def warm_up(app, bind: Engine) -> Dict[str, float]:
+    """warms the worker up and marks it ready
+    :param app: ASGI app the hot routes are sent through
+    :param bind: engine of the default database
+    :type bind: Engine
+    :return: milliseconds spent per step
+    """
+    timings = {}
+
+    start_time = time.perf_counter()
+    # checked out together so the pool keeps db_pool_size configured connections
+    connections = [bind.connect() for _ in range(SETTINGS.db_pool_size)]
+    for connection in connections:
+        connection.close()
+    timings['connections'] = _elapsed_ms(start_time)
+
+    start_time = time.perf_counter()
+    configure_mappers()
+    timings['mappers'] = _elapsed_ms(start_time)
+
+    start_time = time.perf_counter()
+    for path in _hot_paths(bind):
+        status_code = await _get(app, path)
+        if status_code >= 500:
+            LOGGER.warning(f"Warm-up request GET {path} failed with {status_code}")
+    timings['requests'] = _elapsed_ms(start_time)
+
+    READINESS.timings = timings
+    READINESS.warmed_up = True
+    LOGGER.info(f"Warmed up in {sum(timings.values()):.1f}ms {timings}")
+    return timings
+
+
+def _hot_paths(bind: Engine) -> List[str]:
+    """the read routes with ids of existing rows, routes of missing rows still run everything up to the query"""
+    with bind.connect() as connection:
+        user_id = connection.execute(select(func.min(db_model.User.user_id))).scalar() or 0
+        team_id = connection.execute(select(func.min(db_model.Team.team_id))).scalar() or 0
+    return [
+        "/users",
+        "/teams",
+        f"/user/{user_id}",
+        f"/user/teams/{user_id}",
+        f"/team/{team_id}",
+        f"/team/users/{team_id}",
+        f"/boards/{team_id}",
+    ]
+
+
+async def _get(app, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"warm-up")],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 0),
+    }
+    response = {'status': 500}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response['status'] = message["status"]
+
+    try:
+        await app(scope, receive, send)
+    except Exception as e:
+        LOGGER.warning(f"Warm-up request GET {path} raised {e!r}")
+    return response['status']
+
+
+def _elapsed_ms(start_time: float) -> float:
+    return round((time.perf_counter() - start_time) * 1000, 1)